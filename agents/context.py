@@ -0,0 +1,209 @@
+# context.py
+# ----------
+# Token-budgeted prompt assembly for memory-enabled agent invocations.
+#
+# This module defines:
+#   - estimate_tokens: Cheap local token estimate (no tokenizer or API round trip).
+#   - ContextBuilder: Precomputes an agent's static system prompt once, then fits
+#                     memory context and conversation history into a token budget,
+#                     summarizing or dropping the oldest turns first.
+#
+# Purpose:
+#   invoke_*_with_memory used to paste the whole system prompt, every memory and the
+#   full message history into each request, so prompts grew without bound as a
+#   conversation got longer. Input tokens drive both Gemini latency and cost.
+
+import math
+import os
+from typing import Callable, List, Sequence
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
+from logger_config import setup_logger
+
+logger = setup_logger(__name__)
+
+# -----------------------
+# Budget configuration
+# -----------------------
+# Total input tokens for system prompt + memory + history
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "8000"))
+# Share of the budget the memory section may use
+CONTEXT_MEMORY_TOKEN_BUDGET = int(os.getenv("CONTEXT_MEMORY_TOKEN_BUDGET", "1000"))
+# Share of the budget the summary of dropped turns may use (0 = drop without summary)
+CONTEXT_SUMMARY_TOKEN_BUDGET = int(os.getenv("CONTEXT_SUMMARY_TOKEN_BUDGET", "500"))
+
+_CHARS_PER_TOKEN = 4
+# Fixed per-message overhead (role markers, separators)
+_MESSAGE_OVERHEAD = 4
+# Characters kept from each side of a summarized turn
+_SUMMARY_SNIPPET = 160
+
+_MEMORY_RULES = """
+Rules:
+- Use memory facts if available
+- If user's name is known, use it
+- Do NOT say you lack personal info if memory exists
+"""
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximates tokens as ~4 characters each, the usual ratio for English text."""
+    return math.ceil(len(text) / _CHARS_PER_TOKEN)
+
+
+def _content_text(message: BaseMessage) -> str:
+    content = message.content
+    if isinstance(content, str):
+        return content
+    # Multimodal content blocks: count text parts, and the repr of anything else
+    return " ".join(block.get("text", "") if isinstance(block, dict) else str(block) for block in content)
+
+
+def _snippet(text: str) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= _SUMMARY_SNIPPET else text[:_SUMMARY_SNIPPET - 3] + "..."
+
+
+class ContextBuilder:
+    """
+    Summary:
+        Builds the message list for one agent turn within a token budget.
+
+    Args:
+        system_prompt (SystemMessage): The agent's static system prompt.
+        token_budget (int): Maximum estimated input tokens per request.
+        memory_budget (int): Maximum tokens spent on the memory section.
+        summary_budget (int): Maximum tokens spent summarizing dropped turns.
+        token_counter (Callable[[str], int]): Token estimator; defaults to estimate_tokens.
+        include_system_prompt (bool): Repeat the static prompt in the built system
+            message. The agents already pass it to create_agent, which prepends it
+            to every model call, so by default only the dynamic memory section is
+            emitted (its tokens still count against the budget).
+    """
+
+    def __init__(
+        self,
+        system_prompt: SystemMessage,
+        token_budget: int = CONTEXT_TOKEN_BUDGET,
+        memory_budget: int = CONTEXT_MEMORY_TOKEN_BUDGET,
+        summary_budget: int = CONTEXT_SUMMARY_TOKEN_BUDGET,
+        token_counter: Callable[[str], int] = estimate_tokens,
+        include_system_prompt: bool = False,
+    ):
+        self.token_budget = token_budget
+        self.memory_budget = memory_budget
+        self.summary_budget = summary_budget
+        self.count = token_counter
+        self.include_system_prompt = include_system_prompt
+
+        # Static portion, computed once per agent instead of once per call
+        self.static_prompt = system_prompt.content
+        self.static_tokens = self.count(self.static_prompt) + self.count(_MEMORY_RULES) + _MESSAGE_OVERHEAD
+
+    # -----------------------
+    # Public API
+    # -----------------------
+    def message_tokens(self, message: BaseMessage) -> int:
+        """Estimated tokens of one message, including tool-call arguments."""
+        tokens = self.count(_content_text(message)) + _MESSAGE_OVERHEAD
+        for call in getattr(message, "tool_calls", None) or []:
+            tokens += self.count(call.get("name", "")) + self.count(str(call.get("args", "")))
+        return tokens
+
+    def build(self, messages: Sequence[BaseMessage], memory_context: str = "") -> List[BaseMessage]:
+        """
+        Summary:
+            Returns [memory system message] + as much recent history as fits.
+
+            Leading system messages in ``messages`` are dropped in favour of the
+            agent's own prompt. History is handled in whole turns (a user message plus the AI and
+            tool messages answering it), so tool calls are never separated from their
+            results. The latest turn is always kept; older turns are dropped oldest
+            first and, if summary_budget allows, replaced by a one-line summary each.
+
+        Args:
+            messages (Sequence[BaseMessage]): Conversation so far, ending with the new query.
+            memory_context (str): Newline-separated memories, most relevant first.
+
+        Returns:
+            List[BaseMessage]: Messages to send to the agent.
+        """
+        history = list(messages)
+        while history and isinstance(history[0], SystemMessage):
+            history.pop(0)
+
+        memory = self._fit_memory(memory_context)
+        remaining = self.token_budget - self.static_tokens - self.count(memory)
+
+        turns = self._split_turns(history)
+        turn_tokens = [sum(self.message_tokens(m) for m in turn) for turn in turns]
+        # Something will be dropped: reserve room for its summary up front
+        reserve = self.summary_budget if sum(turn_tokens) > remaining else 0
+
+        kept: List[List[BaseMessage]] = []
+        # Newest turn first; the current query is always included
+        for turn, tokens in zip(reversed(turns), reversed(turn_tokens)):
+            if kept and tokens > remaining - reserve:
+                break
+            kept.append(turn)
+            remaining -= tokens
+        kept.reverse()
+        dropped = turns[:len(turns) - len(kept)]
+
+        summary = self._summarize(dropped, min(self.summary_budget, max(remaining, 0))) if dropped else ""
+        remaining -= self.count(summary)
+        content = f"## MEMORY CONTEXT\n{memory}\n"
+        if self.include_system_prompt:
+            content = f"{self.static_prompt}\n\n{content}"
+        if summary:
+            content += f"\n## EARLIER CONVERSATION (summarized)\n{summary}\n"
+        content += _MEMORY_RULES
+
+        result = [SystemMessage(content=content)] + [m for turn in kept for m in turn]
+        if dropped:
+            logger.debug(
+                "Context trimmed: kept %d turns, dropped %d (summarized: %s), ~%d tokens",
+                len(kept), len(dropped), bool(summary), self.token_budget - remaining,
+            )
+        return result
+
+    # -----------------------
+    # Internals
+    # -----------------------
+    def _fit_memory(self, memory_context: str) -> str:
+        # Memories arrive ranked by relevance; keep the best ones that fit
+        lines, used = [], 0
+        for line in memory_context.splitlines():
+            tokens = self.count(line) + 1
+            if used + tokens > self.memory_budget:
+                break
+            lines.append(line)
+            used += tokens
+        return "\n".join(lines)
+
+    @staticmethod
+    def _split_turns(history: List[BaseMessage]) -> List[List[BaseMessage]]:
+        turns: List[List[BaseMessage]] = []
+        for message in history:
+            if isinstance(message, HumanMessage) or not turns:
+                turns.append([message])
+            else:
+                turns[-1].append(message)
+        return turns
+
+    def _summarize(self, turns: List[List[BaseMessage]], budget: int) -> str:
+        # Extractive: the question and final answer of each dropped turn, newest kept
+        lines: List[str] = []
+        used = 0
+        for turn in reversed(turns):
+            question = _content_text(turn[0]) if isinstance(turn[0], HumanMessage) else ""
+            answers = [m for m in turn if isinstance(m, AIMessage) and _content_text(m).strip()]
+            answer = _content_text(answers[-1]) if answers else ""
+            line = f"- User: {_snippet(question)} | Assistant: {_snippet(answer)}"
+            tokens = self.count(line) + 1
+            if used + tokens > budget:
+                break
+            lines.append(line)
+            used += tokens
+        lines.reverse()
+        return "\n".join(lines)
@@ -0,0 +1,137 @@
+# fast_path.py
+# ------------
+# Deterministic fast path in front of the Core Agent.
+#
+# This module defines:
+#   - FastPathRouter: Recognizes plain arithmetic and "date N days from today"
+#                     queries with local regexes, answers them by calling the tool
+#                     logic directly, and counts how often that happens.
+#   - fast_path_router: Shared router used by the Core Agent entry points and main.py.
+#
+# Purpose:
+#   Queries such as "What is (234 * 12) + 98?" do not need an LLM to pick a tool.
+#   Answering them locally skips at least two Gemini round trips. Anything the
+#   parsers do not match exactly falls through to the agent unchanged.
+
+import os
+import re
+import threading
+from typing import Dict, Optional
+
+from tools.date_utility import add_days_to_today
+from tools.math_tool import compile_expression, evaluate_expression, format_result
+from logger_config import setup_logger
+from tracing import annotate
+
+logger = setup_logger(__name__)
+
+FAST_PATH_ENABLED = os.getenv("FAST_PATH_ENABLED", "1").lower() not in ("0", "false", "no")
+# Largest day offset answered locally; larger offsets go to the agent
+FAST_PATH_MAX_DAYS = int(os.getenv("FAST_PATH_MAX_DAYS", "36500"))
+
+# "What is (234 * 12) + 98?", "calculate 3*499", "12.5 % 5" — digits, operators and
+# parentheses only, optionally behind a short question prefix.
+_MATH_QUERY = re.compile(
+    r"^\s*(?:(?:what\s+is|what's|whats|calculate|compute|evaluate)\s*:?\s*)?"
+    r"(?P<expression>[\d\s.+\-*/%()]+?)\s*(?:=\s*)?[?.!]*\s*$",
+    re.IGNORECASE,
+)
+_HAS_OPERATOR = re.compile(r"\d\s*(?:\*\*|//|[+\-*/%])\s*[\d(+\-]")
+# Dates and phone numbers, not arithmetic: "2024-01-15", "555-123-4567", "12/25/2024",
+# or any number with a leading zero ("007"); these go to the agent
+_NOT_ARITHMETIC = re.compile(r"\d+([-/])\d+(?:\1\d+)+|(?<![\d.])0\d")
+
+# "What will be the date 45 days from today?", "What is the date in 7 days?",
+# "10 days ago", "date after 3 days"
+_DATE_QUERY = re.compile(
+    r"^\s*(?:(?:what\s+will\s+be|what\s+is|what's)\s+the\s+date|what\s+date\s+(?:will\s+it\s+be|is\s+it|was\s+it)|the\s+date|date)?"
+    r"\s*(?:(?:in|after)\s+(?P<after>\d{1,7})\s+days?(?:\s+from\s+(?:today|now))?"
+    r"|(?P<ahead>\d{1,7})\s+days?\s+(?:from\s+(?:today|now)|later|after\s+today)"
+    r"|(?P<ago>\d{1,7})\s+days?\s+(?:ago|before\s+today))"
+    r"\s*[?.!]*\s*$",
+    re.IGNORECASE,
+)
+
+
+class FastPathRouter:
+    """
+    Summary:
+        Answers fully deterministic queries without the LLM and keeps hit counters.
+
+    Args:
+        enabled (bool): When False every query falls through to the agent.
+    """
+
+    def __init__(self, enabled: bool = FAST_PATH_ENABLED):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._counts = {"queries": 0, "math": 0, "date": 0, "fallthrough": 0}
+
+    def route(self, query: str) -> Optional[str]:
+        """
+        Summary:
+            Returns a final answer for a recognized query, or None to use the agent.
+
+        Args:
+            query (str): The user's message.
+
+        Returns:
+            Optional[str]: Human-readable answer, or None if the query is not a pure
+                math/date query (or the tool logic failed, so the agent can explain).
+        """
+        kind, answer = None, None
+        if self.enabled and isinstance(query, str):
+            answer = self._math(query)
+            kind = "math"
+            if answer is None:
+                answer = self._date(query)
+                kind = "date"
+        with self._lock:
+            self._counts["queries"] += 1
+            self._counts[kind if answer is not None else "fallthrough"] += 1
+        if answer is not None:
+            logger.info(f"[FAST PATH] {kind} query answered without the LLM")
+            annotate(fast_path=kind)
+        return answer
+
+    def stats(self) -> Dict[str, float]:
+        """Returns query/hit/fallthrough counters and the fast-path hit rate."""
+        with self._lock:
+            counts = dict(self._counts)
+        hits = counts["math"] + counts["date"]
+        counts["hit_rate"] = hits / counts["queries"] if counts["queries"] else 0.0
+        return counts
+
+    @staticmethod
+    def _math(query: str) -> Optional[str]:
+        match = _MATH_QUERY.match(query)
+        if match is None:
+            return None
+        expression = " ".join(match.group("expression").split())
+        if not _HAS_OPERATOR.search(expression) or _NOT_ARITHMETIC.search(expression):
+            return None
+        try:
+            result = evaluate_expression(compile_expression(expression))
+        except Exception as e:
+            logger.debug("Fast path math fell through for %r: %s", expression, e)
+            return None
+        return f"{expression} = {format_result(result)}"
+
+    @staticmethod
+    def _date(query: str) -> Optional[str]:
+        match = _DATE_QUERY.match(query)
+        if match is None:
+            return None
+        days = int(match.group("after") or match.group("ahead") or match.group("ago"))
+        if days > FAST_PATH_MAX_DAYS:
+            return None
+        try:
+            if match.group("ago"):
+                return f"The date {days} day{'s' if days != 1 else ''} ago was {add_days_to_today(-days)}."
+            return f"The date {days} day{'s' if days != 1 else ''} from today will be {add_days_to_today(days)}."
+        except Exception as e:
+            logger.debug("Fast path date fell through for %d days: %s", days, e)
+            return None
+
+
+fast_path_router = FastPathRouter()
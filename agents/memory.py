@@ -0,0 +1,256 @@
+# memory.py
+# ---------
+# Shared memory helpers for the Core and Weather agents.
+# The backend (Mem0 or the local vector store) comes from client.get_memory_store().
+#
+# This module defines:
+#   - MemorySearchCache: Per-user TTL + LRU cache of memory search results keyed by
+#                        normalized query, invalidated when new memories are written.
+#   - needs_memory_search: Decides whether a query refers to the user's past.
+#   - retrieve_memories: The user's profile (always) plus a cached memory search
+#                        (only when the query needs it), serialized for the system prompt.
+#   - aretrieve_memories: Async variant; cache hits return without leaving the event loop.
+#   - save_interaction: Updates the user's profile and queues the interaction on the
+#                       write-behind queue.
+#   - memory_write_queue: Shared write-behind queue persisting to the memory backend.
+#
+# Purpose:
+#   One implementation of memory retrieval and persistence for both agents, so the
+#   cache and the write queue see every read and write for a user.
+
+import asyncio
+import atexit
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set, Tuple
+
+from client import get_memory_store
+from agents.memory_profile import user_profiles
+from agents.memory_writer import MemoryWriteBehindQueue
+from logger_config import setup_logger
+from tracing import span, traced
+
+logger = setup_logger(__name__)
+
+# -----------------------
+# Cache configuration
+# -----------------------
+MEMORY_SEARCH_CACHE_TTL = float(os.getenv("MEMORY_SEARCH_CACHE_TTL", "300"))
+MEMORY_SEARCH_CACHE_MAX_SIZE = int(os.getenv("MEMORY_SEARCH_CACHE_MAX_SIZE", "1024"))
+# "auto": search only for queries that refer to the user; "always": search every query
+MEMORY_SEARCH_MODE = os.getenv("MEMORY_SEARCH_MODE", "auto").lower()
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+# First-person references and recall cues; queries without them are answered from the profile
+_PERSONAL_QUERY = re.compile(
+    r"\b(i|i'm|i've|i'd|me|my|mine|myself|we|our|us|remember|recall|last time|previous(ly)?|"
+    r"before|earlier|again|usual(ly)?|favou?rite|prefer\w*)\b",
+    re.IGNORECASE,
+)
+
+
+class MemorySearchCache:
+    """
+    Summary:
+        Caches serialized memory search results per (user, normalized query).
+
+    Args:
+        ttl (float): Seconds a cached result stays fresh.
+        max_size (int): Total entries across all users before LRU eviction.
+    """
+
+    def __init__(self, ttl: float = MEMORY_SEARCH_CACHE_TTL, max_size: int = MEMORY_SEARCH_CACHE_MAX_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, str]]" = OrderedDict()
+        self._by_user: Dict[str, Set[Tuple[str, str]]] = {}
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._invalidations = 0
+
+    @staticmethod
+    def normalize(query: str) -> str:
+        """Lowercases, drops punctuation and collapses whitespace."""
+        return " ".join(_PUNCTUATION.sub(" ", query.casefold()).split())
+
+    def get(self, user_id: str, query: str) -> Optional[str]:
+        """Returns the cached result, or None on a miss or expired entry."""
+        key = (user_id, self.normalize(query))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    self._remove(key)
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry[1]
+
+    def generation(self, user_id: str) -> int:
+        """Returns the user's invalidation counter; pass it to put() to reject stale results."""
+        with self._lock:
+            return self._generations.get(user_id, 0)
+
+    def put(self, user_id: str, query: str, value: str, generation: Optional[int] = None) -> None:
+        """
+        Stores a result, evicting the least recently used entries above max_size.
+        If ``generation`` is given and the user was invalidated since, the result
+        came from a search that raced a write and is not stored.
+        """
+        key = (user_id, self.normalize(query))
+        with self._lock:
+            if generation is not None and generation != self._generations.get(user_id, 0):
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            self._by_user.setdefault(user_id, set()).add(key)
+            while len(self._entries) > self.max_size:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate(self, user_id: str) -> None:
+        """Drops every cached result for a user (their memories changed)."""
+        with self._lock:
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+            keys = self._by_user.pop(user_id, set())
+            for key in keys:
+                self._entries.pop(key, None)
+            if keys:
+                self._invalidations += 1
+
+    def stats(self) -> Dict[str, int]:
+        """Returns hit/miss/invalidation counters and the current size."""
+        with self._lock:
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "invalidations": self._invalidations,
+                "size": len(self._entries),
+            }
+
+    def _remove(self, key: Tuple[str, str]) -> None:
+        self._entries.pop(key, None)
+        user_keys = self._by_user.get(key[0])
+        if user_keys is not None:
+            user_keys.discard(key)
+            if not user_keys:
+                del self._by_user[key[0]]
+
+
+memory_search_cache = MemorySearchCache()
+
+
+# -----------------------
+# Write-behind persistence
+# -----------------------
+def _write_memories(user_id: str, messages: List[dict]) -> None:
+    """Persists one user's batched messages with a single backend add call."""
+    with span("memory.write", messages=len(messages)) as write_span:
+        result = get_memory_store().add(messages, user_id=user_id)
+        write_span.set(memories=len(result.get("results", [])))
+    # New memories exist now; cached searches for this user are stale
+    memory_search_cache.invalidate(user_id)
+    # Mem0 returns the facts it extracted ("Name is Alice"); fold them into the profile.
+    # Memories that are the user's words verbatim (the local store keeps messages as-is)
+    # were already read as user input by save_interaction.
+    # Failures here must not make the queue retry (and duplicate) the add above.
+    said = {m.get("content", "").strip() for m in messages if m.get("role") == "user"}
+    try:
+        memories = [mem.get("memory", "") for mem in result.get("results", [])]
+        user_profiles.update(user_id, [memory for memory in memories if memory.strip() not in said], extracted=True)
+    except Exception as e:
+        logger.error(f"Error updating memory profile: {str(e)}", exc_info=True)
+    logger.info(f"Memory saved successfully: {len(result.get('results', []))} memories added for user: {user_id}")
+
+
+memory_write_queue = MemoryWriteBehindQueue(_write_memories)
+atexit.register(memory_write_queue.shutdown)
+
+
+# -----------------------
+# Memory helpers
+# -----------------------
+def needs_memory_search(query: str) -> bool:
+    """True if the query may depend on memories beyond the profile."""
+    if not query.strip():
+        return False
+    if MEMORY_SEARCH_MODE == "always":
+        return True
+    return bool(_PERSONAL_QUERY.search(query))
+
+
+def retrieve_memories(query: str, user_id: str) -> str:
+    logger.info(f"Retrieving memories for user: {user_id}")
+    with span("memory.retrieve") as retrieve_span:
+        profile = user_profiles.render(user_id)
+        if not needs_memory_search(query):
+            retrieve_span.set(searched=False)
+            return profile
+        cached = memory_search_cache.get(user_id, query)
+        retrieve_span.set(searched=True, cache_hit=cached is not None)
+        if cached is not None:
+            logger.debug("Memory search cache hit for user: %s", user_id)
+            return _join(profile, cached)
+        return _join(profile, _search_memories(query, user_id))
+
+
+async def aretrieve_memories(query: str, user_id: str) -> str:
+    """
+    Summary:
+        Async retrieve_memories: cache hits are answered inline, misses run the
+        backend search on a worker thread so the event loop keeps serving other turns.
+    """
+    logger.info(f"Retrieving memories for user: {user_id}")
+    with span("memory.retrieve") as retrieve_span:
+        profile = user_profiles.render(user_id)
+        if not needs_memory_search(query):
+            retrieve_span.set(searched=False)
+            return profile
+        cached = memory_search_cache.get(user_id, query)
+        retrieve_span.set(searched=True, cache_hit=cached is not None)
+        if cached is not None:
+            logger.debug("Memory search cache hit for user: %s", user_id)
+            return _join(profile, cached)
+        return _join(profile, await asyncio.to_thread(_search_memories, query, user_id))
+
+
+def _join(profile: str, memories: str) -> str:
+    # Profile lines first: the context builder keeps memory lines in order until its budget runs out
+    known = set(profile.splitlines())
+    searched = [line for line in memories.splitlines() if line not in known]
+    return "\n".join(part for part in (profile, "\n".join(searched)) if part)
+
+
+def _search_memories(query: str, user_id: str) -> str:
+    generation = memory_search_cache.generation(user_id)
+    try:
+        with span("memory.search"):
+            memories = get_memory_store().search(query=query, filters={"user_id": user_id}, limit=5)
+        memory_list = memories.get("results", [])
+        serialized = "\n".join(f"- {mem['memory']}" for mem in memory_list)
+        memory_search_cache.put(user_id, query, serialized, generation)
+        logger.info(f"Retrieved {len(memory_list)} memories")
+        return serialized
+    except Exception as e:
+        logger.error(f"Error retrieving memories: {str(e)}", exc_info=True)
+        return ""
+
+
+@traced("memory.save")
+def save_interaction(user_id: str, user_input: str, assistant_response: str):
+    # Profile facts apply from the next turn on; the memories themselves are persisted
+    # by the write-behind queue (call memory_write_queue.flush() to wait for it)
+    try:
+        user_profiles.update(user_id, [user_input])
+    except Exception as e:
+        logger.error(f"Error updating memory profile: {str(e)}", exc_info=True)
+    logger.info(f"Queueing interaction for Mem0 for user: {user_id}")
+    try:
+        memory_write_queue.submit(user_id, user_input, assistant_response)
+    except Exception as e:
+        logger.error(f"Error queueing interaction for Mem0: {str(e)}", exc_info=True)
@@ -0,0 +1,251 @@
+# memory_profile.py
+# -----------------
+# Compact per-user profile of stable facts (name, location, work, likes, dislikes).
+#
+# This module defines:
+#   - extract_facts: Pattern-based extraction of profile facts from one text, e.g.
+#                    "My name is Alice" or Mem0's own "Name is Alice" memory.
+#   - UserProfileStore: Per-user profiles held in memory and persisted to SQLite,
+#                       updated incrementally as interactions are saved.
+#   - user_profiles: Shared store used by agents/memory.py.
+#
+# Purpose:
+#   The facts an assistant needs on almost every turn are few and change rarely.
+#   Keeping them in a profile makes them available in O(1) for every query,
+#   including greetings like "hi" that never triggered a memory search, while the
+#   similarity search only runs for queries that refer to the user's past.
+
+import json
+import os
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Sequence, Union
+
+from logger_config import setup_logger
+
+logger = setup_logger(__name__)
+
+# -----------------------
+# Profile configuration
+# -----------------------
+MEMORY_PROFILE_PATH = os.getenv("MEMORY_PROFILE_PATH", ".memory_profiles.sqlite3")
+# Most recent values kept per list field (likes, dislikes)
+MEMORY_PROFILE_MAX_ITEMS = int(os.getenv("MEMORY_PROFILE_MAX_ITEMS", "5"))
+# Profiles kept in memory before the least recently used is dropped (it stays in SQLite)
+MEMORY_PROFILE_CACHE_SIZE = int(os.getenv("MEMORY_PROFILE_CACHE_SIZE", "10000"))
+
+_NAME = r"([A-Z][\w'-]*(?: [A-Z][\w'-]*)?)"
+_PLACE = r"([A-Z][\w'-]*(?: [A-Z][\w'-]*)*)"
+# Stops at a conjunction, so "pizza but I don't like pineapple" yields "pizza"
+_PHRASE = r"((?:(?!\s+(?i:but|and|or|though|although|because|while|whereas)\b)[^.,;!?\n]){2,60})"
+
+# (field, pattern) for the user's own words; cue words are case-insensitive, names and
+# places must be capitalized. Only first-person cues count: "My sister likes horror
+# movies" is not about the user. A bare "I'm <Word>" is not a name cue: it matches
+# "I'm Indian" and "I'm Vegetarian" as often as "I'm Alice".
+_USER_PATTERNS = [
+    ("name", re.compile(r"(?i:\bmy name is|\bcall me|\bi am called|\bi'?m called)\s+" + _NAME)),
+    ("location", re.compile(r"(?i:\bi (?:live|stay) in|\bi'?m from|\bi am from|\bi'?m based in|\bi am based in)\s+" + _PLACE)),
+    ("occupation", re.compile(r"(?i:\bi work as|\bmy job is|\bi'?m working as|\bi am working as)\s+(?:an? )?" + _PHRASE)),
+    ("dislikes", re.compile(r"(?i:\bi (?:really )?(?:don'?t like|do not like|dislike|hate))\s+" + _PHRASE)),
+    ("likes", re.compile(r"(?i:\bi (?:really )?(?:like|love|prefer|enjoy))\s+" + _PHRASE)),
+]
+# Questions state no facts ("Do I like pizza?"); blanked before matching user text
+_QUESTION = re.compile(r"[^.!?\n]*\?")
+# Memories the backend extracted are subject-less summaries about the user ("Name is
+# Alice", "Likes pizza", "User lives in Paris"), so the cue must open the sentence
+_SUMMARY_START = r"(?:^|(?<=[.!?\n]))\s*(?:(?i:the user|user)(?:'s)?\s+)?"
+_MEMORY_PATTERNS = [
+    ("name", re.compile(_SUMMARY_START + r"(?i:name is)\s+" + _NAME)),
+    ("location", re.compile(_SUMMARY_START + r"(?i:lives in|is from|is based in)\s+" + _PLACE)),
+    ("occupation", re.compile(_SUMMARY_START + r"(?i:works as|is working as)\s+(?:an? )?" + _PHRASE)),
+    ("dislikes", re.compile(_SUMMARY_START + r"(?i:dislikes|hates|does not like|doesn'?t like)\s+" + _PHRASE)),
+    ("likes", re.compile(_SUMMARY_START + r"(?i:likes|loves|prefers|enjoys)\s+" + _PHRASE)),
+]
+_LIST_FIELDS = ("likes", "dislikes")
+_LABELS = {
+    "name": "Name",
+    "location": "Location",
+    "occupation": "Occupation",
+    "likes": "Likes",
+    "dislikes": "Dislikes",
+}
+# Likes/dislikes starting with these say nothing stable ("I like it", "I love to know")
+_VAGUE = {"it", "that", "this", "them", "to", "you", "when", "how", "what"}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS user_profiles (
+    user_id TEXT PRIMARY KEY,
+    profile TEXT NOT NULL
+);
+"""
+
+Profile = Dict[str, Union[str, List[str]]]
+
+
+def extract_facts(text: str, extracted: bool = False) -> List[tuple]:
+    """
+    Summary:
+        Returns (field, value) pairs found in ``text``, in order of appearance.
+
+    Args:
+        text (str): The user's own message, or a memory the backend extracted.
+        extracted (bool): True for backend memories ("Likes pizza"), False for
+            user input ("I like pizza").
+    """
+    if extracted:
+        patterns = _MEMORY_PATTERNS
+    else:
+        patterns = _USER_PATTERNS
+        text = _QUESTION.sub(".", text)
+    found = []
+    for field, pattern in patterns:
+        for match in pattern.finditer(text):
+            value = " ".join(match.group(1).split()).strip(" '\"")
+            if not value:
+                continue
+            if field in _LIST_FIELDS and value.split()[0].casefold() in _VAGUE:
+                continue
+            found.append((match.start(), field, value))
+    return [(field, value) for _, field, value in sorted(found)]
+
+
+class UserProfileStore:
+    """
+    Summary:
+        Per-user profiles: loaded with a primary-key lookup, kept in an LRU of
+        recently active users, written back only when a fact actually changes.
+
+    Args:
+        path (str): SQLite database file (":memory:" for a process-local store).
+        max_items (int): Values kept per list field, most recent last.
+        cache_size (int): Profiles kept in memory; evicted ones are reloaded on use.
+    """
+
+    def __init__(self, path: str = MEMORY_PROFILE_PATH, max_items: int = MEMORY_PROFILE_MAX_ITEMS,
+                 cache_size: int = MEMORY_PROFILE_CACHE_SIZE):
+        self.path = path
+        self.max_items = max_items
+        self.cache_size = max(1, cache_size)
+        self._lock = threading.Lock()
+        self._conn = None
+        self._profiles: "OrderedDict[str, Profile]" = OrderedDict()
+        self._updates = 0
+
+    def get(self, user_id: str) -> Profile:
+        """Returns a copy of the user's profile (empty if nothing is known)."""
+        with self._lock:
+            profile = self._load(user_id)
+            return {field: list(value) if isinstance(value, list) else value for field, value in profile.items()}
+
+    def update(self, user_id: str, texts: Sequence[str], extracted: bool = False) -> bool:
+        """
+        Summary:
+            Merges facts found in ``texts`` into the user's profile. Single-valued
+            fields take the latest value; list fields keep the latest max_items.
+
+        Args:
+            user_id (str): Profile owner.
+            texts (Sequence[str]): User messages, or backend memories if ``extracted``.
+            extracted (bool): Passed to extract_facts.
+
+        Returns:
+            bool: True if the profile changed (and was persisted).
+        """
+        facts = [fact for text in texts if text for fact in extract_facts(text, extracted)]
+        if not facts:
+            return False
+        with self._lock:
+            profile = self._load(user_id)
+            before = json.dumps(profile, sort_keys=True)
+            for field, value in facts:
+                if field in _LIST_FIELDS:
+                    self._add_item(profile, field, value)
+                    # Liking something again overrides an older dislike, and vice versa
+                    opposite = "dislikes" if field == "likes" else "likes"
+                    self._remove_item(profile, opposite, value)
+                else:
+                    profile[field] = value
+            after = json.dumps(profile, sort_keys=True)
+            if after == before:
+                return False
+            self._db().execute(
+                "INSERT OR REPLACE INTO user_profiles (user_id, profile) VALUES (?, ?)", (user_id, after)
+            )
+            self._updates += 1
+        logger.debug("Profile updated for user %s: %s", user_id, facts)
+        return True
+
+    def render(self, user_id: str) -> str:
+        """Profile as memory-context lines ("- Name: Alice"), or "" if empty."""
+        profile = self.get(user_id)
+        lines = []
+        for field, label in _LABELS.items():
+            value = profile.get(field)
+            if value:
+                lines.append(f"- {label}: {'; '.join(value) if isinstance(value, list) else value}")
+        return "\n".join(lines)
+
+    def delete(self, user_id: str) -> None:
+        with self._lock:
+            self._profiles.pop(user_id, None)
+            self._db().execute("DELETE FROM user_profiles WHERE user_id = ?", (user_id,))
+
+    def stats(self) -> Dict[str, int]:
+        """Returns the number of profiles loaded in memory and updates written."""
+        with self._lock:
+            return {"loaded": len(self._profiles), "updates": self._updates}
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    # -----------------------
+    # Internals
+    # -----------------------
+    def _db(self) -> sqlite3.Connection:
+        # Caller holds self._lock; opened on first use so importing creates no file
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            if self.path != ":memory:":
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+        return self._conn
+
+    def _load(self, user_id: str) -> Profile:
+        # Caller holds self._lock. Every change is persisted, so an evicted profile
+        # is simply read back from SQLite on its next use.
+        profile = self._profiles.get(user_id)
+        if profile is None:
+            row = self._db().execute(
+                "SELECT profile FROM user_profiles WHERE user_id = ?", (user_id,)
+            ).fetchone()
+            profile = json.loads(row[0]) if row else {}
+            self._profiles[user_id] = profile
+            while len(self._profiles) > self.cache_size:
+                self._profiles.popitem(last=False)
+        else:
+            self._profiles.move_to_end(user_id)
+        return profile
+
+    def _add_item(self, profile: Profile, field: str, value: str) -> None:
+        items = [item for item in profile.get(field, []) if item.casefold() != value.casefold()]
+        items.append(value)
+        profile[field] = items[-self.max_items:]
+
+    @staticmethod
+    def _remove_item(profile: Profile, field: str, value: str) -> None:
+        items = profile.get(field)
+        if items:
+            remaining = [item for item in items if item.casefold() != value.casefold()]
+            if remaining:
+                profile[field] = remaining
+            else:
+                del profile[field]
+
+
+user_profiles = UserProfileStore()
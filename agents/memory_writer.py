@@ -0,0 +1,254 @@
+# memory_writer.py
+# ----------------
+# Write-behind persistence for agent conversation memory.
+#
+# This module defines:
+#   - MemoryWriteBehindQueue: Background queue that batches interactions per user,
+#                             flushes on batch size or interval, retries failed writes,
+#                             and drains on shutdown.
+#
+# Purpose:
+#   Takes the remote mem0.add call off the critical path of memory-enabled turns.
+#   The agent answers first; persistence happens on a daemon thread. The shared
+#   Mem0-backed instance lives in agents/memory.py.
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List
+
+from logger_config import setup_logger
+
+logger = setup_logger(__name__)
+
+# -----------------------
+# Queue configuration
+# -----------------------
+MEMORY_WRITE_BATCH_SIZE = int(os.getenv("MEMORY_WRITE_BATCH_SIZE", "8"))
+MEMORY_WRITE_FLUSH_INTERVAL = float(os.getenv("MEMORY_WRITE_FLUSH_INTERVAL", "2.0"))
+MEMORY_WRITE_MAX_RETRIES = int(os.getenv("MEMORY_WRITE_MAX_RETRIES", "3"))
+MEMORY_WRITE_MAX_PENDING = int(os.getenv("MEMORY_WRITE_MAX_PENDING", "10000"))
+# Seconds between checks that the worker is still alive while flush() waits
+_WORKER_CHECK_INTERVAL = 0.5
+
+
+class MemoryWriteBehindQueue:
+    """
+    Summary:
+        Batches interactions per user and persists them on a background thread.
+
+    Args:
+        writer (Callable[[str, List[dict]], Any]): Persists one user's batch of
+            chat messages; must raise on failure so the batch is retried.
+        batch_size (int): Interactions for one user that trigger an early flush.
+        flush_interval (float): Maximum seconds an interaction waits before flushing.
+        max_retries (int): Attempts per batch before it is dropped and logged (at least 1).
+        retry_backoff (float): Base delay in seconds, doubled after each failed attempt.
+        max_pending (int): Queued interactions above which submit() blocks (backpressure).
+    """
+
+    def __init__(
+        self,
+        writer: Callable[[str, List[dict]], Any],
+        batch_size: int = MEMORY_WRITE_BATCH_SIZE,
+        flush_interval: float = MEMORY_WRITE_FLUSH_INTERVAL,
+        max_retries: int = MEMORY_WRITE_MAX_RETRIES,
+        retry_backoff: float = 0.5,
+        max_pending: int = MEMORY_WRITE_MAX_PENDING,
+    ):
+        self.writer = writer
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max(1, max_retries)
+        self.retry_backoff = retry_backoff
+        self.max_pending = max_pending
+
+        # user_id -> list of interactions (each a [user, assistant] message pair)
+        self._pending: "OrderedDict[str, List[List[dict]]]" = OrderedDict()
+        self._pending_count = 0
+        self._cond = threading.Condition()
+        self._thread = None
+        self._closed = False
+        self._flush_requested = False
+        self._submitted = 0
+        self._processed = 0
+        self._written = 0
+        self._failed = 0
+        self._retries = 0
+        self._batches = 0
+
+    # -----------------------
+    # Producer API
+    # -----------------------
+    def submit(self, user_id: str, user_input: str, assistant_response: str) -> None:
+        """
+        Summary:
+            Queues one interaction for persistence and returns immediately.
+            Blocks only while more than max_pending interactions are queued.
+
+        Args:
+            user_id (str): Memory owner.
+            user_input (str): The user's message.
+            assistant_response (str): The agent's final answer.
+
+        Raises:
+            RuntimeError: If the queue has been shut down.
+        """
+        interaction = [
+            {"role": "user", "content": user_input},
+            {"role": "assistant", "content": assistant_response},
+        ]
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Memory write queue is shut down")
+            while self._pending_count >= self.max_pending and not self._closed:
+                self._cond.wait()
+            self._pending.setdefault(user_id, []).append(interaction)
+            self._pending_count += 1
+            self._submitted += 1
+            self._ensure_worker()
+            if len(self._pending[user_id]) >= self.batch_size:
+                self._cond.notify_all()
+        logger.debug("Queued interaction for user: %s", user_id)
+
+    def flush(self, timeout: float = None) -> bool:
+        """
+        Summary:
+            Writes everything submitted so far and waits until it has been processed
+            (written, or dropped after exhausting retries).
+
+        Args:
+            timeout (float): Maximum seconds to wait; None waits indefinitely.
+
+        Returns:
+            bool: True if all previously submitted interactions were processed in time.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            target = self._submitted
+            self._flush_requested = True
+            self._cond.notify_all()
+            while self._processed < target:
+                if self._pending_count:
+                    # Restarts a worker that died on a BaseException from the writer
+                    self._ensure_worker()
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                # Bounded wait: a dying worker notifies before its thread has ended
+                wait = _WORKER_CHECK_INTERVAL if remaining is None else min(remaining, _WORKER_CHECK_INTERVAL)
+                self._cond.wait(wait)
+            return True
+
+    def shutdown(self, timeout: float = 10.0) -> bool:
+        """
+        Summary:
+            Stops accepting new interactions, drains the queue and joins the worker.
+
+        Args:
+            timeout (float): Maximum seconds to wait for the drain.
+
+        Returns:
+            bool: True if the queue drained completely.
+        """
+        with self._cond:
+            if self._closed:
+                return self._pending_count == 0
+            self._closed = True
+            if self._pending_count:
+                self._ensure_worker()
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+        with self._cond:
+            drained = self._pending_count == 0
+        if drained:
+            logger.info("Memory write queue drained")
+        else:
+            logger.error(f"Memory write queue shut down with {self._pending_count} unsaved interactions")
+        return drained
+
+    def stats(self) -> Dict[str, int]:
+        """Returns queue depth and write/retry/failure counters."""
+        with self._cond:
+            return {
+                "pending": self._pending_count,
+                "submitted": self._submitted,
+                "written": self._written,
+                "failed": self._failed,
+                "retries": self._retries,
+                "batches": self._batches,
+            }
+
+    # -----------------------
+    # Worker
+    # -----------------------
+    def _ensure_worker(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="memory-write-behind", daemon=True)
+            self._thread.start()
+
+    def _batch_ready(self) -> bool:
+        return any(len(items) >= self.batch_size for items in self._pending.values())
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                deadline = time.monotonic() + self.flush_interval
+                while not (self._closed or self._flush_requested or self._batch_ready()):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batches = list(self._pending.items())
+                self._pending.clear()
+                self._flush_requested = False
+                closing = self._closed
+                if not batches and closing:
+                    return
+
+            taken = sum(len(items) for _, items in batches)
+            done = 0
+            try:
+                for user_id, interactions in batches:
+                    self._write_batch(user_id, interactions)
+                    done += len(interactions)
+            except BaseException:
+                # KeyboardInterrupt/SystemExit from the writer end this thread; the
+                # batches it had taken are accounted for below so flush() cannot hang
+                logger.error(f"Memory write worker stopped; dropping {taken - done} interactions", exc_info=True)
+                raise
+            finally:
+                with self._cond:
+                    self._failed += taken - done
+                    self._pending_count -= taken
+                    self._processed += taken
+                    self._cond.notify_all()
+
+    def _write_batch(self, user_id: str, interactions: List[List[dict]]) -> None:
+        messages = [message for interaction in interactions for message in interaction]
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                self.writer(user_id, messages)
+                with self._cond:
+                    self._written += len(interactions)
+                    self._batches += 1
+                return
+            except Exception as e:
+                if attempt == self.max_retries:
+                    logger.error(
+                        f"Dropping {len(interactions)} interactions for user {user_id} "
+                        f"after {attempt} failed attempts: {str(e)}",
+                        exc_info=True,
+                    )
+                    with self._cond:
+                        self._failed += len(interactions)
+                    return
+                delay = self.retry_backoff * (2 ** (attempt - 1))
+                logger.warning(f"Memory write failed for user {user_id} (attempt {attempt}), retrying in {delay:.1f}s: {e}")
+                with self._cond:
+                    self._retries += 1
+                time.sleep(delay)
+
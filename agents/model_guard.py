@@ -0,0 +1,121 @@
+# model_guard.py
+# --------------
+# Retry, circuit breaking and token accounting around the agents' Gemini calls.
+#
+# This module defines:
+#   - ModelGuardMiddleware: Agent middleware that reserves estimated input tokens
+#                           for each model call, retries 429/5xx failures with
+#                           jittered backoff, reports outcomes to the circuit breaker
+#                           and settles the token budget with the real usage.
+#                           Each call is recorded as an "llm" span with token counts
+#                           and whether it was answered from the LLM cache.
+#
+# Purpose:
+#   Admission (requests per second, tokens per minute, priority lanes, open circuit)
+#   happens in resilience.GuardRateLimiter, which the chat model consults only for
+#   real API requests. This middleware supplies it with a token estimate and handles
+#   what happens after the request: the outcome and the actual token count.
+
+import asyncio
+import time
+from typing import Any, Callable, Dict, Optional
+
+from langchain.agents.middleware import AgentMiddleware
+from langchain_core.messages import AIMessage
+
+from agents.context import estimate_tokens
+from logger_config import setup_logger
+from resilience import BackendGuard, GuardRateLimiter, gemini_guard, model_call_state
+from tracing import annotate, traced
+
+logger = setup_logger(__name__)
+
+
+def _estimate_request_tokens(request: Any) -> int:
+    text = "".join(str(message.content) for message in request.messages)
+    if request.system_message is not None:
+        text += str(request.system_message.content)
+    return estimate_tokens(text)
+
+
+def _usage(response: Any) -> Optional[Dict[str, int]]:
+    messages = response.result if hasattr(response, "result") else [response]
+    for message in messages:
+        usage = getattr(message, "usage_metadata", None) if isinstance(message, AIMessage) else None
+        if usage:
+            return usage
+    return None
+
+
+class ModelGuardMiddleware(AgentMiddleware):
+    """
+    Summary:
+        Wraps each model call of an agent with the shared backend guard.
+
+    Args:
+        guard (BackendGuard): Guard whose limiter/breaker the model's GuardRateLimiter uses.
+    """
+
+    def __init__(self, guard: BackendGuard = gemini_guard):
+        super().__init__()
+        self.guard = guard
+
+    @traced("llm")
+    def wrap_model_call(self, request: Any, handler: Callable[[Any], Any]) -> Any:
+        attempt = 0
+        while True:
+            attempt += 1
+            state = {"tokens": _estimate_request_tokens(request), "calls": 0}
+            token = model_call_state.set(state)
+            try:
+                response = handler(request)
+            except Exception as e:
+                if state["calls"]:
+                    self.guard.record(e)
+                if not self.guard.should_retry(attempt, e):
+                    raise
+                delay = self.guard.retry_delay(attempt, e)
+                logger.warning(f"Model call failed (attempt {attempt}), retrying in {delay:.2f}s: {e}")
+                time.sleep(delay)
+                continue
+            finally:
+                model_call_state.reset(token)
+            self._settle(request, state, response, attempt)
+            return response
+
+    @traced("llm")
+    async def awrap_model_call(self, request: Any, handler: Callable[[Any], Any]) -> Any:
+        attempt = 0
+        while True:
+            attempt += 1
+            state = {"tokens": _estimate_request_tokens(request), "calls": 0}
+            token = model_call_state.set(state)
+            try:
+                response = await handler(request)
+            except Exception as e:
+                if state["calls"]:
+                    self.guard.record(e)
+                if not self.guard.should_retry(attempt, e):
+                    raise
+                delay = self.guard.retry_delay(attempt, e)
+                logger.warning(f"Model call failed (attempt {attempt}), retrying in {delay:.2f}s: {e}")
+                await asyncio.sleep(delay)
+                continue
+            finally:
+                model_call_state.reset(token)
+            self._settle(request, state, response, attempt)
+            return response
+
+    def _settle(self, request: Any, state: Dict[str, int], response: Any, attempts: int) -> None:
+        usage = _usage(response) or {}
+        annotate(attempts=attempts, input_tokens=usage.get("input_tokens"), output_tokens=usage.get("output_tokens"))
+        if isinstance(getattr(request.model, "rate_limiter", None), GuardRateLimiter):
+            # The limiter is consulted only on cache misses
+            annotate(cache_hit=not state["calls"])
+        # Cache hits never reached the rate limiter: nothing was spent or observed
+        if not state["calls"]:
+            return
+        self.guard.record(None)
+        used = usage.get("total_tokens")
+        if used is not None:
+            self.guard.limiter.adjust_tokens(used - state["tokens"])
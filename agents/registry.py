@@ -0,0 +1,106 @@
+# registry.py
+# -----------
+# Lazy agent registry.
+#
+# This module defines:
+#   - AgentRegistry: Maps agent names to factories and builds each agent once,
+#                    on first use, then reuses it.
+#   - agent_registry: Shared registry with the Core and Weather agents registered.
+#   - get_agent: Convenience accessor for agent_registry.get.
+#   - AGENT_INVOKE_TIMEOUT: Default per-call timeout of the async agent entry points.
+#
+# Purpose:
+#   Importing this module is cheap: agent modules, LLM clients and tools are only
+#   imported and constructed when an agent is first requested.
+
+import importlib
+import os
+import threading
+from typing import Any, Callable, Dict, Union
+
+from logger_config import setup_logger
+
+logger = setup_logger(__name__)
+
+# Seconds an async memory-enabled invocation may take before it is cancelled
+AGENT_INVOKE_TIMEOUT = float(os.getenv("AGENT_INVOKE_TIMEOUT", "120"))
+
+
+class AgentRegistry:
+    """
+    Summary:
+        Thread-safe registry of lazily built, shared agent instances.
+    """
+
+    def __init__(self):
+        self._factories: Dict[str, Union[str, Callable[[], Any]]] = {}
+        self._instances: Dict[str, Any] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, factory: Union[str, Callable[[], Any]]) -> None:
+        """
+        Summary:
+            Registers a factory for an agent name.
+
+        Args:
+            name (str): Agent name, e.g. "core".
+            factory: Zero-argument callable, or "package.module:function" string
+                resolved (and imported) only when the agent is first built.
+        """
+        with self._lock:
+            self._factories[name] = factory
+            self._locks.setdefault(name, threading.Lock())
+            self._instances.pop(name, None)
+
+    def get(self, name: str) -> Any:
+        """
+        Summary:
+            Returns the agent, building it on first request. Concurrent first
+            requests for the same agent wait for a single build.
+
+        Raises:
+            KeyError: If no factory is registered under ``name``.
+        """
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+        with self._lock:
+            if name not in self._factories:
+                raise KeyError(f"Unknown agent: {name}")
+            lock = self._locks[name]
+        with lock:
+            instance = self._instances.get(name)
+            if instance is None:
+                logger.info(f"Building agent on first use: {name}")
+                instance = self._resolve(self._factories[name])()
+                self._instances[name] = instance
+        return instance
+
+    def is_built(self, name: str) -> bool:
+        return name in self._instances
+
+    def reset(self, name: str = None) -> None:
+        """Drops built instances (all, or one) so the next get() rebuilds them."""
+        with self._lock:
+            if name is None:
+                self._instances.clear()
+            else:
+                self._instances.pop(name, None)
+
+    @staticmethod
+    def _resolve(factory: Union[str, Callable[[], Any]]) -> Callable[[], Any]:
+        if callable(factory):
+            return factory
+        module_name, _, attribute = factory.partition(":")
+        return getattr(importlib.import_module(module_name), attribute)
+
+
+agent_registry = AgentRegistry()
+agent_registry.register("core", "agents.core_agent:build_core_agent")
+agent_registry.register("weather", "agents.weather_agent:build_weather_agent")
+
+
+def get_agent(name: str) -> Any:
+    """Returns the shared agent registered under ``name`` (built on first use)."""
+    return agent_registry.get(name)
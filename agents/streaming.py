@@ -0,0 +1,109 @@
+# streaming.py
+# ------------
+# Event streaming for agent turns.
+#
+# This module defines:
+#   - stream_agent / astream_agent: Run an agent and yield events as they happen:
+#       {"type": "token", "content": str}                    final-answer text, as generated
+#       {"type": "tool_call", "id", "name", "args"}          a tool the model decided to call
+#       {"type": "tool_result", "id", "name", "content", "status"}
+#       {"type": "final", "content": str}                    the complete answer (always last)
+#   - answer_events: The same event sequence for an answer produced without the agent.
+#
+# Purpose:
+#   The invoke_* wrappers only return once the whole answer exists. Interactive
+#   users care about time to first token, so the stream_* wrappers in the agent
+#   modules forward these events while the agent is still working.
+
+from typing import Any, AsyncIterator, Dict, Iterator, List
+
+from langchain_core.messages import AIMessage, AIMessageChunk, ToolMessage
+
+# LangGraph stream modes: token chunks from model calls + per-node state updates
+_STREAM_MODES = ["messages", "updates"]
+
+
+def _text(content: Any) -> str:
+    if isinstance(content, str):
+        return content
+    # Content blocks (e.g. Gemini thinking/text parts): stream the text parts only
+    return "".join(
+        block.get("text", "") for block in content
+        if isinstance(block, dict) and block.get("type", "text") == "text"
+    )
+
+
+class _EventTranslator:
+    """Turns LangGraph (mode, payload) stream items into agent events."""
+
+    def __init__(self):
+        self.tokens: List[str] = []
+        self.final_text = None
+
+    def feed(self, mode: str, payload: Any) -> List[Dict[str, Any]]:
+        if mode == "messages":
+            chunk = payload[0]
+            if isinstance(chunk, AIMessageChunk):
+                text = _text(chunk.content)
+                if text:
+                    self.tokens.append(text)
+                    return [{"type": "token", "content": text}]
+            return []
+
+        events = []
+        for update in payload.values():
+            for message in (update or {}).get("messages", []):
+                if isinstance(message, AIMessage):
+                    if message.tool_calls:
+                        events.extend(
+                            {"type": "tool_call", "id": call["id"], "name": call["name"], "args": call["args"]}
+                            for call in message.tool_calls
+                        )
+                    else:
+                        self.final_text = _text(message.content)
+                elif isinstance(message, ToolMessage):
+                    events.append({
+                        "type": "tool_result",
+                        "id": message.tool_call_id,
+                        "name": message.name,
+                        "content": _text(message.content),
+                        "status": message.status,
+                    })
+        return events
+
+    def final_event(self) -> Dict[str, Any]:
+        content = self.final_text if self.final_text is not None else "".join(self.tokens)
+        return {"type": "final", "content": content}
+
+
+def stream_agent(agent: Any, messages: Dict) -> Iterator[Dict[str, Any]]:
+    """
+    Summary:
+        Runs the agent and yields token, tool_call and tool_result events as they
+        are produced, followed by one final event.
+
+    Args:
+        agent: A compiled LangChain agent.
+        messages (Dict): {"messages": [...]} agent input.
+
+    Yields:
+        Dict[str, Any]: Events as described in the module header.
+    """
+    translator = _EventTranslator()
+    for mode, payload in agent.stream(messages, stream_mode=_STREAM_MODES):
+        yield from translator.feed(mode, payload)
+    yield translator.final_event()
+
+
+async def astream_agent(agent: Any, messages: Dict) -> AsyncIterator[Dict[str, Any]]:
+    """Async stream_agent."""
+    translator = _EventTranslator()
+    async for mode, payload in agent.astream(messages, stream_mode=_STREAM_MODES):
+        for event in translator.feed(mode, payload):
+            yield event
+    yield translator.final_event()
+
+
+def answer_events(answer: str) -> List[Dict[str, Any]]:
+    """Events for an answer computed without the agent (e.g. the fast path)."""
+    return [{"type": "token", "content": answer}, {"type": "final", "content": answer}]
@@ -0,0 +1,207 @@
+# tool_executor.py
+# ----------------
+# Concurrent execution of the tool calls requested in one model turn.
+#
+# This module defines:
+#   - ToolExecutor: Runs a turn's tool calls concurrently — blocking tools on a
+#                   shared bounded thread pool, async tools awaited on the event
+#                   loop — and returns the ToolMessages in the order of the calls.
+#                   Each call is recorded as a tool.<name> span (tracing.py).
+#   - ConcurrentToolMiddleware: Agent middleware that executes tool calls through a
+#                               ToolExecutor right after the model responds.
+#   - shutdown_tool_pool: Stops the shared thread pool (registered with atexit).
+#
+# Purpose:
+#   For "3 items priced at 499 each and delivery date in 7 days" the model requests
+#   math_calculator and date_utility together. Running independent calls at the same
+#   time makes a step as slow as its slowest call rather than the sum of all calls,
+#   which matters most for I/O-bound tools such as weather_tool. One shared, bounded
+#   pool also caps tool threads across all in-flight conversations instead of
+#   spinning up a new pool per step.
+
+import asyncio
+import atexit
+import contextvars
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence
+
+from langchain.agents.middleware import AgentMiddleware, hook_config
+from langchain_core.messages import AIMessage, ToolMessage
+from langchain_core.tools import BaseTool
+from logger_config import setup_logger
+from tracing import span
+
+logger = setup_logger(__name__)
+
+# -----------------------
+# Pool configuration
+# -----------------------
+TOOL_EXECUTOR_MAX_WORKERS = int(os.getenv("TOOL_EXECUTOR_MAX_WORKERS", "16"))
+
+_pool: Optional[ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ThreadPoolExecutor:
+    """Returns the process-wide tool thread pool, creating it on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=TOOL_EXECUTOR_MAX_WORKERS, thread_name_prefix="tool")
+        return _pool
+
+
+@atexit.register
+def shutdown_tool_pool() -> None:
+    """Stops the shared tool pool."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True, cancel_futures=True)
+            _pool = None
+
+
+def _error_message(call: Dict[str, Any], error: BaseException) -> ToolMessage:
+    # Same shape ToolNode produces, so the model can read the error and retry
+    return ToolMessage(
+        content=f"Error: {error!r}\n Please fix your mistakes.",
+        name=call["name"],
+        tool_call_id=call["id"],
+        status="error",
+    )
+
+
+def _mark_errors(tool_span: Any, result: Any) -> None:
+    # Tool failures come back as error ToolMessages rather than exceptions
+    if getattr(result, "status", None) == "error":
+        tool_span.status = "error"
+
+
+class ToolExecutor:
+    """
+    Summary:
+        Executes the tool calls of one model turn concurrently, preserving order.
+
+    Args:
+        tools (Sequence[BaseTool]): Tools the agent may call.
+    """
+
+    def __init__(self, tools: Sequence[BaseTool]):
+        self.tools: Dict[str, BaseTool] = {tool.name: tool for tool in tools}
+
+    def can_run(self, tool_calls: Sequence[Dict[str, Any]]) -> bool:
+        """True if every call names a known tool (unknown names are left to the agent's ToolNode)."""
+        return all(call["name"] in self.tools for call in tool_calls)
+
+    # -----------------------
+    # Sync execution
+    # -----------------------
+    def run(self, tool_calls: Sequence[Dict[str, Any]]) -> List[ToolMessage]:
+        """
+        Summary:
+            Runs all calls and returns one ToolMessage per call, in call order.
+            A single call runs inline on the caller's thread (no pool hop).
+
+        Args:
+            tool_calls (Sequence[Dict[str, Any]]): ToolCall dicts from an AIMessage.
+
+        Returns:
+            List[ToolMessage]: Results (or error messages) matching tool_calls.
+        """
+        if len(tool_calls) == 1:
+            return [self._invoke_one(tool_calls[0])]
+
+        logger.debug("Running %d tool calls concurrently", len(tool_calls))
+        pool = _get_pool()
+        # Copy the context per call so callbacks/tracing follow the tool onto the pool thread
+        futures = [
+            pool.submit(contextvars.copy_context().run, self._invoke_one, call)
+            for call in tool_calls
+        ]
+        return [future.result() for future in futures]
+
+    def _invoke_one(self, call: Dict[str, Any]) -> ToolMessage:
+        with span(f"tool.{call['name']}") as tool_span:
+            try:
+                result = self.tools[call["name"]].invoke({**call, "type": "tool_call"})
+            except Exception as e:
+                logger.error(f"Tool {call['name']} failed: {str(e)}", exc_info=True)
+                result = _error_message(call, e)
+            _mark_errors(tool_span, result)
+            return result
+
+    # -----------------------
+    # Async execution
+    # -----------------------
+    async def arun(self, tool_calls: Sequence[Dict[str, Any]]) -> List[ToolMessage]:
+        """
+        Summary:
+            Async counterpart of run(): async tools are awaited on the event loop,
+            blocking tools are sent to the shared pool; results keep call order.
+
+        Args:
+            tool_calls (Sequence[Dict[str, Any]]): ToolCall dicts from an AIMessage.
+
+        Returns:
+            List[ToolMessage]: Results (or error messages) matching tool_calls.
+        """
+        return list(await asyncio.gather(*(self._ainvoke_one(call) for call in tool_calls)))
+
+    async def _ainvoke_one(self, call: Dict[str, Any]) -> ToolMessage:
+        tool = self.tools[call["name"]]
+        if getattr(tool, "coroutine", None) is None:
+            # Traced by _invoke_one on the pool thread
+            loop = asyncio.get_running_loop()
+            try:
+                return await loop.run_in_executor(
+                    _get_pool(), contextvars.copy_context().run, self._invoke_one, call
+                )
+            except Exception as e:
+                logger.error(f"Tool {call['name']} failed: {str(e)}", exc_info=True)
+                return _error_message(call, e)
+        with span(f"tool.{call['name']}") as tool_span:
+            try:
+                result = await tool.ainvoke({**call, "type": "tool_call"})
+            except Exception as e:
+                logger.error(f"Tool {call['name']} failed: {str(e)}", exc_info=True)
+                result = _error_message(call, e)
+            _mark_errors(tool_span, result)
+            return result
+
+
+class ConcurrentToolMiddleware(AgentMiddleware):
+    """
+    Summary:
+        Runs the model's tool calls through a ToolExecutor and jumps straight back
+        to the model, bypassing the agent's sequential tool step.
+
+    Args:
+        tools (Sequence[BaseTool]): The same tools passed to create_agent.
+    """
+
+    def __init__(self, tools: Sequence[BaseTool]):
+        super().__init__()
+        self.executor = ToolExecutor(tools)
+
+    def _pending_calls(self, state: Dict[str, Any]) -> List[Dict[str, Any]]:
+        messages = state.get("messages") or []
+        last = messages[-1] if messages else None
+        if not isinstance(last, AIMessage) or not last.tool_calls:
+            return []
+        return last.tool_calls if self.executor.can_run(last.tool_calls) else []
+
+    @hook_config(can_jump_to=["model"])
+    def after_model(self, state: Dict[str, Any], runtime: Any) -> Optional[Dict[str, Any]]:
+        tool_calls = self._pending_calls(state)
+        if not tool_calls:
+            return None
+        return {"messages": self.executor.run(tool_calls), "jump_to": "model"}
+
+    @hook_config(can_jump_to=["model"])
+    async def aafter_model(self, state: Dict[str, Any], runtime: Any) -> Optional[Dict[str, Any]]:
+        tool_calls = self._pending_calls(state)
+        if not tool_calls:
+            return None
+        return {"messages": await self.executor.arun(tool_calls), "jump_to": "model"}
@@ -0,0 +1,344 @@
+# vector_memory.py
+# ----------------
+# Local, on-disk memory backend with the same add/search interface as the Mem0 client.
+#
+# This module defines:
+#   - HashingEmbedder: Deterministic feature-hashing embedder (no model, no network);
+#                      the default, and stable across processes for offline tests.
+#   - load_embedder: Resolves MEMORY_EMBEDDER ("hashing" or "package.module:factory").
+#   - LocalMemoryStore: Memory texts in SQLite, one memory-mapped float32 embedding
+#                       matrix per user, exact top-k cosine search over that matrix.
+#
+# Purpose:
+#   With MEMORY_BACKEND=local, retrieve_memories and save_interaction stop making
+#   remote mem0.search / mem0.add calls: a search is one matrix-vector product over
+#   the user's memmapped rows, and a write is a SQLite insert plus an append to the
+#   user's vector file. Nothing is sent over the network and nothing can time out.
+#
+# Layout under MEMORY_LOCAL_PATH:
+#   memories.sqlite3          memory text, user and row number per memory
+#   vectors/<user-hash>.f32   row-major float32 matrix, row i = memory i of the user
+
+import hashlib
+import importlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from logger_config import setup_logger
+
+logger = setup_logger(__name__)
+
+# -----------------------
+# Store configuration
+# -----------------------
+MEMORY_LOCAL_PATH = os.getenv("MEMORY_LOCAL_PATH", ".memory")
+MEMORY_EMBEDDER = os.getenv("MEMORY_EMBEDDER", "hashing")
+MEMORY_EMBEDDING_DIM = int(os.getenv("MEMORY_EMBEDDING_DIM", "256"))
+# Rows scored per matrix-vector product; bounds temporary memory for large stores
+MEMORY_SEARCH_CHUNK_ROWS = int(os.getenv("MEMORY_SEARCH_CHUNK_ROWS", "262144"))
+# Users whose vector files stay memory-mapped; each map holds an open file descriptor
+MEMORY_MAPPED_USERS = int(os.getenv("MEMORY_MAPPED_USERS", "256"))
+
+_TOKEN = re.compile(r"\w+")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS memories (
+    user_id TEXT NOT NULL,
+    row INTEGER NOT NULL,
+    memory TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (user_id, row)
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+Embedder = Callable[[Sequence[str]], np.ndarray]
+
+
+# -----------------------
+# Embedders
+# -----------------------
+class HashingEmbedder:
+    """
+    Summary:
+        Maps words and word bigrams to signed buckets of a fixed-size vector
+        (the hashing trick) and L2-normalizes the result. Texts sharing words
+        score high; it has no notion of synonyms.
+
+    Args:
+        dim (int): Embedding dimension.
+    """
+
+    def __init__(self, dim: int = MEMORY_EMBEDDING_DIM):
+        self.dim = dim
+
+    def __call__(self, texts: Sequence[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for i, text in enumerate(texts):
+            words = _TOKEN.findall(text.casefold())
+            for feature in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+                digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+                bucket = int.from_bytes(digest[:4], "little") % self.dim
+                vectors[i, bucket] += 1.0 if digest[4] & 1 else -1.0
+        return _normalize(vectors)
+
+
+def load_embedder(spec: str = MEMORY_EMBEDDER, dim: int = MEMORY_EMBEDDING_DIM) -> Embedder:
+    """
+    Summary:
+        Returns the embedder named by ``spec``: "hashing", or "package.module:factory"
+        where factory() returns a callable mapping a list of texts to an (n, dim) array.
+    """
+    if spec == "hashing":
+        return HashingEmbedder(dim)
+    module_name, sep, attr = spec.partition(":")
+    if not sep:
+        raise ValueError(f"MEMORY_EMBEDDER must be 'hashing' or 'module:factory', got {spec!r}")
+    return getattr(importlib.import_module(module_name), attr)()
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+# -----------------------
+# Store
+# -----------------------
+class LocalMemoryStore:
+    """
+    Summary:
+        Per-user memory store answering mem0-style add() and search() calls locally.
+
+    Args:
+        path (str): Directory holding the SQLite file and the vector files.
+        embedder (Embedder): Maps texts to an (n, dim) array; defaults to load_embedder().
+        chunk_rows (int): Rows scored per matrix-vector product during search.
+        mapped_users (int): Users whose vector files stay mapped (least recently
+            searched are unmapped first).
+    """
+
+    def __init__(self, path: str = MEMORY_LOCAL_PATH, embedder: Optional[Embedder] = None,
+                 chunk_rows: int = MEMORY_SEARCH_CHUNK_ROWS, mapped_users: int = MEMORY_MAPPED_USERS):
+        self.path = path
+        self.embedder = embedder or load_embedder()
+        self.chunk_rows = chunk_rows
+        self.mapped_users = max(1, mapped_users)
+        os.makedirs(os.path.join(path, "vectors"), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            os.path.join(path, "memories.sqlite3"), check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self.dim = self._check_dim(self.embedder(["dimension probe"]).shape[1])
+        # user_id -> (rows mapped, memmap), LRU; remapped when the user's file grows
+        self._matrices: "OrderedDict[str, Tuple[int, np.memmap]]" = OrderedDict()
+        self._searches = 0
+        self._adds = 0
+
+    def _check_dim(self, dim: int) -> int:
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'dim'").fetchone()
+        if row is None:
+            self._conn.execute("INSERT INTO meta (key, value) VALUES ('dim', ?)", (str(dim),))
+        elif int(row[0]) != dim:
+            raise ValueError(
+                f"{self.path} holds {row[0]}-dimensional embeddings but the embedder produces {dim}"
+            )
+        return dim
+
+    def _vector_path(self, user_id: str) -> str:
+        # Hashed so any user_id is a safe file name
+        name = hashlib.sha256(user_id.encode("utf-8")).hexdigest()[:32]
+        return os.path.join(self.path, "vectors", f"{name}.f32")
+
+    # -----------------------
+    # Writes
+    # -----------------------
+    def add(self, messages: List[dict], user_id: str, **kwargs: Any) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Summary:
+            Stores each non-empty user message as one memory (mem0.add signature).
+            Assistant replies are not stored; the user's own statements carry the
+            facts worth recalling.
+
+        Returns:
+            Dict: {"results": [{"id", "memory", "event": "ADD"}, ...]}.
+        """
+        texts = [m["content"].strip() for m in messages if m.get("role") == "user" and m.get("content", "").strip()]
+        return {"results": self.add_memories(user_id, texts)}
+
+    def add_memories(self, user_id: str, texts: Sequence[str],
+                     vectors: Optional[np.ndarray] = None) -> List[Dict[str, Any]]:
+        """
+        Summary:
+            Appends memories for a user, skipping exact repeats of stored ones.
+
+        Args:
+            user_id (str): Owner of the memories.
+            texts (Sequence[str]): Memory texts.
+            vectors (np.ndarray): Precomputed (len(texts), dim) embeddings; computed
+                with the store's embedder when omitted.
+
+        Returns:
+            List[Dict[str, Any]]: One {"id", "memory", "event": "ADD"} per stored memory.
+        """
+        if not texts:
+            return []
+        with self._lock:
+            if vectors is None:
+                known = self._known(user_id, texts)
+                texts = [text for text in dict.fromkeys(texts) if text not in known]
+                if not texts:
+                    return []
+                vectors = self.embedder(texts)
+            vectors = _normalize(vectors)
+            if vectors.shape != (len(texts), self.dim):
+                raise ValueError(f"expected embeddings of shape {(len(texts), self.dim)}, got {vectors.shape}")
+
+            start = self._row_count(user_id)
+            now = time.time()
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    "INSERT INTO memories (user_id, row, memory, created_at) VALUES (?, ?, ?, ?)",
+                    ((user_id, start + i, text, now) for i, text in enumerate(texts)),
+                )
+                # Committed only once the vectors are on disk, so every stored row has one;
+                # leftovers from a failed write are cut off by the next append
+                with open(self._vector_path(user_id), "ab") as f:
+                    f.truncate(start * self.dim * 4)
+                    f.write(vectors.tobytes())
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                # Drop vectors written for the rolled-back rows, so searches never score them
+                try:
+                    os.truncate(self._vector_path(user_id), start * self.dim * 4)
+                except OSError:
+                    pass
+                raise
+            self._adds += len(texts)
+        return [{"id": f"{user_id}:{start + i}", "memory": text, "event": "ADD"} for i, text in enumerate(texts)]
+
+    def _known(self, user_id: str, texts: Sequence[str]) -> set:
+        placeholders = ",".join("?" * len(texts))
+        rows = self._conn.execute(
+            f"SELECT memory FROM memories WHERE user_id = ? AND memory IN ({placeholders})",
+            (user_id, *texts),
+        ).fetchall()
+        return {row[0] for row in rows}
+
+    def _row_count(self, user_id: str) -> int:
+        row = self._conn.execute("SELECT MAX(row) FROM memories WHERE user_id = ?", (user_id,)).fetchone()
+        return 0 if row[0] is None else row[0] + 1
+
+    # -----------------------
+    # Search
+    # -----------------------
+    def search(self, query: str, filters: Optional[Dict[str, Any]] = None, limit: int = 5,
+               user_id: Optional[str] = None, **kwargs: Any) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Summary:
+            Top-``limit`` memories of the user by cosine similarity (mem0.search signature).
+
+        Returns:
+            Dict: {"results": [{"id", "memory", "score"}, ...]}, best match first.
+        """
+        user_id = user_id or (filters or {}).get("user_id")
+        if not user_id:
+            raise ValueError("search requires a user_id filter")
+        hits = self.search_vector(user_id, self.embedder([query])[0], limit)
+        if not hits:
+            return {"results": []}
+        placeholders = ",".join("?" * len(hits))
+        with self._lock:
+            texts = dict(self._conn.execute(
+                f"SELECT row, memory FROM memories WHERE user_id = ? AND row IN ({placeholders})",
+                (user_id, *(row for row, _ in hits)),
+            ).fetchall())
+        return {"results": [
+            {"id": f"{user_id}:{row}", "memory": texts[row], "score": score}
+            for row, score in hits if row in texts
+        ]}
+
+    def search_vector(self, user_id: str, query_vector: np.ndarray, limit: int = 5) -> List[Tuple[int, float]]:
+        """Returns (row, cosine score) for the user's ``limit`` closest memories, best first."""
+        matrix = self._matrix(user_id)
+        if matrix is None or limit <= 0:
+            return []
+        query_vector = _normalize(np.asarray(query_vector).reshape(1, -1))[0]
+        rows: List[np.ndarray] = []
+        scores: List[np.ndarray] = []
+        for start in range(0, len(matrix), self.chunk_rows):
+            chunk_scores = matrix[start:start + self.chunk_rows] @ query_vector
+            if len(chunk_scores) > limit:
+                top = np.argpartition(chunk_scores, -limit)[-limit:]
+            else:
+                top = np.arange(len(chunk_scores))
+            rows.append(top + start)
+            scores.append(chunk_scores[top])
+        rows_all, scores_all = np.concatenate(rows), np.concatenate(scores)
+        order = np.argsort(-scores_all, kind="stable")[:limit]
+        with self._lock:
+            self._searches += 1
+        return [(int(rows_all[i]), float(scores_all[i])) for i in order]
+
+    def _matrix(self, user_id: str) -> Optional[np.memmap]:
+        path = self._vector_path(user_id)
+        try:
+            rows = os.path.getsize(path) // (self.dim * 4)
+        except OSError:
+            return None
+        if rows == 0:
+            return None
+        with self._lock:
+            cached = self._matrices.get(user_id)
+            if cached is None or cached[0] != rows:
+                # Map only complete rows; an append in progress is picked up next time
+                cached = (rows, np.memmap(path, dtype=np.float32, mode="r", shape=(rows, self.dim)))
+                self._matrices[user_id] = cached
+                while len(self._matrices) > self.mapped_users:
+                    # The map (and its file descriptor) closes once in-flight searches release it
+                    self._matrices.popitem(last=False)
+            self._matrices.move_to_end(user_id)
+            return cached[1]
+
+    # -----------------------
+    # Maintenance
+    # -----------------------
+    def delete_all(self, user_id: str) -> None:
+        """Removes every memory of a user."""
+        with self._lock:
+            self._conn.execute("DELETE FROM memories WHERE user_id = ?", (user_id,))
+            self._matrices.pop(user_id, None)
+            try:
+                os.remove(self._vector_path(user_id))
+            except FileNotFoundError:
+                pass
+
+    def stats(self) -> Dict[str, int]:
+        """Returns stored memory and user counts, search/add counters and mapped users."""
+        with self._lock:
+            memories, users = self._conn.execute(
+                "SELECT COUNT(*), COUNT(DISTINCT user_id) FROM memories"
+            ).fetchone()
+            return {"memories": memories, "users": users, "searches": self._searches, "adds": self._adds,
+                    "mapped": len(self._matrices)}
+
+    def close(self) -> None:
+        with self._lock:
+            self._matrices.clear()
+            self._conn.close()
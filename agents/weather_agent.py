@@ -1,86 +1,52 @@
 # weather_agent.py
 # ----------------
-# Weather Agent with Mem0 memory integration
+# Weather Agent (live city weather, clothing advice) with Mem0 memory integration
 #
-# This module provides:
-#   - Weather agent for real-time city weather and clothing recommendations
-#   - Memory-enhanced invocation using Mem0
-#   - Persistent conversation storage
-
-from typing import Dict
-from langchain.agents import create_agent
-from langchain_core.messages import SystemMessage
-from client import model, mem0
-from prompts import system_prompt, WEATHER_AGENT_USER_PROMPT
-from tools import get_weather
+# This module defines:
+#   - invoke_weather_agent_with_memory / ainvoke_weather_agent_with_memory: One
+#       memory-enhanced turn, sync or async.
+#   - stream_weather_agent_with_memory / astream_weather_agent_with_memory: The same
+#       turn as a stream of tool and answer events.
+#   - build_weather_agent / get_weather_agent: Agent construction and the shared instance.
+
+import asyncio
+from typing import Any, AsyncIterator, Dict, Iterator, Optional
+from client import get_model
+from prompts import WEATHER_AGENT_USER_PROMPT
+from tools.weather_tool import weather_tool as get_weather, weather_batch_tool
+from agents.context import ContextBuilder
+from agents.memory import aretrieve_memories, retrieve_memories, save_interaction
+from agents.registry import AGENT_INVOKE_TIMEOUT, agent_registry
+from agents.streaming import astream_agent, stream_agent
 from logger_config import setup_logger
+from tracing import traced
 
 logger = setup_logger(__name__)
-logger.info("Initializing Weather Agent with Mem0 memory")
 
 # -----------------------
 # Weather tools
 # -----------------------
-weather_tools = [get_weather]
+weather_tools = [get_weather, weather_batch_tool]
 logger.debug(f"Registered weather tools: {[tool.name for tool in weather_tools]}")
 
-# -----------------------
-# Memory helpers
-# -----------------------
-def retrieve_memories(query: str, user_id: str) -> str:
-    logger.info(f"Retrieving memories for user: {user_id}")
-    if len(query.strip().split()) < 3:
-        return ""
-    try:
-        memories = mem0.search(query=query, filters={"user_id": user_id}, limit=5)
-        memory_list = memories.get("results", [])
-        if not memory_list:
-            return ""
-        serialized = "\n".join(f"- {mem['memory']}" for mem in memory_list)
-        logger.info(f"Retrieved {len(memory_list)} memories")
-        return serialized
-    except Exception as e:
-        logger.error(f"Error retrieving memories: {str(e)}", exc_info=True)
-        return ""
-
-def save_interaction(user_id: str, user_input: str, assistant_response: str):
-    logger.info(f"Saving interaction to Mem0 for user: {user_id}")
-    try:
-        interaction = [
-            {"role": "user", "content": user_input},
-            {"role": "assistant", "content": assistant_response}
-        ]
-        result = mem0.add(interaction, user_id=user_id)
-        logger.info(f"Memory saved successfully: {len(result.get('results', []))} memories added")
-    except Exception as e:
-        logger.error(f"Error saving interaction to Mem0: {str(e)}", exc_info=True)
+# Static prompt precomputed once; per-call memory/history trimmed to CONTEXT_TOKEN_BUDGET
+context_builder = ContextBuilder(WEATHER_AGENT_USER_PROMPT)
 
 # -----------------------
 # Memory-enhanced agent invocation
 # -----------------------
+@traced("turn.weather")
 def invoke_weather_agent_with_memory(messages: Dict, user_id: str = "default_user") -> Dict:
     logger.info(f"Weather Agent invocation with memory for user: {user_id}")
     last_message = messages["messages"][-1]
     user_query = getattr(last_message, "content", str(last_message))
     memory_context = retrieve_memories(user_query, user_id)
 
-    enhanced_system_prompt = SystemMessage(
-        content=f"""{WEATHER_AGENT_USER_PROMPT.content}
-
-## MEMORY CONTEXT
-{memory_context}
-
-Rules:
-- Use memory facts if available
-- If user's name is known, use it
-- Do NOT say you lack personal info if memory exists
-"""
-    )
-
-    enhanced_messages = {"messages": [enhanced_system_prompt] + messages["messages"][1:]}
+    # System prompt + memories + as much recent history as fits the token budget
+    enhanced_messages = {"messages": context_builder.build(messages["messages"], memory_context)}
 
     try:
-        response = weather_agent.invoke(enhanced_messages)
+        response = get_weather_agent().invoke(enhanced_messages)
         assistant_response = response["messages"][-1].content
         save_interaction(user_id, user_query, assistant_response)
         logger.info("Weather Agent invocation completed successfully")
@@ -89,12 +55,148 @@ Rules:
         logger.error(f"Failed to invoke Weather Agent with memory: {str(e)}", exc_info=True)
         raise
 
+@traced("turn.weather")
+async def ainvoke_weather_agent_with_memory(
+    messages: Dict, user_id: str = "default_user", timeout: Optional[float] = AGENT_INVOKE_TIMEOUT
+) -> Dict:
+    """
+    Summary:
+        Async invoke_weather_agent_with_memory. The memory search overlaps with
+        agent lookup; the agent then runs through its async API, so weather
+        requests are awaited instead of holding a thread.
+
+    Args:
+        messages (Dict): {"messages": [...]} ending with the user's query.
+        user_id (str): Memory owner.
+        timeout (float): Seconds before the whole turn is cancelled; None disables it.
+
+    Returns:
+        Dict: The agent response ({"messages": [...]}).
+
+    Raises:
+        ValueError: If no messages are given.
+        asyncio.TimeoutError: If the turn exceeds ``timeout``.
+    """
+    logger.info(f"Weather Agent async invocation with memory for user: {user_id}")
+    try:
+        return await asyncio.wait_for(_ainvoke_weather_turn(messages, user_id), timeout)
+    except asyncio.TimeoutError:
+        logger.error(f"Weather Agent invocation timed out after {timeout}s for user: {user_id}")
+        raise
+    except asyncio.CancelledError:
+        logger.warning(f"Weather Agent invocation cancelled for user: {user_id}")
+        raise
+
+
+async def _ainvoke_weather_turn(messages: Dict, user_id: str) -> Dict:
+    history = messages.get("messages") or []
+    if not history:
+        raise ValueError("messages must contain at least one message")
+    user_query = getattr(history[-1], "content", str(history[-1]))
+    memory_task = asyncio.ensure_future(aretrieve_memories(user_query, user_id))
+
+    try:
+        agent = get_weather_agent()
+        memory_context = await memory_task
+        enhanced_messages = {"messages": context_builder.build(history, memory_context)}
+        response = await agent.ainvoke(enhanced_messages)
+        save_interaction(user_id, user_query, response["messages"][-1].content)
+        logger.info("Weather Agent async invocation completed successfully")
+        return response
+    except Exception as e:
+        logger.error(f"Failed to invoke Weather Agent with memory: {str(e)}", exc_info=True)
+        raise
+    finally:
+        # Cancelling cannot stop a backend search already running on its worker thread;
+        # that search still fills the memory search cache for the user's next turn
+        memory_task.cancel()
+
+@traced("turn.weather")
+def stream_weather_agent_with_memory(messages: Dict, user_id: str = "default_user") -> Iterator[Dict[str, Any]]:
+    """
+    Summary:
+        Streaming invoke_weather_agent_with_memory: yields tool_call/tool_result
+        events and answer tokens as they are produced, then a final event. The
+        interaction is saved to memory only once the stream has completed.
+
+    Args:
+        messages (Dict): {"messages": [...]} ending with the user's query.
+        user_id (str): Memory owner.
+
+    Yields:
+        Dict[str, Any]: Events as described in agents/streaming.py.
+    """
+    logger.info(f"Weather Agent streaming invocation with memory for user: {user_id}")
+    last_message = messages["messages"][-1]
+    user_query = getattr(last_message, "content", str(last_message))
+    memory_context = retrieve_memories(user_query, user_id)
+    enhanced_messages = {"messages": context_builder.build(messages["messages"], memory_context)}
+
+    try:
+        for event in stream_agent(get_weather_agent(), enhanced_messages):
+            if event["type"] == "final":
+                # The answer is complete; persist it even if the consumer stops here
+                save_interaction(user_id, user_query, event["content"])
+            yield event
+        logger.info("Weather Agent streaming invocation completed successfully")
+    except Exception as e:
+        logger.error(f"Failed to stream Weather Agent with memory: {str(e)}", exc_info=True)
+        raise
+
+
+@traced("turn.weather")
+async def astream_weather_agent_with_memory(messages: Dict, user_id: str = "default_user") -> AsyncIterator[Dict[str, Any]]:
+    """Async stream_weather_agent_with_memory; the memory search runs off the event loop."""
+    logger.info(f"Weather Agent async streaming invocation with memory for user: {user_id}")
+    last_message = messages["messages"][-1]
+    user_query = getattr(last_message, "content", str(last_message))
+    memory_context = await aretrieve_memories(user_query, user_id)
+    enhanced_messages = {"messages": context_builder.build(messages["messages"], memory_context)}
+
+    try:
+        async for event in astream_agent(get_weather_agent(), enhanced_messages):
+            if event["type"] == "final":
+                # The answer is complete; persist it even if the consumer stops here
+                save_interaction(user_id, user_query, event["content"])
+            yield event
+        logger.info("Weather Agent async streaming invocation completed successfully")
+    except Exception as e:
+        logger.error(f"Failed to stream Weather Agent with memory: {str(e)}", exc_info=True)
+        raise
+
 # -----------------------
-# Initialize Weather Agent
+# Weather Agent construction
 # -----------------------
-try:
-    weather_agent = create_agent(model=model, tools=weather_tools, system_prompt=WEATHER_AGENT_USER_PROMPT)
-    logger.info("Weather Agent created successfully")
-except Exception as e:
-    logger.error(f"Failed to create Weather Agent: {str(e)}", exc_info=True)
-    raise
+def build_weather_agent():
+    """
+    Summary:
+        Creates the Weather Agent. Called once by the agent registry on first use;
+        use get_weather_agent() to obtain the shared instance.
+
+    Returns:
+        The compiled LangChain agent.
+    """
+    # Deferred: the agent framework and model client are only loaded when needed
+    from langchain.agents import create_agent
+    from agents.model_guard import ModelGuardMiddleware
+    from agents.tool_executor import ConcurrentToolMiddleware
+
+    logger.info("Initializing Weather Agent with Mem0 memory")
+    try:
+        agent = create_agent(
+            model=get_model(),
+            tools=weather_tools,
+            system_prompt=WEATHER_AGENT_USER_PROMPT,
+            # Retries/circuit breaking for Gemini; independent tool calls run concurrently
+            middleware=[ModelGuardMiddleware(), ConcurrentToolMiddleware(weather_tools)],
+        )
+        logger.info("Weather Agent created successfully")
+        return agent
+    except Exception as e:
+        logger.error(f"Failed to create Weather Agent: {str(e)}", exc_info=True)
+        raise
+
+
+def get_weather_agent():
+    """Returns the shared Weather Agent, building it on first call."""
+    return agent_registry.get("weather")
@@ -0,0 +1,164 @@
+# bench_agents.py
+# ---------------
+# End-to-end throughput and latency of the main.py scenarios, fully offline.
+#
+# The Core and Weather agents run unmodified against benchmarks/fakes.py: a scripted
+# chat model (fixed tool plans, configurable latency), a local OpenWeatherMap stub
+# and an in-memory Mem0 stand-in. Three scenarios mirror main.py:
+#   agent       main():            get_agent(name).invoke, one query at a time
+#   memory      main() + memory:   invoke_*_agent_with_memory, one query at a time
+#   concurrent  main_concurrent(): ainvoke_*_agent_with_memory, --concurrency at a time
+# Each round sends the three CORE_QUERIES and WEATHER_QUERY. The per-stage table
+# comes from tracing.stage_summary(), so model/tool/memory time can be told apart
+# from the project's own overhead.
+#
+# Usage:
+#   python -m benchmarks.bench_agents [--rounds N] [--concurrency N] [--llm-latency S]
+#                                     [--weather-latency S] [--mem0-latency S]
+
+import argparse
+import asyncio
+import logging
+import sys
+import time
+
+from langchain_core.messages import HumanMessage
+
+from benchmarks.fakes import offline_backends
+
+SCENARIOS = ("agent", "memory", "concurrent")
+
+
+def percentile(samples: list, q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def build_jobs(rounds: int, distinct: bool = False) -> list:
+    """
+    (agent name, query) pairs in main.py order, repeated ``rounds`` times. With
+    ``distinct`` every query gets a request number so no response cache can answer it.
+    """
+    from main import CORE_QUERIES, WEATHER_QUERY
+
+    pairs = [("core", query) for query in CORE_QUERIES] + [("weather", WEATHER_QUERY)]
+    jobs = [pair for _ in range(rounds) for pair in pairs]
+    if distinct:
+        jobs = [(name, f"{query} (request {i})") for i, (name, query) in enumerate(jobs)]
+    return jobs
+
+
+def run_agent(jobs: list, users: int) -> tuple:
+    from agents.registry import get_agent
+
+    latencies, errors = [], 0
+    for name, query in jobs:
+        start = time.perf_counter()
+        try:
+            get_agent(name).invoke({"messages": [HumanMessage(content=query)]})
+        except Exception:
+            errors += 1
+        latencies.append(time.perf_counter() - start)
+    return latencies, errors
+
+
+def run_memory(jobs: list, users: int) -> tuple:
+    from agents.core_agent import invoke_core_agent_with_memory
+    from agents.weather_agent import invoke_weather_agent_with_memory
+
+    invoke = {"core": invoke_core_agent_with_memory, "weather": invoke_weather_agent_with_memory}
+    latencies, errors = [], 0
+    for i, (name, query) in enumerate(jobs):
+        start = time.perf_counter()
+        try:
+            invoke[name]({"messages": [HumanMessage(content=query)]}, user_id=f"bench-user-{i % users}")
+        except Exception:
+            errors += 1
+        latencies.append(time.perf_counter() - start)
+    return latencies, errors
+
+
+def run_concurrent(jobs: list, users: int, concurrency: int) -> tuple:
+    from agents.core_agent import ainvoke_core_agent_with_memory
+    from agents.weather_agent import ainvoke_weather_agent_with_memory
+
+    ainvoke = {"core": ainvoke_core_agent_with_memory, "weather": ainvoke_weather_agent_with_memory}
+    latencies, errors = [], 0
+
+    async def one(i: int, name: str, query: str, gate: asyncio.Semaphore) -> None:
+        nonlocal errors
+        async with gate:
+            start = time.perf_counter()
+            try:
+                await ainvoke[name]({"messages": [HumanMessage(content=query)]},
+                                    user_id=f"bench-user-{i % users}")
+            except Exception:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    async def run_all() -> None:
+        gate = asyncio.Semaphore(concurrency)
+        await asyncio.gather(*(one(i, name, query, gate) for i, (name, query) in enumerate(jobs)))
+
+    asyncio.run(run_all())
+    return latencies, errors
+
+
+def print_stages() -> None:
+    from tracing import stage_summary
+
+    for name, entry in stage_summary().items():
+        cache = entry.get("cache", {})
+        hits = f"{cache.get('hit', 0)}/{cache.get('hit', 0) + cache.get('miss', 0)}" if cache else ""
+        print(f"  {name:<22}{entry['count']:>8}{entry['errors']:>8}{entry['p50_ms']:>10.2f}"
+              f"{entry['p99_ms']:>10.2f}{hits:>10}")
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="offline end-to-end agent benchmark")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--rounds", type=int, default=10, help="passes over the four main.py queries")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--distinct", action="store_true", help="make every query unique (no cache hits)")
+    parser.add_argument("--users", type=int, default=4, help="distinct user ids for the memory scenarios")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="seconds per model call")
+    parser.add_argument("--weather-latency", type=float, default=0.02, help="seconds per weather request")
+    parser.add_argument("--mem0-latency", type=float, default=0.03, help="seconds per Mem0 add/search")
+    args = parser.parse_args(argv)
+
+    # Tool and agent INFO lines would dominate the output and the timings
+    logging.disable(logging.INFO)
+    from tracing import tracer
+
+    jobs = build_jobs(args.rounds, args.distinct)
+    print(f"{len(jobs)} requests per scenario; fake latencies: model {args.llm_latency * 1000:.0f} ms, "
+          f"weather {args.weather_latency * 1000:.0f} ms, mem0 {args.mem0_latency * 1000:.0f} ms")
+
+    with offline_backends(args.llm_latency, args.weather_latency, args.mem0_latency) as backends:
+        for scenario in args.scenarios:
+            tracer.metrics.reset()
+            start = time.perf_counter()
+            if scenario == "agent":
+                latencies, errors = run_agent(jobs, args.users)
+            elif scenario == "memory":
+                latencies, errors = run_memory(jobs, args.users)
+            else:
+                latencies, errors = run_concurrent(jobs, args.users, args.concurrency)
+            seconds = time.perf_counter() - start
+
+            label = f"{scenario} (x{args.concurrency})" if scenario == "concurrent" else scenario
+            print(f"\n{'scenario':<18}{'requests':>9}{'errors':>8}{'seconds':>9}{'req/s':>8}"
+                  f"{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}")
+            print(f"{label:<18}{len(latencies):>9}{errors:>8}{seconds:>9.2f}{len(latencies) / seconds:>8.1f}"
+                  f"{percentile(latencies, 0.5) * 1000:>9.1f}{percentile(latencies, 0.9) * 1000:>9.1f}"
+                  f"{percentile(latencies, 0.99) * 1000:>9.1f}")
+            print(f"  {'stage':<22}{'count':>8}{'errors':>8}{'p50 ms':>10}{'p99 ms':>10}{'hits':>10}")
+            print_stages()
+
+    # After the block: pending memory writes have been flushed to the stand-in
+    print(f"\nweather stub requests: {backends['weather_server'].requests}, "
+          f"mem0 calls: {backends['mem0'].calls}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
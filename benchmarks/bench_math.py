@@ -0,0 +1,90 @@
+# bench_math.py
+# -------------
+# Microbenchmarks for the math_calculator expression engine.
+#
+# Compares:
+#   - legacy: the previous recursive AST walker (per-call parse, per-node debug call)
+#   - compiled (cold): compile_expression with an empty plan cache, then evaluate
+#   - compiled (warm): cached plan, evaluation only
+#
+# Usage:
+#   python -m benchmarks.bench_math [--repeat N]
+
+import argparse
+import ast
+import logging
+import operator as op
+import sys
+import timeit
+
+from tools.math_tool import compile_expression, evaluate_expression
+
+# Legacy evaluator, kept verbatim apart from the logger: debug is disabled here, so the
+# numbers are a lower bound on what the old path cost with DEBUG file logging enabled.
+_legacy_logger = logging.getLogger("benchmarks.legacy_math")
+_legacy_logger.setLevel(logging.INFO)
+
+_LEGACY_OPERATORS = {
+    ast.Add: op.add,
+    ast.Sub: op.sub,
+    ast.Mult: op.mul,
+    ast.Div: op.truediv,
+    ast.Pow: op.pow,
+}
+
+
+def _legacy_eval_expr(node):
+    _legacy_logger.debug(f"Evaluating AST node: {type(node).__name__}")
+    if isinstance(node, ast.Constant):
+        return node.n
+    if isinstance(node, ast.BinOp):
+        return _LEGACY_OPERATORS[type(node.op)](
+            _legacy_eval_expr(node.left),
+            _legacy_eval_expr(node.right)
+        )
+    raise ValueError("Invalid expression node")
+
+
+def legacy(expression: str):
+    return _legacy_eval_expr(ast.parse(expression, mode="eval").body)
+
+
+def compiled_cold(expression: str):
+    compile_expression.cache_clear()
+    return evaluate_expression(compile_expression(expression))
+
+
+def compiled_warm(expression: str):
+    return evaluate_expression(compile_expression(expression))
+
+
+CASES = {
+    "small": "(234 * 12) + 98",
+    "medium": " + ".join(f"({i} * {i + 1} - {i} / 7)" for i in range(1, 60)),
+    "long_chain_900": " + ".join(["1.5"] * 900),
+}
+
+
+def _time(func, expression: str, repeat: int) -> str:
+    try:
+        func(expression)
+    except RecursionError:
+        return "RecursionError"
+    number = max(1, 20000 // max(1, len(expression) // 8))
+    best = min(timeit.repeat(lambda: func(expression), number=number, repeat=repeat))
+    return f"{best / number * 1e6:10.2f} us"
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="math_calculator engine microbenchmarks")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    print(f"{'case':<16}{'legacy':>18}{'compiled (cold)':>18}{'compiled (warm)':>18}")
+    for name, expression in CASES.items():
+        row = [_time(func, expression, args.repeat) for func in (legacy, compiled_cold, compiled_warm)]
+        print(f"{name:<16}" + "".join(f"{cell:>18}" for cell in row))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
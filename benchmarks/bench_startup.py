@@ -0,0 +1,58 @@
+# bench_startup.py
+# ----------------
+# Cold-start benchmark: wall-clock time to import the entry point and agent modules
+# in a fresh interpreter. No agent is built and no credentials are needed.
+#
+# Usage:
+#   python -m benchmarks.bench_startup [--runs N] [--modules main agents.core_agent ...]
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+DEFAULT_MODULES = [
+    "logger_config",
+    "agents.registry",
+    "main",
+    "tools.math_tool",
+    "agents.core_agent",
+    "agents.weather_agent",
+]
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def time_import(module: str, runs: int) -> list:
+    """Imports ``module`` in ``runs`` fresh interpreters; returns wall times in ms."""
+    env = dict(os.environ, LOG_CONSOLE_LEVEL="CRITICAL", LOG_FILE=os.devnull)
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "-c", f"import {module}"],
+            cwd=ROOT, env=env, check=True,
+        )
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="cold import-time benchmark")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--modules", nargs="+", default=DEFAULT_MODULES)
+    args = parser.parse_args(argv)
+
+    baseline = statistics.median(time_import("sys", args.runs))
+    print(f"interpreter baseline: {baseline:.0f} ms (median of {args.runs})")
+    print(f"{'module':<24}{'median ms':>12}{'min ms':>10}{'over baseline':>16}")
+    for module in args.modules:
+        samples = time_import(module, args.runs)
+        median = statistics.median(samples)
+        print(f"{module:<24}{median:>12.0f}{min(samples):>10.0f}{median - baseline:>16.0f}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
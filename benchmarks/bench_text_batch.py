@@ -0,0 +1,59 @@
+# bench_text_batch.py
+# -------------------
+# Scaling benchmark for analyze_documents (parallel batch text analysis).
+#
+# Generates synthetic reviews and times the batch across worker counts,
+# reporting throughput and speedup relative to a single in-process worker.
+#
+# Usage:
+#   python -m benchmarks.bench_text_batch [--documents N] [--words N] [--chunk-size N]
+
+import argparse
+import os
+import random
+import sys
+import time
+
+from tools.text_analyzer import analyze_documents, shutdown_batch_pools
+
+_VOCABULARY = (
+    "the service was good great happy excellent bad sad poor terrible delivery "
+    "product price support quality fast slow refund order arrived broken works"
+).split()
+
+
+def make_documents(count: int, words: int, seed: int = 7):
+    rng = random.Random(seed)
+    return [" ".join(rng.choices(_VOCABULARY, k=words)) + "." for _ in range(count)]
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="analyze_documents scaling benchmark")
+    parser.add_argument("--documents", type=int, default=20000)
+    parser.add_argument("--words", type=int, default=120)
+    parser.add_argument("--chunk-size", type=int, default=256)
+    args = parser.parse_args(argv)
+
+    documents = make_documents(args.documents, args.words)
+    total_mb = sum(map(len, documents)) / 1e6
+    cpus = os.cpu_count() or 1
+    worker_counts = sorted({1, 2, 4, 8, cpus} & set(range(1, cpus + 1)))
+
+    print(f"{args.documents} documents, {total_mb:.1f} MB, {cpus} CPUs")
+    print(f"{'workers':>8}{'seconds':>10}{'docs/s':>12}{'speedup':>9}")
+    baseline = None
+    for workers in worker_counts:
+        if workers > 1:
+            # Warm the shared pool so process startup is not counted
+            analyze_documents(documents[:args.chunk_size * workers], workers=workers, chunk_size=args.chunk_size)
+        start = time.perf_counter()
+        result = analyze_documents(documents, workers=workers, chunk_size=args.chunk_size)
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        assert result["totals"]["documents"] == args.documents
+        print(f"{workers:>8}{elapsed:>10.2f}{args.documents / elapsed:>12.0f}{baseline / elapsed:>8.2f}x")
+    shutdown_batch_pools()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+# bench_tools.py
+# --------------
+# Per-call throughput and latency of each tool, invoked directly (no agent, no model).
+#
+# Tools are called through StructuredTool.invoke, as the agents' tool node does, so
+# argument validation and the tool spans are included. The weather tools run against
+# the local OpenWeatherMap stub from benchmarks/fakes.py: "cached" repeats one city
+# (weather_cache hits), "uncached" clears the cache before every call so each one
+# makes an HTTP request to the stub.
+#
+# Usage:
+#   python -m benchmarks.bench_tools [--iterations N] [--weather-latency S] [--only NAME ...]
+
+import argparse
+import logging
+import sys
+import time
+
+from benchmarks.fakes import offline_backends
+
+PARAGRAPH = "I am very happy with the excellent service. The staff were friendly, but the wait was long."
+CITIES = ["Chandigarh", "Delhi", "Mumbai", "Pune", "Shimla"]
+
+
+def percentile(samples: list, q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def build_cases() -> list:
+    """(name, call) pairs; each call performs one tool invocation."""
+    from tools.date_utility import date_utility
+    from tools.math_tool import math_batch_calculator, math_calculator
+    from tools.text_analyzer import text_analyzer
+    from tools.weather_tool import weather_batch_tool, weather_cache, weather_tool
+
+    prices = [round(10 + i * 0.25, 2) for i in range(1_000)]
+
+    def uncached(tool, payload):
+        def call():
+            weather_cache.clear()
+            tool.invoke(payload)
+        return call
+
+    return [
+        ("math_calculator", lambda: math_calculator.invoke({"expression": "(234 * 12) + 98"})),
+        ("math_batch_calculator x1000", lambda: math_batch_calculator.invoke(
+            {"expression": "price * qty * 1.18", "variables": {"price": prices, "qty": 3}})),
+        ("date_utility", lambda: date_utility.invoke({"days": 45})),
+        ("text_analyzer", lambda: text_analyzer.invoke({"text": PARAGRAPH})),
+        ("weather_tool cached", lambda: weather_tool.invoke({"city": "Chandigarh"})),
+        ("weather_tool uncached", uncached(weather_tool, {"city": "Chandigarh"})),
+        (f"weather_batch_tool x{len(CITIES)} uncached", uncached(weather_batch_tool, {"cities": CITIES})),
+    ]
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="tool microbenchmarks")
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--weather-latency", type=float, default=0.0, help="seconds per stub weather request")
+    parser.add_argument("--only", nargs="+", default=None, help="run cases whose name starts with these")
+    args = parser.parse_args(argv)
+
+    # One [TOOL CALL] log line per call would dominate the timings
+    logging.disable(logging.INFO)
+
+    with offline_backends(weather_latency=args.weather_latency):
+        cases = [case for case in build_cases()
+                 if not args.only or any(case[0].startswith(prefix) for prefix in args.only)]
+        print(f"{args.iterations} calls per tool; stub weather latency {args.weather_latency * 1000:.0f} ms")
+        print(f"{'tool':<32}{'ops/s':>10}{'p50 us':>10}{'p99 us':>10}")
+        for name, call in cases:
+            call()  # warm-up: imports, caches, HTTP connection
+            samples = []
+            for _ in range(args.iterations):
+                start = time.perf_counter()
+                call()
+                samples.append(time.perf_counter() - start)
+            print(f"{name:<32}{len(samples) / sum(samples):>10.0f}"
+                  f"{percentile(samples, 0.5) * 1e6:>10.1f}{percentile(samples, 0.99) * 1e6:>10.1f}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
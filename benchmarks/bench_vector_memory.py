@@ -0,0 +1,92 @@
+# bench_vector_memory.py
+# ----------------------
+# Search latency of the local memory backend (agents/vector_memory.py) by store size.
+#
+# Fills one user's store with random unit vectors in growing steps and times
+# top-k searches at each size: the query embedding (HashingEmbedder) and the
+# memmapped cosine scan are reported separately. The store lives in a temporary
+# directory; at 256 dimensions each million memories is ~1 GB of vector file.
+#
+# Usage:
+#   python -m benchmarks.bench_vector_memory [--sizes 1000 10000 ...] [--dim N] [--queries N]
+
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from agents.vector_memory import HashingEmbedder, LocalMemoryStore
+
+USER_ID = "bench-user"
+_FILL_BATCH = 100_000
+
+
+def percentile(samples: list, q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def fill(store: LocalMemoryStore, start: int, stop: int, rng: np.random.Generator) -> None:
+    """Appends memories start..stop-1 with random vectors (embedding cost is not measured here)."""
+    for batch_start in range(start, stop, _FILL_BATCH):
+        batch_stop = min(stop, batch_start + _FILL_BATCH)
+        vectors = rng.standard_normal((batch_stop - batch_start, store.dim), dtype=np.float32)
+        texts = [f"synthetic memory {i}" for i in range(batch_start, batch_stop)]
+        store.add_memories(USER_ID, texts, vectors)
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="local vector memory search benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000, 1_000_000])
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--limit", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(7)
+    queries = [f"what did I say about topic {i} and my preferences" for i in range(args.queries)]
+
+    with tempfile.TemporaryDirectory(prefix="bench_vector_memory_") as path:
+        embedder = HashingEmbedder(args.dim)
+        store = LocalMemoryStore(path, embedder=embedder)
+
+        embed_ms = []
+        for query in queries:
+            start = time.perf_counter()
+            embedder([query])
+            embed_ms.append((time.perf_counter() - start) * 1000)
+        print(f"dim {args.dim}, top-{args.limit}, {args.queries} queries per size; "
+              f"query embedding p50 {statistics.median(embed_ms):.3f} ms")
+        print(f"{'memories':>10}{'fill s':>9}{'p50 ms':>10}{'p99 ms':>10}{'Mrows/s':>10}{'search+fetch p50 ms':>21}")
+
+        stored = 0
+        for size in sorted(args.sizes):
+            start = time.perf_counter()
+            fill(store, stored, size, rng)
+            fill_seconds = time.perf_counter() - start
+            stored = size
+
+            vectors = embedder(queries)
+            store.search_vector(USER_ID, vectors[0], args.limit)  # map the grown file
+            scan_ms = []
+            for vector in vectors:
+                start = time.perf_counter()
+                store.search_vector(USER_ID, vector, args.limit)
+                scan_ms.append((time.perf_counter() - start) * 1000)
+            full_ms = []
+            for query in queries:
+                start = time.perf_counter()
+                store.search(query, user_id=USER_ID, limit=args.limit)
+                full_ms.append((time.perf_counter() - start) * 1000)
+
+            p50 = statistics.median(scan_ms)
+            print(f"{size:>10}{fill_seconds:>9.1f}{p50:>10.3f}{percentile(scan_ms, 0.99):>10.3f}"
+                  f"{size / p50 / 1000:>10.0f}{statistics.median(full_ms):>21.3f}")
+        store.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,292 @@
+# fakes.py
+# --------
+# Deterministic offline stand-ins for the three remote backends, for benchmarks.
+#
+# This module defines:
+#   - ScriptedChatModel: Chat model that plans tool calls from the user's query with
+#                        fixed rules (math, date, text analysis, weather) and answers
+#                        from the tool results, after a configurable latency.
+#   - StubWeatherServer: Local HTTP server speaking the OpenWeatherMap current-weather
+#                        API, with a configurable latency per request.
+#   - InMemoryMem0: Mem0 client stand-in (add/search) with a configurable latency.
+#   - offline_backends: Context manager wiring all three into client.py and
+#                       tools/weather_tool.py, with the shared rate limits lifted.
+#
+# Purpose:
+#   End-to-end numbers without GEMINI/OpenWeatherMap/Mem0 keys or network: what is
+#   measured is this project's own overhead plus the latencies chosen for the fakes.
+
+import asyncio
+import contextlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+# -----------------------
+# Scripted chat model
+# -----------------------
+_WEATHER = re.compile(r"weather (?:in|for|at) ([A-Z][\w-]*(?: [A-Z][\w-]*)*)")
+_DAYS = re.compile(r"(\d+) days?\b")
+_TEXT = re.compile(r"(?:analy[sz]e|sentiment of)[^:]*:\s*(.+)", re.IGNORECASE | re.DOTALL)
+_EXPRESSION = re.compile(r"[\d(][\d\s.+\-*/()]*[\d)]")
+
+
+def plan_tool_calls(query: str) -> List[Dict[str, Any]]:
+    """Tool calls (name, args) the scripted model requests for a query, in a fixed order."""
+    calls = []
+    for city in _WEATHER.findall(query):
+        calls.append({"name": "weather_tool", "args": {"city": city}})
+    text = _TEXT.search(query)
+    if text:
+        calls.append({"name": "text_analyzer", "args": {"text": text.group(1).strip()}})
+    else:
+        days = _DAYS.search(query)
+        if days:
+            calls.append({"name": "date_utility", "args": {"days": int(days.group(1))}})
+        for expression in _EXPRESSION.findall(query):
+            if any(op in expression for op in "+-*/") and not _DAYS.fullmatch(expression.strip()):
+                calls.append({"name": "math_calculator", "args": {"expression": expression.strip()}})
+    return calls
+
+
+def _estimate_tokens(messages: List[BaseMessage]) -> int:
+    return sum(len(str(message.content)) for message in messages) // 4 + 1
+
+
+class ScriptedChatModel(BaseChatModel):
+    """
+    Summary:
+        First model call of a turn requests the planned tool calls (all at once, so
+        the concurrent tool executor is exercised); the next call answers from the
+        tool results. Queries without planned tools are answered directly.
+
+    Args:
+        latency (float): Seconds each model call takes.
+    """
+
+    latency: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted-offline"
+
+    def bind_tools(self, tools: Any, **kwargs: Any) -> "ScriptedChatModel":
+        return self
+
+    def _respond(self, messages: List[BaseMessage]) -> ChatResult:
+        turn_start = max((i for i, m in enumerate(messages) if isinstance(m, HumanMessage)), default=0)
+        query = str(messages[turn_start].content) if messages else ""
+        results = [m for m in messages[turn_start:] if isinstance(m, ToolMessage)]
+        calls = plan_tool_calls(query) if not results else []
+
+        if calls:
+            message = AIMessage(content="", tool_calls=[
+                {**call, "id": f"call_{turn_start}_{i}", "type": "tool_call"} for i, call in enumerate(calls)
+            ])
+        elif results:
+            message = AIMessage(content="Here is what I found: " + "; ".join(str(m.content)[:200] for m in results))
+        else:
+            message = AIMessage(content=f"You said: {query[:200]}")
+
+        input_tokens = _estimate_tokens(messages)
+        output_tokens = _estimate_tokens([message])
+        message.usage_metadata = {
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+        }
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        if self.latency:
+            time.sleep(self.latency)
+        return self._respond(messages)
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self._respond(messages)
+
+
+# -----------------------
+# Stub weather server
+# -----------------------
+class _WeatherHandler(BaseHTTPRequestHandler):
+    server: "StubWeatherServer"
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        city = (parse_qs(url.query).get("q") or [""])[0]
+        with self.server.lock:
+            self.server.requests += 1
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        if url.path != "/data/2.5/weather" or not city or city.casefold() in self.server.unknown_cities:
+            status, payload = 404, {"cod": "404", "message": "city not found"}
+        else:
+            # Deterministic per city
+            seed = sum(map(ord, city.casefold()))
+            status, payload = 200, {
+                "cod": 200,
+                "name": city,
+                "main": {"temp": float(seed % 38 - 2), "humidity": seed % 60 + 30},
+                "weather": [{"description": ("clear sky", "few clouds", "light rain", "haze")[seed % 4]}],
+            }
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+
+class StubWeatherServer(ThreadingHTTPServer):
+    """
+    Summary:
+        OpenWeatherMap-compatible /data/2.5/weather endpoint on 127.0.0.1.
+
+    Args:
+        latency (float): Seconds added to every request.
+        unknown_cities (List[str]): Cities answered with the API's 404 payload.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, latency: float = 0.0, unknown_cities: Optional[List[str]] = None):
+        super().__init__(("127.0.0.1", 0), _WeatherHandler)
+        self.latency = latency
+        self.unknown_cities = {city.casefold() for city in unknown_cities or ["Atlantis"]}
+        self.lock = threading.Lock()
+        self.requests = 0
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/data/2.5/weather"
+
+    def start(self) -> "StubWeatherServer":
+        self._thread = threading.Thread(target=self.serve_forever, name="stub-weather", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+# -----------------------
+# Mem0 stand-in
+# -----------------------
+_WORD = re.compile(r"\w+")
+
+
+class InMemoryMem0:
+    """
+    Summary:
+        Keeps each user message as a memory and ranks memories by word overlap,
+        behind the same add()/search() calls agents/memory.py makes on Mem0.
+
+    Args:
+        latency (float): Seconds each add/search call takes.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self._lock = threading.Lock()
+        self._memories: Dict[str, List[str]] = {}
+        self.calls = {"add": 0, "search": 0}
+
+    def add(self, messages: List[dict], user_id: str, **kwargs: Any) -> Dict[str, List[Dict[str, Any]]]:
+        if self.latency:
+            time.sleep(self.latency)
+        texts = [m["content"] for m in messages if m.get("role") == "user" and m.get("content")]
+        with self._lock:
+            self.calls["add"] += 1
+            self._memories.setdefault(user_id, []).extend(texts)
+        return {"results": [{"memory": text, "event": "ADD"} for text in texts]}
+
+    def search(self, query: str, filters: Optional[Dict[str, Any]] = None, limit: int = 5,
+               **kwargs: Any) -> Dict[str, List[Dict[str, Any]]]:
+        if self.latency:
+            time.sleep(self.latency)
+        words = set(_WORD.findall(query.casefold()))
+        user_id = (filters or {}).get("user_id") or kwargs.get("user_id")
+        with self._lock:
+            self.calls["search"] += 1
+            memories = list(self._memories.get(user_id, []))
+        scored = [(len(words & set(_WORD.findall(memory.casefold()))), memory) for memory in memories]
+        ranked = sorted((item for item in scored if item[0]), key=lambda item: -item[0])[:limit]
+        return {"results": [{"memory": memory, "score": float(score)} for score, memory in ranked]}
+
+
+# -----------------------
+# Wiring
+# -----------------------
+@contextlib.contextmanager
+def offline_backends(llm_latency: float = 0.0, weather_latency: float = 0.0,
+                     mem0_latency: float = 0.0) -> Iterator[Dict[str, Any]]:
+    """
+    Summary:
+        Points the shared clients at the fakes for the duration of the block:
+        client.get_model() -> ScriptedChatModel, client.get_memory_store() ->
+        InMemoryMem0, weather_tool -> StubWeatherServer. The Gemini/OpenWeatherMap
+        rate limits are lifted (the fakes have no quota), span export is off and
+        memory profiles go to a temporary file.
+
+    Yields:
+        Dict[str, Any]: {"model", "weather_server", "mem0"} for inspection.
+    """
+    import client
+    import tools.weather_tool as weather_module
+    import tracing
+    from agents.memory_profile import UserProfileStore
+    import agents.memory as memory_module
+    from resilience import RateLimiter, gemini_guard, weather_guard
+
+    model = ScriptedChatModel(latency=llm_latency)
+    mem0 = InMemoryMem0(latency=mem0_latency)
+    server = StubWeatherServer(latency=weather_latency).start()
+    workdir = tempfile.TemporaryDirectory(prefix="bench_offline_")
+
+    replacements = [
+        (client, "_model", model),
+        (client, "_mem0", mem0),
+        (client, "MEMORY_BACKEND", "mem0"),
+        (weather_module, "WEATHER_API_URL", server.url),
+        (gemini_guard, "limiter", RateLimiter(1e9, 10 ** 9)),
+        (weather_guard, "limiter", RateLimiter(1e9, 10 ** 9)),
+        (tracing.tracer, "exporter", None),
+        (memory_module, "user_profiles", UserProfileStore(os.path.join(workdir.name, "profiles.sqlite3"))),
+    ]
+    saved = [(target, name, getattr(target, name)) for target, name, _ in replacements]
+    saved_key = os.environ.get("WEATHER_API_KEY")
+    os.environ["WEATHER_API_KEY"] = saved_key or "offline-benchmark"
+    for target, name, value in replacements:
+        setattr(target, name, value)
+    weather_module.weather_cache.clear()
+    try:
+        yield {"model": model, "weather_server": server, "mem0": mem0}
+    finally:
+        memory_module.memory_write_queue.flush()
+        for target, name, value in saved:
+            setattr(target, name, value)
+        if saved_key is None:
+            os.environ.pop("WEATHER_API_KEY", None)
+        server.stop()
+        workdir.cleanup()
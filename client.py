@@ -0,0 +1,116 @@
+"""
+client.py
+---------
+Lazily constructed backend clients shared by both agents.
+
+- get_model(): Gemini chat model (needs GEMINI_API_KEY)
+- get_mem0(): Mem0 memory client (needs MEM0_API_KEY)
+- get_memory_store(): Memory backend used by agents/memory.py: the Mem0 client, or
+  the local vector store from agents/vector_memory.py when MEMORY_BACKEND=local
+
+The model is created with the persistent response cache from llm_cache.py
+(disable with LLM_CACHE_ENABLED=0) and the shared Gemini rate limiter and
+circuit breaker from resilience.py. The SDK's own retries are turned off so
+ModelGuardMiddleware is the only retry layer and every attempt uses quota.
+
+Each client is built on first use and then reused, so a process only pays
+for (and only needs credentials for) the backends it actually touches.
+"""
+
+import os
+import threading
+
+from cred import require_credential
+from logger_config import setup_logger
+
+logger = setup_logger(__name__)
+
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
+MEMORY_BACKEND = os.getenv("MEMORY_BACKEND", "mem0").lower()
+
+_lock = threading.Lock()
+_model = None
+_mem0 = None
+_local_memory = None
+
+
+def get_model():
+    """
+    Summary:
+        Returns the shared Gemini chat model, creating it on first call.
+
+    Raises:
+        EnvironmentError: If GEMINI_API_KEY is missing.
+    """
+    global _model
+    if _model is None:
+        with _lock:
+            if _model is None:
+                from langchain_google_genai import ChatGoogleGenerativeAI
+                from llm_cache import get_llm_cache
+                from resilience import GuardRateLimiter, gemini_guard
+
+                _model = ChatGoogleGenerativeAI(
+                    model=GEMINI_MODEL,
+                    google_api_key=require_credential("GEMINI_API_KEY"),
+                    cache=get_llm_cache(),
+                    # Consulted after the cache lookup, so cache hits use no quota
+                    rate_limiter=GuardRateLimiter(gemini_guard),
+                    # Hidden SDK retries would bypass the shared limiter and breaker
+                    max_retries=0,
+                )
+                logger.info(f"Gemini model client created: {GEMINI_MODEL}")
+    return _model
+
+
+def get_mem0():
+    """
+    Summary:
+        Returns the shared Mem0 client, creating it on first call.
+
+    Raises:
+        EnvironmentError: If MEM0_API_KEY is missing.
+    """
+    global _mem0
+    if _mem0 is None:
+        with _lock:
+            if _mem0 is None:
+                from mem0 import MemoryClient
+
+                _mem0 = MemoryClient(api_key=require_credential("MEM0_API_KEY"))
+                logger.info("Mem0 client created")
+    return _mem0
+
+
+def get_memory_store():
+    """
+    Summary:
+        Returns the memory backend selected by MEMORY_BACKEND ("mem0" or "local").
+        Both expose add(messages, user_id=...) and search(query, filters=..., limit=...).
+
+    Raises:
+        EnvironmentError: If MEMORY_BACKEND=mem0 and MEM0_API_KEY is missing.
+        ValueError: If MEMORY_BACKEND names an unknown backend.
+    """
+    global _local_memory
+    if MEMORY_BACKEND == "mem0":
+        return get_mem0()
+    if MEMORY_BACKEND != "local":
+        raise ValueError(f"MEMORY_BACKEND must be 'mem0' or 'local', got {MEMORY_BACKEND!r}")
+    if _local_memory is None:
+        with _lock:
+            if _local_memory is None:
+                from agents.vector_memory import LocalMemoryStore
+
+                _local_memory = LocalMemoryStore()
+                logger.info(f"Local memory store opened: {_local_memory.path}")
+    return _local_memory
+
+
+def __getattr__(name: str):
+    # Backwards-compatible `from client import model, mem0`, resolved lazily
+    if name == "model":
+        return get_model()
+    if name == "mem0":
+        return get_mem0()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -7,6 +7,8 @@ all sensitive credentials (API keys).
 Best Practice:
 - Credentials are NOT hardcoded
 - Values are loaded from environment variables
+- Each key is validated only when the backend that needs it is first used,
+  so a missing weather key does not stop a math-only run
 """
 
 import os
@@ -16,11 +18,9 @@ from logger_config import setup_logger
 # Initialize logger for this module
 logger = setup_logger(__name__)
 
-logger.info("Starting credential loading process")
-
 # Load variables from .env file into environment
 load_dotenv()
-logger.debug(".env file loaded successfully")
+logger.debug(".env file loaded")
 
 # -----------------------------
 # Read API Keys from Environment
@@ -29,26 +29,31 @@ GEMINI_API_KEY = os.getenv("GEMINI_API_KEY", "")
 WEATHER_API_KEY = os.getenv("WEATHER_API_KEY", "")
 MEM0_API_KEY = os.getenv("MEM0_API_KEY", "")
 
-logger.debug(f"GEMINI_API_KEY present: {bool(GEMINI_API_KEY)}")
-logger.debug(f"WEATHER_API_KEY present: {bool(WEATHER_API_KEY)}")
-logger.debug(f"MEM0_API_KEY present: {bool(MEM0_API_KEY)}")
 
 # -----------------------------
-# Validate API Keys
+# Validate API Keys (on demand)
 # -----------------------------
-if not GEMINI_API_KEY:
-    logger.critical("GEMINI_API_KEY not found in .env file")
-    raise EnvironmentError("GEMINI_API_KEY missing in .env")
-
-if not WEATHER_API_KEY:
-    logger.critical("WEATHER_API_KEY not found in .env file")
-    raise EnvironmentError("WEATHER_API_KEY missing in .env")
-
-if not MEM0_API_KEY:
-    logger.critical("MEM0_API_KEY not found in .env file")
-    raise EnvironmentError("MEM0_API_KEY missing in .env")
+def require_credential(name: str) -> str:
+    """
+    Summary:
+        Returns the value of a required API key.
+
+    Args:
+        name (str): Environment variable name, e.g. "GEMINI_API_KEY".
+
+    Returns:
+        str: The key.
+
+    Raises:
+        EnvironmentError: If the key is missing or empty.
+    """
+    value = os.getenv(name, "")
+    if not value:
+        logger.critical(f"{name} not found in .env file")
+        raise EnvironmentError(f"{name} missing in .env")
+    logger.debug(f"{name} validated")
+    return value
 
-logger.info("All required API keys validated successfully")
 
 # -----------------------------
 # Memory Configuration
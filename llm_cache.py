@@ -0,0 +1,284 @@
+"""
+llm_cache.py
+------------
+Persistent response cache for the Gemini chat model shared by both agents.
+
+- SQLiteLLMCache: LangChain cache backed by a local SQLite file, keyed by a hash
+  of the serialized prompt (system prompt + message history) and the model
+  configuration string (model name, parameters and bound tool schemas), with
+  TTL and size-based (LRU) eviction.
+- get_llm_cache(): Shared cache instance, or None when LLM_CACHE_ENABLED=0.
+
+Answers that consumed the output of a time-sensitive tool (date_utility,
+weather_tool, ...) are stored with a short TTL or not at all; see
+LLM_CACHE_TOOL_TTLS.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional, Sequence
+
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.messages import message_to_dict, messages_from_dict
+from langchain_core.outputs import ChatGeneration, Generation
+
+from logger_config import setup_logger
+
+logger = setup_logger(__name__)
+
+# -----------------------
+# Cache configuration
+# -----------------------
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "1").lower() not in ("0", "false", "no")
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", ".llm_cache.sqlite3")
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", "3600"))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "10000"))
+
+
+def _parse_tool_ttls(spec: str) -> Dict[str, float]:
+    """Parses "tool=SECONDS,tool2=SECONDS" into a dict; malformed items are ignored."""
+    ttls = {}
+    for item in spec.split(","):
+        name, sep, seconds = item.partition("=")
+        try:
+            if sep and name.strip():
+                ttls[name.strip()] = float(seconds)
+        except ValueError:
+            continue
+    return ttls
+
+
+# Maximum TTL (seconds) of an answer whose prompt contains a result from the tool;
+# 0 means such answers are never cached.
+LLM_CACHE_TOOL_TTLS = _parse_tool_ttls(
+    os.getenv("LLM_CACHE_TOOL_TTLS", "date_utility=0,weather_tool=600,weather_batch_tool=600")
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_cache (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    expires_at REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS llm_cache_last_used ON llm_cache (last_used);
+"""
+
+
+class SQLiteLLMCache(BaseCache):
+    """
+    Summary:
+        LangChain chat-model cache stored in a local SQLite file.
+
+    Args:
+        path (str): SQLite database file (":memory:" for a private in-process cache).
+        ttl (float): Seconds a cached response stays valid.
+        max_entries (int): Rows kept before least recently used rows are evicted.
+        tool_ttls (Dict[str, float]): Per-tool TTL caps for answers that used the
+            tool's output; 0 disables caching for those answers.
+    """
+
+    def __init__(
+        self,
+        path: str = LLM_CACHE_PATH,
+        ttl: float = LLM_CACHE_TTL,
+        max_entries: int = LLM_CACHE_MAX_ENTRIES,
+        tool_ttls: Optional[Dict[str, float]] = None,
+    ):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.tool_ttls = dict(LLM_CACHE_TOOL_TTLS if tool_ttls is None else tool_ttls)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        if path != ":memory:":
+            # Several processes (CLI, server) may share the file
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._hits = 0
+        self._misses = 0
+        self._writes = 0
+        self._skipped = 0
+        self._evictions = 0
+
+    # -----------------------
+    # Keys and cache policy
+    # -----------------------
+    @staticmethod
+    def make_key(prompt: str, llm_string: str) -> str:
+        """SHA-256 of the model configuration (incl. tool schemas) and the serialized messages."""
+        digest = hashlib.sha256()
+        digest.update(llm_string.encode("utf-8"))
+        digest.update(b"\x00")
+        digest.update(prompt.encode("utf-8"))
+        return digest.hexdigest()
+
+    @staticmethod
+    def tools_used(prompt: str) -> set:
+        """Names of the tools whose results appear in a serialized chat prompt."""
+        try:
+            messages = json.loads(prompt)
+        except ValueError:
+            return set()
+        if not isinstance(messages, list):
+            return set()
+
+        call_names = {}
+        used = set()
+        for message in messages:
+            if not isinstance(message, dict):
+                continue
+            kind = (message.get("id") or [""])[-1]
+            kwargs = message.get("kwargs") or {}
+            if kind == "AIMessage":
+                for call in kwargs.get("tool_calls") or []:
+                    call_names[call.get("id")] = call.get("name")
+            elif kind == "ToolMessage":
+                name = kwargs.get("name") or call_names.get(kwargs.get("tool_call_id"))
+                if name:
+                    used.add(name)
+        return used
+
+    def ttl_for(self, prompt: str) -> float:
+        """
+        Summary:
+            TTL for a response to this prompt: the default TTL, capped by the TTL of
+            every time-sensitive tool whose result the model was answering from.
+            Responses that only *request* a tool are cached normally, since the tool
+            itself is re-run when the cached request is replayed.
+        """
+        ttl = self.ttl
+        for name in self.tools_used(prompt):
+            if name in self.tool_ttls:
+                ttl = min(ttl, self.tool_ttls[name])
+        return ttl
+
+    # -----------------------
+    # BaseCache interface
+    # -----------------------
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        key = self.make_key(prompt, llm_string)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or row[1] <= now:
+                if row is not None:
+                    self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._misses += 1
+                return None
+            self._conn.execute("UPDATE llm_cache SET last_used = ? WHERE key = ?", (now, key))
+            self._hits += 1
+        logger.debug("LLM cache hit: %s", key[:12])
+        return self._decode(row[0])
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        ttl = self.ttl_for(prompt)
+        if ttl <= 0:
+            with self._lock:
+                self._skipped += 1
+            logger.debug("LLM response not cached (time-sensitive tool result in prompt)")
+            return
+        try:
+            value = self._encode(return_val)
+        except (TypeError, ValueError) as e:
+            logger.warning(f"LLM response not cacheable: {str(e)}")
+            with self._lock:
+                self._skipped += 1
+            return
+
+        key = self.make_key(prompt, llm_string)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, expires_at, last_used) VALUES (?, ?, ?, ?)",
+                (key, value, now + ttl, now),
+            )
+            self._writes += 1
+            self._evict(now)
+
+    def clear(self, **kwargs: Any) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+        logger.info("LLM cache cleared")
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns hit/miss/write/skip/eviction counters, the hit rate and the row count."""
+        with self._lock:
+            size = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+            lookups = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 3) if lookups else 0.0,
+                "writes": self._writes,
+                "skipped": self._skipped,
+                "evictions": self._evictions,
+                "size": size,
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    # -----------------------
+    # Internals
+    # -----------------------
+    def _evict(self, now: float) -> None:
+        # Caller holds self._lock
+        expired = self._conn.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (now,)).rowcount
+        excess = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0] - self.max_entries
+        lru = 0
+        if excess > 0:
+            lru = self._conn.execute(
+                "DELETE FROM llm_cache WHERE key IN "
+                "(SELECT key FROM llm_cache ORDER BY last_used ASC LIMIT ?)",
+                (excess,),
+            ).rowcount
+        self._evictions += max(expired, 0) + max(lru, 0)
+
+    @staticmethod
+    def _encode(generations: Sequence[Generation]) -> str:
+        payload = []
+        for generation in generations:
+            if isinstance(generation, ChatGeneration):
+                payload.append({
+                    "message": message_to_dict(generation.message),
+                    "generation_info": generation.generation_info,
+                })
+            else:
+                payload.append({"text": generation.text, "generation_info": generation.generation_info})
+        return json.dumps(payload)
+
+    @staticmethod
+    def _decode(value: str) -> RETURN_VAL_TYPE:
+        generations = []
+        for item in json.loads(value):
+            if "message" in item:
+                message = messages_from_dict([item["message"]])[0]
+                generations.append(ChatGeneration(message=message, generation_info=item.get("generation_info")))
+            else:
+                generations.append(Generation(text=item["text"], generation_info=item.get("generation_info")))
+        return generations
+
+
+_cache: Optional[SQLiteLLMCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> Optional[SQLiteLLMCache]:
+    """Returns the shared response cache (created on first call), or None if disabled."""
+    global _cache
+    if not LLM_CACHE_ENABLED:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = SQLiteLLMCache()
+                logger.info(f"LLM response cache opened: {LLM_CACHE_PATH}")
+    return _cache
@@ -2,64 +2,149 @@
 # ----------------
 # Centralized logging configuration for the entire project.
 # Provides consistent logging format, levels, and handlers across all modules.
+#
+# Every logger created through setup_logger shares one QueueHandler per log file.
+# Request threads only enqueue records; a single background QueueListener owns the
+# RotatingFileHandler (and therefore rotation) and the console handler.
+#
+# Levels come from the environment:
+#   LOG_LEVEL          default level for project loggers (default: INFO)
+#   LOG_LEVELS         per-logger overrides, e.g. "tools.math_tool=DEBUG,agents=WARNING"
+#   LOG_FILE_LEVEL     minimum level written to the log file (default: DEBUG)
+#   LOG_CONSOLE_LEVEL  minimum level printed to stdout (default: INFO)
+#   LOG_FILE           default log file path (default: agent_app.log)
 
+import atexit
 import logging
+import os
+import queue
 import sys
-from logging.handlers import RotatingFileHandler
+import threading
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from datetime import datetime
+from typing import Dict, Optional, Tuple
 
+LOG_FILE = os.getenv("LOG_FILE", "agent_app.log")
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FILE_LEVEL = os.getenv("LOG_FILE_LEVEL", "DEBUG").upper()
+LOG_CONSOLE_LEVEL = os.getenv("LOG_CONSOLE_LEVEL", "INFO").upper()
 
-def setup_logger(name: str, log_file: str = "agent_app.log", level=logging.DEBUG) -> logging.Logger:
+
+def _parse_level_overrides(spec: str) -> Dict[str, str]:
+    """Parses "name=LEVEL,name2=LEVEL" into a dict; malformed items are ignored."""
+    overrides = {}
+    for item in spec.split(","):
+        name, sep, level = item.partition("=")
+        if sep and name.strip() and level.strip():
+            overrides[name.strip()] = level.strip().upper()
+    return overrides
+
+
+LOG_LEVELS = _parse_level_overrides(os.getenv("LOG_LEVELS", ""))
+
+# log file path -> (shared queue handler, listener owning the real handlers)
+_queue_handlers: Dict[str, Tuple[QueueHandler, QueueListener]] = {}
+_lock = threading.Lock()
+
+
+def _resolve_level(name: str) -> str:
+    """Most specific LOG_LEVELS entry for a dotted logger name, else LOG_LEVEL."""
+    parts = name.split(".")
+    for i in range(len(parts), 0, -1):
+        level = LOG_LEVELS.get(".".join(parts[:i]))
+        if level:
+            return level
+    return LOG_LEVEL
+
+
+def _get_queue_handler(log_file: str) -> QueueHandler:
     """
     Summary:
-        Creates and configures a logger with both file and console handlers.
+        Returns the shared QueueHandler for a log file, starting its listener on first use.
 
     Args:
-        name (str): Logger name (typically __name__ of the calling module)
         log_file (str): Path to log file
-        level (int): Logging level (DEBUG, INFO, WARNING, ERROR, CRITICAL)
+
+    Returns:
+        QueueHandler: Handler that enqueues records for the background listener
+    """
+    with _lock:
+        entry = _queue_handlers.get(log_file)
+        if entry is not None:
+            return entry[0]
+
+        # Detailed formatter for file logging
+        detailed_formatter = logging.Formatter(
+            fmt='%(asctime)s | %(levelname)-8s | %(name)s:%(funcName)s:%(lineno)d | %(message)s',
+            datefmt='%Y-%m-%d %H:%M:%S'
+        )
+
+        # Simplified formatter for console
+        console_formatter = logging.Formatter(
+            fmt='%(levelname)-8s | %(name)s | %(message)s'
+        )
+
+        # File handler with rotation: 5MB max per file, keep 5 backups.
+        # Only the listener thread writes to it, so rotation never races.
+        file_handler = RotatingFileHandler(
+            log_file,
+            maxBytes=5*1024*1024,
+            backupCount=5,
+            encoding='utf-8',
+            delay=True
+        )
+        file_handler.setLevel(LOG_FILE_LEVEL)
+        file_handler.setFormatter(detailed_formatter)
+
+        # Console handler (less verbose)
+        console_handler = logging.StreamHandler(sys.stdout)
+        console_handler.setLevel(LOG_CONSOLE_LEVEL)
+        console_handler.setFormatter(console_formatter)
+
+        queue_handler = QueueHandler(queue.SimpleQueue())
+        listener = QueueListener(
+            queue_handler.queue, file_handler, console_handler, respect_handler_level=True
+        )
+        listener.start()
+        _queue_handlers[log_file] = (queue_handler, listener)
+        return queue_handler
+
+
+@atexit.register
+def shutdown_logging() -> None:
+    """Flushes queued records and stops all listeners (registered with atexit)."""
+    with _lock:
+        entries = list(_queue_handlers.values())
+        _queue_handlers.clear()
+    for queue_handler, listener in entries:
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
+
+
+def setup_logger(name: str, log_file: Optional[str] = None, level=None) -> logging.Logger:
+    """
+    Summary:
+        Creates and configures a logger that writes through the shared queue handler
+        for its log file (file + console output happen on a background thread).
+
+    Args:
+        name (str): Logger name (typically __name__ of the calling module)
+        log_file (str): Path to log file (default: LOG_FILE)
+        level (int | str): Logging level; defaults to LOG_LEVELS/LOG_LEVEL from the environment
 
     Returns:
         logging.Logger: Configured logger instance
     """
     # Create logger
     logger = logging.getLogger(name)
-    logger.setLevel(level)
+    logger.setLevel(level if level is not None else _resolve_level(name))
 
     # Prevent duplicate handlers
     if logger.handlers:
         return logger
 
-    # Detailed formatter for file logging
-    detailed_formatter = logging.Formatter(
-        fmt='%(asctime)s | %(levelname)-8s | %(name)s:%(funcName)s:%(lineno)d | %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
-
-    # Simplified formatter for console
-    console_formatter = logging.Formatter(
-        fmt='%(levelname)-8s | %(name)s | %(message)s'
-    )
-
-    # File handler with rotation: 5MB max per file, keep 5 backups
-    file_handler = RotatingFileHandler(
-        log_file,
-        maxBytes=5*1024*1024,
-        backupCount=5,
-        encoding='utf-8'
-    )
-    file_handler.setLevel(logging.DEBUG)
-    file_handler.setFormatter(detailed_formatter)
-
-    # Console handler (less verbose)
-    console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setLevel(logging.INFO)
-    console_handler.setFormatter(console_formatter)
-
-    # Add handlers to logger
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
-
+    logger.addHandler(_get_queue_handler(log_file or LOG_FILE))
     return logger
 
 
@@ -67,7 +152,11 @@ def setup_logger(name: str, log_file: str = "agent_app.log", level=logging.DEBUG
 # Default application logger
 # -----------------------
 app_logger = setup_logger('agent_app')
-app_logger.info("="*50)
-app_logger.info("Logging system initialized")
-app_logger.info(f"Timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-app_logger.info("="*50)
+
+
+def log_startup_banner() -> None:
+    """Logs the startup banner; called by entry points rather than on import."""
+    app_logger.info("="*50)
+    app_logger.info("Logging system initialized")
+    app_logger.info(f"Timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    app_logger.info("="*50)
@@ -5,17 +5,42 @@
 # 2. Weather Agent - Fetches live weather data and provides clothing recommendations
 #
 # Runs example queries through each agent and prints human-readable responses.
+# Agents are built lazily through the agent registry, on first use.
+#
+# Usage:
+#   python main.py               run the example queries one after another
+#   python main.py --concurrent  run them all at once through the async,
+#                                memory-enabled entry points
+#   python main.py --stream      stream tool calls and answer tokens as they arrive
+
+import argparse
+import asyncio
+import time
 
-from agents.core_agent import get_core_agent
-from agents.weather_agent import get_weather_agent
+from agents.fast_path import fast_path_router
+from agents.registry import get_agent
 from langchain_core.messages import HumanMessage
+from llm_cache import get_llm_cache
+from logger_config import app_logger, log_startup_banner
+from tracing import stage_summary
+
+# Core agent example queries
+CORE_QUERIES = [
+    "What will be the date 45 days from today?",
+    "Analyze this paragraph: I am very happy with the excellent service.",
+    "What is (234 * 12) + 98?"
+]
+
+# Weather agent example
+WEATHER_QUERY = "What is today's weather in Chandigarh and suggest clothing accordingly?"
 
 
 def main():
     """
     Summary:
-        Initializes the Core and Weather agents and runs example queries
-        through each agent, printing the results in a human-friendly format.
+        Runs example queries through the Core and Weather agents, printing the
+        results in a human-friendly format. Each agent (and its model client) is
+        built on first use, so only the backends actually exercised are initialized.
 
     Args:
         None
@@ -29,21 +54,19 @@ def main():
             Any exceptions raised during agent initialization or query invocation
             will propagate and halt execution.
     """
-    # Initialize agents
-    core_agent = get_core_agent()
-    weather_agent = get_weather_agent()
-
-    # Core agent example queries
-    core_queries = [
-        "What will be the date 45 days from today?",
-        "Analyze this paragraph: I am very happy with the excellent service.",
-        "What is (234 * 12) + 98?"
-    ]
-
-    for query in core_queries:
+    log_startup_banner()
+
+    for query in CORE_QUERIES:
         print("\nUser:", query)
+        # Pure arithmetic/date queries are answered locally, as in the memory-enabled entry points
+        fast_answer = fast_path_router.route(query)
+        if fast_answer is not None:
+            print("--- Core Agent Response (fast path) ---")
+            print(fast_answer)
+            continue
+
         # Wrap as HumanMessage
-        response = core_agent.invoke({
+        response = get_agent("core").invoke({
             "messages": [HumanMessage(content=query)]
         })
 
@@ -56,10 +79,9 @@ def main():
             print(response)
 
     # Weather agent example
-    weather_query = "What is today's weather in Chandigarh and suggest clothing accordingly?"
-    print("\nUser:", weather_query)
-    weather_response = weather_agent.invoke({
-        "messages": [HumanMessage(content=weather_query)]
+    print("\nUser:", WEATHER_QUERY)
+    weather_response = get_agent("weather").invoke({
+        "messages": [HumanMessage(content=WEATHER_QUERY)]
     })
 
     print("\n--- Weather Agent Response ---")
@@ -69,6 +91,113 @@ def main():
         # fallback if messages key is missing
         print(weather_response)
 
+    _log_cache_stats()
+
+
+async def main_concurrent():
+    """
+    Summary:
+        Runs every example query at the same time through the async memory-enabled
+        entry points, then prints the responses in query order. A failed or timed-out
+        query is reported without affecting the others.
+
+    Returns:
+        None
+            Prints agent responses directly to the console.
+    """
+    from agents.core_agent import ainvoke_core_agent_with_memory
+    from agents.weather_agent import ainvoke_weather_agent_with_memory
+    from cred import USER_ID
+
+    log_startup_banner()
+
+    jobs = [(query, ainvoke_core_agent_with_memory, "Core") for query in CORE_QUERIES]
+    jobs.append((WEATHER_QUERY, ainvoke_weather_agent_with_memory, "Weather"))
+
+    started = time.perf_counter()
+    responses = await asyncio.gather(
+        *(invoke({"messages": [HumanMessage(content=query)]}, user_id=USER_ID) for query, invoke, _ in jobs),
+        return_exceptions=True,
+    )
+    elapsed = time.perf_counter() - started
+
+    for (query, _, agent_name), response in zip(jobs, responses):
+        print("\nUser:", query)
+        print(f"--- {agent_name} Agent Response ---")
+        if isinstance(response, BaseException):
+            print(f"Error: {type(response).__name__}: {response}")
+        else:
+            print(response["messages"][-1].content)
+
+    print(f"\n{len(jobs)} queries completed concurrently in {elapsed:.2f}s")
+    _log_cache_stats()
+
+
+def main_stream():
+    """
+    Summary:
+        Runs the example queries through the streaming memory-enabled entry points,
+        printing tool activity and answer tokens as soon as they are produced.
+
+    Returns:
+        None
+            Prints streamed output directly to the console.
+    """
+    from agents.core_agent import stream_core_agent_with_memory
+    from agents.weather_agent import stream_weather_agent_with_memory
+    from cred import USER_ID
+
+    log_startup_banner()
+
+    jobs = [(query, stream_core_agent_with_memory, "Core") for query in CORE_QUERIES]
+    jobs.append((WEATHER_QUERY, stream_weather_agent_with_memory, "Weather"))
+
+    for query, stream, agent_name in jobs:
+        print("\nUser:", query)
+        print(f"--- {agent_name} Agent Response ---")
+        started = time.perf_counter()
+        first_token = None
+        for event in stream({"messages": [HumanMessage(content=query)]}, user_id=USER_ID):
+            if event["type"] == "token":
+                if first_token is None:
+                    first_token = time.perf_counter() - started
+                print(event["content"], end="", flush=True)
+            elif event["type"] == "tool_call":
+                print(f"[calling {event['name']}({event['args']})]", flush=True)
+            elif event["type"] == "tool_result":
+                print(f"[{event['name']} -> {event['content']}]", flush=True)
+        print()
+        if first_token is not None:
+            app_logger.info(f"First token after {first_token:.2f}s, done after {time.perf_counter() - started:.2f}s")
+
+    _log_cache_stats()
+
+
+def _log_cache_stats():
+    llm_cache = get_llm_cache()
+    if llm_cache is not None:
+        app_logger.info(f"LLM cache stats: {llm_cache.stats()}")
+    for stage, stats in stage_summary().items():
+        app_logger.info(
+            f"Stage {stage}: n={stats['count']} p50={stats['p50_ms']:.1f}ms p99={stats['p99_ms']:.1f}ms"
+            f" errors={stats['errors']}"
+        )
+
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Run the example agent queries.")
+    parser.add_argument(
+        "--concurrent", action="store_true",
+        help="run all example queries concurrently through the async entry points",
+    )
+    parser.add_argument(
+        "--stream", action="store_true",
+        help="stream tool calls and answer tokens as they are produced",
+    )
+    args = parser.parse_args()
+    if args.concurrent:
+        asyncio.run(main_concurrent())
+    elif args.stream:
+        main_stream()
+    else:
+        main()
@@ -5,6 +5,7 @@
 # This module defines:
 #   - system_prompt: Core system message for multi-tool reasoning
 #   - weather_system_prompt: Specialized system message for weather queries
+#   - CORE_AGENT_SYSTEM_PROMPT / WEATHER_AGENT_USER_PROMPT: Names the agents import
 #   - user_query_1: Test query for math calculations
 #   - user_query_2: Test query for multi-tool usage (math + date)
 #   - user_query_3: Test query for weather API and recommendations
@@ -19,7 +20,7 @@
 #   - Responses must be human-friendly and concise
 #   - Weather-based recommendations follow clear temperature thresholds
 
-from langchain.messages import SystemMessage, HumanMessage
+from langchain_core.messages import SystemMessage, HumanMessage
 
 # -----------------------
 # CORE SYSTEM PROMPT
@@ -41,7 +42,19 @@ You are an intelligent production-grade assistant powered by LangChain with acce
    - Purpose: Analyze text for word count, character count, sentiment
    - Input: Text string
    - Output: {word_count, character_count, sentiment}
-4. Weather API Tool
+4. Batch Math Tool
+   - Purpose: Evaluate one formula over many inputs at once
+   - Input: Expression with variable names + a list of values per variable
+   - Output: {count, results, total, min, max}
+5. Text File Analyzer Tool
+   - Purpose: Same analysis as the Text Analyzer Tool for large files such as call transcripts
+   - Input: File name in the transcripts directory
+   - Output: {word_count, character_count, sentiment}
+6. Batch Text Analyzer Tool
+   - Purpose: Analyze many texts at once (e.g. reviews) with per-text results and totals
+   - Input: List of text strings
+   - Output: {results, totals}
+7. Weather API Tool
    - Purpose: Fetch real-time weather
    - Input: Location
    - Output: {temperature, feels_like, description, wind, humidity, precipitation}
@@ -49,6 +62,7 @@ You are an intelligent production-grade assistant powered by LangChain with acce
 ## DOs
 - Always analyze query to select appropriate tool(s)
 - Use multiple tools sequentially if needed
+- Use the Batch Math Tool once, rather than the Math Tool repeatedly, when one formula applies to many values
 - Validate inputs before calling any tool
 - Present results in clear, human-friendly language
 - Explain reasoning and provide actionable insights
@@ -81,9 +95,13 @@ You are a specialized weather assistant. Your task is to fetch live weather data
 - Weather API Tool
   - Purpose: Fetch real-time weather for a given location
   - Output: {temperature, feels_like, description, wind, humidity, precipitation}
+- Multi-City Weather Tool
+  - Purpose: Fetch real-time weather for several locations in one call
+  - Output: {results: [{city, temperature, description, clothing}]}
 
 ## DOs
 - Always fetch live data using the weather tool
+- Use the multi-city tool once when the query mentions more than one location
 - Provide clothing suggestions based on temperature:
   - >25°C: Light clothes
   - 15–25°C: Moderate clothes
@@ -106,6 +124,10 @@ You are a specialized weather assistant. Your task is to fetch live weather data
 3. Provide final recommendation: clothing, umbrella, or other practical advice
 """)
 
+# Names used by the agent modules
+CORE_AGENT_SYSTEM_PROMPT = system_prompt
+WEATHER_AGENT_USER_PROMPT = weather_system_prompt
+
 # -----------------------
 # USER QUERIES (TEST)
 # -----------------------
@@ -0,0 +1,537 @@
+# resilience.py
+# -------------
+# Shared admission control and failure handling for the external backends
+# (Gemini and OpenWeatherMap).
+#
+# This module defines:
+#   - priority_lane / current_lane: Context-local traffic class (INTERACTIVE or BATCH).
+#   - TokenBucket / RateLimiter: Requests-per-second plus tokens-per-minute buckets with
+#                                priority lanes; interactive callers are always served
+#                                before waiting batch callers.
+#   - CircuitBreaker: Fails fast while a backend keeps failing, then lets a single
+#                     trial call through to probe recovery.
+#   - is_retryable / BackendGuard: Jittered exponential backoff on 429, 5xx and
+#                     transport errors, combined with the limiter and breaker.
+#   - GuardRateLimiter: Adapter plugging a BackendGuard into a LangChain chat model,
+#                       so only real API calls (not LLM cache hits) are throttled.
+#   - gemini_guard / weather_guard: The shared per-backend guards.
+#
+# Purpose:
+#   Under bursty traffic both agents and weather_tool used to hit quota errors,
+#   which surfaced as "Weather Error" strings or exceptions. Throttling every caller
+#   through one scheduler per backend keeps throughput at the quota ceiling instead
+#   of producing retry storms, and the breaker stops piling requests onto a backend
+#   that is down.
+
+import asyncio
+import heapq
+import itertools
+import os
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple
+
+import httpx
+import requests
+from langchain_core.rate_limiters import BaseRateLimiter
+from logger_config import setup_logger
+
+logger = setup_logger(__name__)
+
+# -----------------------
+# Configuration
+# -----------------------
+GEMINI_RPS = float(os.getenv("GEMINI_RPS", "5"))
+GEMINI_BURST = int(os.getenv("GEMINI_BURST", "5"))
+GEMINI_TPM = int(os.getenv("GEMINI_TPM", "1000000"))
+WEATHER_RPS = float(os.getenv("WEATHER_RPS", "1"))
+WEATHER_BURST = int(os.getenv("WEATHER_BURST", "10"))
+
+# Seconds a caller may wait for quota before RateLimitTimeout
+RATE_LIMIT_MAX_WAIT = float(os.getenv("RATE_LIMIT_MAX_WAIT", "30"))
+RETRY_MAX_ATTEMPTS = int(os.getenv("RETRY_MAX_ATTEMPTS", "4"))
+RETRY_BASE_DELAY = float(os.getenv("RETRY_BASE_DELAY", "0.5"))
+RETRY_MAX_DELAY = float(os.getenv("RETRY_MAX_DELAY", "20"))
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5"))
+BREAKER_RESET_TIMEOUT = float(os.getenv("BREAKER_RESET_TIMEOUT", "30"))
+
+# Lower value = served first
+INTERACTIVE = 0
+BATCH = 1
+_LANE_NAMES = {INTERACTIVE: "interactive", BATCH: "batch"}
+
+_RETRYABLE_STATUS = {408, 425, 429, 500, 502, 503, 504}
+# Errors wrapped by SDKs often only carry the status in their message
+_RETRYABLE_MESSAGE = re.compile(r"\b(429|500|502|503|504)\b|RESOURCE_EXHAUSTED|UNAVAILABLE|DEADLINE_EXCEEDED")
+_ASYNC_POLL_INTERVAL = 0.01
+
+_lane: ContextVar[int] = ContextVar("priority_lane", default=INTERACTIVE)
+
+
+class RateLimitTimeout(RuntimeError):
+    """Raised when quota does not become available within the caller's wait limit."""
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling a backend whose circuit breaker is open."""
+
+
+# -----------------------
+# Priority lanes
+# -----------------------
+@contextmanager
+def priority_lane(lane: int) -> Iterator[None]:
+    """Runs the enclosed calls (and tool threads started from them) in the given lane."""
+    token = _lane.set(lane)
+    try:
+        yield
+    finally:
+        _lane.reset(token)
+
+
+def current_lane() -> int:
+    return _lane.get()
+
+
+# -----------------------
+# Rate limiting
+# -----------------------
+class TokenBucket:
+    """
+    Summary:
+        Continuously refilling bucket. Not thread-safe; RateLimiter guards it.
+
+    Args:
+        rate (float): Units added per second.
+        capacity (float): Maximum stored units (the burst size).
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.level = capacity
+        self.updated = time.monotonic()
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until ``amount`` units are available (0 if they are now)."""
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+        amount = min(amount, self.capacity)
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+    def take(self, amount: float) -> None:
+        # May go negative: usage reported after the fact is paid back before new grants
+        self.level -= amount
+
+
+class RateLimiter:
+    """
+    Summary:
+        Grants calls within a requests-per-second and an optional tokens-per-minute
+        budget. Waiting callers are served by lane, then arrival order, so batch
+        traffic never delays an interactive request that is waiting.
+
+    Args:
+        rps (float): Sustained requests per second.
+        burst (int): Requests that may be made back to back after an idle period.
+        tpm (int): Tokens per minute; None or 0 disables token accounting.
+    """
+
+    def __init__(self, rps: float, burst: int = 1, tpm: Optional[int] = None):
+        self._requests = TokenBucket(rps, max(burst, 1))
+        self._tokens = TokenBucket(tpm / 60.0, tpm) if tpm else None
+        self._cond = threading.Condition()
+        self._waiters: List[Tuple[int, int]] = []
+        self._seq = itertools.count()
+        self._granted = {INTERACTIVE: 0, BATCH: 0}
+        self._timeouts = 0
+        self._wait_seconds = 0.0
+
+    def acquire(self, tokens: int = 0, lane: Optional[int] = None, timeout: float = RATE_LIMIT_MAX_WAIT) -> None:
+        """
+        Summary:
+            Blocks until one request (and ``tokens`` tokens) may be spent.
+
+        Raises:
+            RateLimitTimeout: If quota is not available within ``timeout`` seconds.
+        """
+        ticket = (current_lane() if lane is None else lane, next(self._seq))
+        started = time.monotonic()
+        with self._cond:
+            heapq.heappush(self._waiters, ticket)
+            try:
+                while True:
+                    wait = self._poll(ticket, tokens)
+                    if wait == 0:
+                        self._wait_seconds += time.monotonic() - started
+                        return
+                    remaining = started + timeout - time.monotonic()
+                    if remaining <= 0:
+                        self._timeouts += 1
+                        raise RateLimitTimeout(f"no quota available within {timeout}s")
+                    self._cond.wait(remaining if wait is None else min(wait, remaining))
+            except BaseException:
+                self._abandon(ticket)
+                raise
+
+    async def aacquire(self, tokens: int = 0, lane: Optional[int] = None, timeout: float = RATE_LIMIT_MAX_WAIT) -> None:
+        """Async acquire: waits with asyncio.sleep so the event loop keeps running."""
+        ticket = (current_lane() if lane is None else lane, next(self._seq))
+        started = time.monotonic()
+        with self._cond:
+            heapq.heappush(self._waiters, ticket)
+        try:
+            while True:
+                with self._cond:
+                    wait = self._poll(ticket, tokens)
+                    if wait == 0:
+                        self._wait_seconds += time.monotonic() - started
+                        return
+                    remaining = started + timeout - time.monotonic()
+                    if remaining <= 0:
+                        self._timeouts += 1
+                        raise RateLimitTimeout(f"no quota available within {timeout}s")
+                await asyncio.sleep(min(wait or _ASYNC_POLL_INTERVAL, remaining))
+        except BaseException:
+            with self._cond:
+                self._abandon(ticket)
+            raise
+
+    def adjust_tokens(self, tokens: int) -> None:
+        """Charges (positive) or refunds (negative) tokens once actual usage is known."""
+        if self._tokens is None or not tokens:
+            return
+        with self._cond:
+            self._tokens.take(tokens)
+            self._cond.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns grants per lane, current waiters, timeouts and total seconds spent waiting."""
+        with self._cond:
+            waiting = {name: 0 for name in _LANE_NAMES.values()}
+            for lane, _ in self._waiters:
+                waiting[_LANE_NAMES.get(lane, str(lane))] += 1
+            return {
+                "granted": {_LANE_NAMES[lane]: count for lane, count in self._granted.items()},
+                "waiting": waiting,
+                "timeouts": self._timeouts,
+                "wait_seconds": round(self._wait_seconds, 3),
+            }
+
+    def _poll(self, ticket: Tuple[int, int], tokens: int) -> Optional[float]:
+        # Caller holds self._cond. Returns 0 when granted, seconds to wait when this
+        # ticket is next in line, or None while someone ahead of it is waiting.
+        if self._waiters[0] != ticket:
+            return None
+        now = time.monotonic()
+        wait = self._requests.wait_time(1, now)
+        if self._tokens is not None and tokens:
+            wait = max(wait, self._tokens.wait_time(tokens, now))
+        if wait > 0:
+            return wait
+        self._requests.take(1)
+        if self._tokens is not None and tokens:
+            self._tokens.take(tokens)
+        heapq.heappop(self._waiters)
+        self._granted[ticket[0]] = self._granted.get(ticket[0], 0) + 1
+        self._cond.notify_all()
+        return 0
+
+    def _abandon(self, ticket: Tuple[int, int]) -> None:
+        if ticket in self._waiters:
+            self._waiters.remove(ticket)
+            heapq.heapify(self._waiters)
+            self._cond.notify_all()
+
+
+# -----------------------
+# Circuit breaker
+# -----------------------
+class CircuitBreaker:
+    """
+    Summary:
+        Opens after ``failure_threshold`` consecutive failures, rejects calls for
+        ``reset_timeout`` seconds, then admits one trial call; its outcome closes
+        the circuit or opens it again.
+
+    Args:
+        name (str): Backend name used in errors and logs.
+        failure_threshold (int): Consecutive failures that open the circuit.
+        reset_timeout (float): Seconds to stay open before the trial call.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+                 reset_timeout: float = BREAKER_RESET_TIMEOUT):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._trial_started = 0.0
+        self._rejected = 0
+
+    def check(self) -> None:
+        """Cheap pre-check before waiting for quota: raises while the circuit is open."""
+        with self._lock:
+            if self._state == "open":
+                retry_in = self._opened_at + self.reset_timeout - time.monotonic()
+                if retry_in > 0:
+                    self._rejected += 1
+                    raise CircuitOpenError(f"{self.name} is unavailable; retry in {retry_in:.0f}s")
+
+    def before_call(self) -> None:
+        """
+        Raises:
+            CircuitOpenError: While the circuit is open or a trial call is in flight.
+        """
+        with self._lock:
+            if self._state == "closed":
+                return
+            if self._state == "open":
+                retry_in = self._opened_at + self.reset_timeout - time.monotonic()
+                if retry_in > 0:
+                    self._rejected += 1
+                    raise CircuitOpenError(f"{self.name} is unavailable; retry in {retry_in:.0f}s")
+                self._state = "half_open"
+            # A trial whose outcome was never reported expires after reset_timeout
+            if self._trial_in_flight and time.monotonic() - self._trial_started < self.reset_timeout:
+                self._rejected += 1
+                raise CircuitOpenError(f"{self.name} is recovering; retry shortly")
+            self._trial_in_flight = True
+            self._trial_started = time.monotonic()
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._state != "closed":
+                logger.info(f"Circuit for {self.name} closed")
+            self._state = "closed"
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._state == "half_open" or self._failures >= self.failure_threshold:
+                if self._state != "open":
+                    logger.warning(f"Circuit for {self.name} opened after {self._failures} failures")
+                self._state = "open"
+                self._opened_at = time.monotonic()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"state": self._state, "consecutive_failures": self._failures, "rejected": self._rejected}
+
+
+# -----------------------
+# Retry classification
+# -----------------------
+def status_code_of(error: BaseException) -> Optional[int]:
+    """HTTP status carried by an exception from requests, httpx or an SDK, if any."""
+    for candidate in (
+        getattr(getattr(error, "response", None), "status_code", None),
+        getattr(error, "status_code", None),
+        getattr(error, "code", None),
+    ):
+        if isinstance(candidate, int):
+            return candidate
+    return None
+
+
+def is_retryable(error: BaseException) -> bool:
+    """True for rate limiting (429), server errors (5xx), timeouts and connection failures."""
+    if isinstance(error, (RateLimitTimeout, CircuitOpenError)):
+        return False
+    if isinstance(error, (requests.ConnectionError, requests.Timeout, httpx.TransportError,
+                          ConnectionError, TimeoutError)):
+        return True
+    status = status_code_of(error)
+    if status is not None:
+        return status in _RETRYABLE_STATUS
+    return bool(_RETRYABLE_MESSAGE.search(str(error)))
+
+
+def retry_after_of(error: BaseException) -> Optional[float]:
+    """Seconds from a Retry-After response header, if the error carries one."""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+
+class BackendGuard:
+    """
+    Summary:
+        Rate limiter + circuit breaker + jittered retries for one backend.
+
+    Args:
+        name (str): Backend name for logs and stats.
+        limiter (RateLimiter): Shared quota scheduler for the backend.
+        breaker (CircuitBreaker): Shared breaker for the backend.
+        max_attempts (int): Attempts per call, including the first.
+        base_delay (float): Backoff base in seconds (doubled per attempt, full jitter).
+        max_delay (float): Upper bound for a single backoff.
+    """
+
+    def __init__(self, name: str, limiter: RateLimiter, breaker: CircuitBreaker,
+                 max_attempts: int = RETRY_MAX_ATTEMPTS, base_delay: float = RETRY_BASE_DELAY,
+                 max_delay: float = RETRY_MAX_DELAY):
+        self.name = name
+        self.limiter = limiter
+        self.breaker = breaker
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._lock = threading.Lock()
+        self._calls = 0
+        self._retries = 0
+        self._failures = 0
+
+    def retry_delay(self, attempt: int, error: BaseException) -> float:
+        """Full-jitter exponential backoff, raised to the server's Retry-After if given."""
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** (attempt - 1))))
+        retry_after = retry_after_of(error)
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.max_delay))
+        return delay
+
+    def record(self, error: Optional[BaseException]) -> None:
+        """Feeds one real backend call's outcome to the breaker and counters."""
+        if isinstance(error, (RateLimitTimeout, CircuitOpenError)):
+            # Rejected locally before reaching the backend: says nothing about its health
+            return
+        with self._lock:
+            self._calls += 1
+            if error is not None and is_retryable(error):
+                self._failures += 1
+        # Non-retryable errors (400, 404, ...) prove the backend is up
+        if error is not None and is_retryable(error):
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+
+    def should_retry(self, attempt: int, error: BaseException) -> bool:
+        if attempt >= self.max_attempts or not is_retryable(error):
+            return False
+        with self._lock:
+            self._retries += 1
+        return True
+
+    def call(self, fn: Callable[..., Any], *args, tokens: int = 0, **kwargs) -> Any:
+        """Calls ``fn`` under the limiter and breaker, retrying retryable failures."""
+        for attempt in itertools.count(1):
+            self.breaker.check()
+            self.limiter.acquire(tokens)
+            self.breaker.before_call()
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                self.record(e)
+                if not self.should_retry(attempt, e):
+                    raise
+                delay = self.retry_delay(attempt, e)
+                logger.warning(f"{self.name} call failed (attempt {attempt}), retrying in {delay:.2f}s: {e}")
+                time.sleep(delay)
+                continue
+            self.record(None)
+            return result
+
+    async def acall(self, fn: Callable[..., Awaitable[Any]], *args, tokens: int = 0, **kwargs) -> Any:
+        """Async call(): awaits quota and backoff without blocking the event loop."""
+        for attempt in itertools.count(1):
+            self.breaker.check()
+            await self.limiter.aacquire(tokens)
+            self.breaker.before_call()
+            try:
+                result = await fn(*args, **kwargs)
+            except Exception as e:
+                self.record(e)
+                if not self.should_retry(attempt, e):
+                    raise
+                delay = self.retry_delay(attempt, e)
+                logger.warning(f"{self.name} call failed (attempt {attempt}), retrying in {delay:.2f}s: {e}")
+                await asyncio.sleep(delay)
+                continue
+            self.record(None)
+            return result
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns call/retry/failure counters plus limiter and breaker stats."""
+        with self._lock:
+            counters = {"calls": self._calls, "retries": self._retries, "failures": self._failures}
+        return {**counters, "limiter": self.limiter.stats(), "breaker": self.breaker.stats()}
+
+
+# -----------------------
+# LangChain model integration
+# -----------------------
+# Set by the model middleware around one model call: estimated tokens to reserve,
+# and whether a real API request was made (cache hits never reach the rate limiter).
+model_call_state: ContextVar[Optional[Dict[str, int]]] = ContextVar("model_call_state", default=None)
+
+
+class GuardRateLimiter(BaseRateLimiter):
+    """
+    Summary:
+        LangChain rate limiter backed by a BackendGuard. Chat models consult it
+        after the LLM cache lookup, so only real API requests use quota or are
+        stopped by an open circuit.
+
+    Args:
+        guard (BackendGuard): The backend's shared guard.
+    """
+
+    def __init__(self, guard: "BackendGuard"):
+        self.guard = guard
+
+    def _reserve(self) -> int:
+        state = model_call_state.get()
+        if state is None:
+            return 0
+        state["calls"] = state.get("calls", 0) + 1
+        return state.get("tokens", 0)
+
+    def acquire(self, *, blocking: bool = True) -> bool:
+        self.guard.breaker.check()
+        try:
+            self.guard.limiter.acquire(self._reserve(), timeout=RATE_LIMIT_MAX_WAIT if blocking else 0)
+        except RateLimitTimeout:
+            if blocking:
+                raise
+            return False
+        self.guard.breaker.before_call()
+        return True
+
+    async def aacquire(self, *, blocking: bool = True) -> bool:
+        self.guard.breaker.check()
+        try:
+            await self.guard.limiter.aacquire(self._reserve(), timeout=RATE_LIMIT_MAX_WAIT if blocking else 0)
+        except RateLimitTimeout:
+            if blocking:
+                raise
+            return False
+        self.guard.breaker.before_call()
+        return True
+
+
+# -----------------------
+# Shared guards
+# -----------------------
+gemini_guard = BackendGuard(
+    "gemini",
+    RateLimiter(GEMINI_RPS, GEMINI_BURST, GEMINI_TPM),
+    CircuitBreaker("gemini"),
+)
+weather_guard = BackendGuard(
+    "openweathermap",
+    RateLimiter(WEATHER_RPS, WEATHER_BURST),
+    CircuitBreaker("openweathermap"),
+)
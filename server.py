@@ -0,0 +1,465 @@
+# server.py
+# ---------
+# Long-running HTTP entry point for the Core and Weather agents.
+#
+# This module defines:
+#   - AdmissionController: Concurrency cap plus a bounded wait queue; requests
+#                          beyond the queue are rejected immediately (HTTP 503).
+#   - AgentServer: ThreadingHTTPServer that runs agent turns on one shared event
+#                  loop through the async memory-enabled entry points.
+#   - main: CLI entry point (python server.py) with graceful drain on SIGINT/SIGTERM.
+#
+# Endpoints:
+#   POST /v1/agents/{core|weather}/invoke
+#        {"user_id": "alice", "message": "...", "history": [{"role": "user"|"assistant", "content": "..."}],
+#         "stream": false, "priority": "interactive"|"batch"}
+#        -> {"user_id": ..., "agent": ..., "answer": ...}
+#        With "stream": true the response is NDJSON, one agents/streaming.py event per line.
+#   GET  /healthz   liveness (503 while draining)
+#   GET  /stats     admission, fast-path, LLM cache, memory queue and backend guard counters,
+#                   plus p50/p99 latency per traced stage
+#   GET  /metrics   per-stage latency histograms, tokens and cache hits (Prometheus text)
+#
+# Purpose:
+#   main.py runs a fixed list of queries once for one hard-coded USER_ID. The server
+#   takes user_id per request, builds agents and clients once at startup, and keeps
+#   latency bounded under load by queueing a limited number of requests and
+#   rejecting the rest instead of letting every request slow down together.
+
+import argparse
+import asyncio
+import json
+import os
+import queue
+import signal
+import threading
+import time
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+from langchain_core.messages import AIMessage, HumanMessage
+from logger_config import log_startup_banner, setup_logger
+from resilience import BATCH, INTERACTIVE, priority_lane
+from tracing import render_prometheus, stage_summary
+
+logger = setup_logger(__name__)
+
+# -----------------------
+# Server configuration
+# -----------------------
+SERVER_HOST = os.getenv("SERVER_HOST", "127.0.0.1")
+SERVER_PORT = int(os.getenv("SERVER_PORT", "8000"))
+# Agent turns executing at the same time
+SERVER_MAX_CONCURRENCY = int(os.getenv("SERVER_MAX_CONCURRENCY", "16"))
+# Requests allowed to wait for a slot; further requests get 503 immediately
+SERVER_MAX_QUEUE = int(os.getenv("SERVER_MAX_QUEUE", "64"))
+# Seconds a queued request waits for a slot before it gets 503
+SERVER_QUEUE_TIMEOUT = float(os.getenv("SERVER_QUEUE_TIMEOUT", "10"))
+# Seconds an admitted agent turn may run before it is cancelled (504)
+SERVER_REQUEST_TIMEOUT = float(os.getenv("SERVER_REQUEST_TIMEOUT", "60"))
+# Seconds to wait for in-flight requests on shutdown
+SERVER_DRAIN_TIMEOUT = float(os.getenv("SERVER_DRAIN_TIMEOUT", "30"))
+SERVER_MAX_BODY_BYTES = int(os.getenv("SERVER_MAX_BODY_BYTES", "1048576"))
+
+AGENT_NAMES = ("core", "weather")
+PRIORITY_LANES = {"interactive": INTERACTIVE, "batch": BATCH}
+
+
+class Overloaded(Exception):
+    """Raised when a request cannot be admitted (queue full, queue timeout or draining)."""
+
+
+class AdmissionController:
+    """
+    Summary:
+        Limits concurrent agent turns and the number of requests waiting for one.
+
+    Args:
+        max_concurrency (int): Turns allowed to run at once.
+        max_queue (int): Requests allowed to wait; more are rejected immediately.
+    """
+
+    def __init__(self, max_concurrency: int = SERVER_MAX_CONCURRENCY, max_queue: int = SERVER_MAX_QUEUE):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self._cond = threading.Condition()
+        self._active = 0
+        self._waiting = 0
+        self._draining = False
+        self._admitted = 0
+        self._rejected = 0
+
+    def acquire(self, timeout: float = SERVER_QUEUE_TIMEOUT) -> None:
+        """
+        Summary:
+            Blocks until a slot is free.
+
+        Raises:
+            Overloaded: If draining, the wait queue is full, or no slot frees up in time.
+        """
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            if self._draining:
+                self._rejected += 1
+                raise Overloaded("server is shutting down")
+            if self._active >= self.max_concurrency and self._waiting >= self.max_queue:
+                self._rejected += 1
+                raise Overloaded("request queue is full")
+            self._waiting += 1
+            try:
+                while self._active >= self.max_concurrency or self._draining:
+                    remaining = deadline - time.monotonic()
+                    if self._draining or remaining <= 0:
+                        self._rejected += 1
+                        raise Overloaded("timed out waiting for a free worker")
+                    self._cond.wait(remaining)
+            finally:
+                self._waiting -= 1
+            self._active += 1
+            self._admitted += 1
+
+    def release(self) -> None:
+        with self._cond:
+            self._active -= 1
+            self._cond.notify_all()
+
+    def drain(self, timeout: float = SERVER_DRAIN_TIMEOUT) -> bool:
+        """Rejects new requests and waits for admitted ones; True if all finished in time."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            self._draining = True
+            self._cond.notify_all()
+            while self._active or self._waiting:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            return True
+
+    @property
+    def draining(self) -> bool:
+        with self._cond:
+            return self._draining
+
+    def stats(self) -> Dict[str, int]:
+        """Returns in-flight, queued, admitted and rejected counts."""
+        with self._cond:
+            return {
+                "active": self._active,
+                "waiting": self._waiting,
+                "admitted": self._admitted,
+                "rejected": self._rejected,
+                "max_concurrency": self.max_concurrency,
+                "max_queue": self.max_queue,
+            }
+
+
+def _to_messages(history: List[Dict[str, str]], message: str) -> List[Any]:
+    if not isinstance(history, list):
+        raise ValueError("history must be a list")
+    messages = []
+    for item in history:
+        role, content = (item.get("role"), item.get("content")) if isinstance(item, dict) else (None, None)
+        if not isinstance(content, str) or role not in ("user", "assistant"):
+            raise ValueError("history items must be {'role': 'user'|'assistant', 'content': str}")
+        messages.append(HumanMessage(content=content) if role == "user" else AIMessage(content=content))
+    messages.append(HumanMessage(content=message))
+    return messages
+
+
+class AgentServer(ThreadingHTTPServer):
+    """
+    Summary:
+        HTTP server owning the admission controller and the event loop agent turns
+        run on. Handler threads only parse requests and wait for results.
+
+    Args:
+        address (tuple): (host, port) to bind.
+        admission (AdmissionController): Concurrency/queue limits.
+        request_timeout (float): Seconds per agent turn before cancellation.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address, admission: AdmissionController = None, request_timeout: float = SERVER_REQUEST_TIMEOUT):
+        super().__init__(address, AgentRequestHandler)
+        self.admission = admission or AdmissionController()
+        self.request_timeout = request_timeout
+        self.loop = asyncio.new_event_loop()
+        self._loop_thread = threading.Thread(target=self.loop.run_forever, name="agent-loop", daemon=True)
+        self._loop_thread.start()
+
+        # Deferred so `import server` stays cheap; agents are built below, once
+        from agents.core_agent import ainvoke_core_agent_with_memory, astream_core_agent_with_memory
+        from agents.weather_agent import ainvoke_weather_agent_with_memory, astream_weather_agent_with_memory
+
+        self.invokers = {"core": ainvoke_core_agent_with_memory, "weather": ainvoke_weather_agent_with_memory}
+        self.streamers = {"core": astream_core_agent_with_memory, "weather": astream_weather_agent_with_memory}
+
+    def warm_up(self) -> None:
+        """Builds both agents (and their model/tool clients) before serving traffic."""
+        from agents.registry import get_agent
+
+        for name in AGENT_NAMES:
+            get_agent(name)
+        logger.info("Agents built: %s", ", ".join(AGENT_NAMES))
+
+    def run_turn(self, agent: str, messages: List[Any], user_id: str, lane: int = INTERACTIVE) -> Dict:
+        """Runs one memory-enabled turn on the event loop, with the request timeout."""
+        async def turn():
+            # Backend quota goes to interactive turns before batch turns
+            with priority_lane(lane):
+                return await self.invokers[agent](
+                    {"messages": messages}, user_id=user_id, timeout=self.request_timeout
+                )
+
+        return asyncio.run_coroutine_threadsafe(turn(), self.loop).result()
+
+    def stream_turn(self, agent: str, messages: List[Any], user_id: str, lane: int = INTERACTIVE):
+        """
+        Summary:
+            Yields streaming events for one turn. Stops (and cancels the turn) when the
+            request timeout passes or the consumer closes the generator.
+        """
+        events: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue()
+
+        async def pump():
+            try:
+                with priority_lane(lane):
+                    async for event in self.streamers[agent]({"messages": messages}, user_id=user_id):
+                        events.put(event)
+            except Exception as e:
+                logger.error(f"Streaming turn failed: {str(e)}", exc_info=True)
+                events.put({"type": "error", "error": str(e)})
+            finally:
+                events.put(None)
+
+        future = asyncio.run_coroutine_threadsafe(pump(), self.loop)
+        deadline = time.monotonic() + self.request_timeout
+        try:
+            while True:
+                remaining = deadline - time.monotonic()
+                try:
+                    event = events.get(timeout=max(remaining, 0))
+                except queue.Empty:
+                    yield {"type": "error", "error": f"request timed out after {self.request_timeout}s"}
+                    return
+                if event is None:
+                    return
+                yield event
+        finally:
+            future.cancel()
+
+    def shutdown_gracefully(self, drain_timeout: float = SERVER_DRAIN_TIMEOUT) -> None:
+        """Stops accepting work, waits for in-flight turns, flushes memory writes and stops the loop."""
+        logger.info("Draining server")
+        drained = self.admission.drain(drain_timeout)
+        if not drained:
+            logger.warning(f"Drain timed out after {drain_timeout}s with requests still in flight")
+        self.shutdown()
+
+        from agents.memory import memory_write_queue
+
+        memory_write_queue.shutdown()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._loop_thread.join(5)
+        logger.info("Server stopped")
+
+
+class AgentRequestHandler(BaseHTTPRequestHandler):
+    """Parses requests, applies admission control and maps failures to status codes."""
+
+    server: AgentServer
+    protocol_version = "HTTP/1.1"
+
+    # -----------------------
+    # Routing
+    # -----------------------
+    def do_GET(self):
+        if self.path == "/healthz":
+            if self.server.admission.draining:
+                self._send_json(503, {"status": "draining"})
+            else:
+                self._send_json(200, {"status": "ok"})
+        elif self.path == "/stats":
+            self._send_json(200, self._stats())
+        elif self.path == "/metrics":
+            self._send_text(200, render_prometheus(), "text/plain; version=0.0.4; charset=utf-8")
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        parts = self.path.strip("/").split("/")
+        if len(parts) != 4 or parts[:2] != ["v1", "agents"] or parts[3] != "invoke" or parts[2] not in AGENT_NAMES:
+            self._send_json(404, {"error": "not found"})
+            return
+        agent = parts[2]
+
+        try:
+            body = self._read_json()
+            user_id = body.get("user_id")
+            message = body.get("message")
+            if not isinstance(user_id, str) or not user_id.strip():
+                raise ValueError("user_id is required")
+            if not isinstance(message, str) or not message.strip():
+                raise ValueError("message is required")
+            messages = _to_messages(body.get("history") or [], message)
+            priority = body.get("priority", "interactive")
+            lane = PRIORITY_LANES.get(priority) if isinstance(priority, str) else None
+            if lane is None:
+                raise ValueError("priority must be 'interactive' or 'batch'")
+            stream = body.get("stream")
+            if stream is None:
+                stream = False
+            elif not isinstance(stream, bool):
+                raise ValueError("stream must be true or false")
+        except ValueError as e:
+            # close_connection is set when the body was left unread
+            headers = {"Connection": "close"} if self.close_connection else None
+            self._send_json(400, {"error": str(e)}, headers=headers)
+            return
+
+        try:
+            self.server.admission.acquire()
+        except Overloaded as e:
+            logger.warning(f"Rejected {agent} request for user {user_id}: {e}")
+            self._send_json(503, {"error": str(e)}, headers={"Retry-After": "1"})
+            return
+
+        try:
+            if stream:
+                self._stream(agent, messages, user_id, lane)
+                return
+            response = self.server.run_turn(agent, messages, user_id, lane)
+            self._send_json(200, {
+                "user_id": user_id,
+                "agent": agent,
+                "answer": response["messages"][-1].content,
+            })
+        except (asyncio.TimeoutError, FutureTimeoutError):
+            self._send_json(504, {"error": f"request timed out after {self.server.request_timeout}s"})
+        except Exception as e:
+            logger.error(f"Request failed for user {user_id}: {str(e)}", exc_info=True)
+            self._send_json(500, {"error": str(e)})
+        finally:
+            self.server.admission.release()
+
+    # -----------------------
+    # Helpers
+    # -----------------------
+    def _read_json(self) -> Dict[str, Any]:
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length <= 0 or length > SERVER_MAX_BODY_BYTES:
+            # Any body bytes are left unread; on a keep-alive connection they would be
+            # parsed as the next request, so the connection is closed after the 400
+            self.close_connection = True
+            raise ValueError("request body too large" if length > 0 else "request body is required")
+        try:
+            body = json.loads(self.rfile.read(length))
+        except (UnicodeDecodeError, json.JSONDecodeError) as e:
+            raise ValueError(f"invalid JSON: {e}") from None
+        if not isinstance(body, dict):
+            raise ValueError("request body must be a JSON object")
+        return body
+
+    def _stream(self, agent: str, messages: List[Any], user_id: str, lane: int) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        events = self.server.stream_turn(agent, messages, user_id, lane)
+        try:
+            for event in events:
+                line = (json.dumps(event, default=str) + "\n").encode("utf-8")
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(line), line))
+                self.wfile.flush()
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            logger.info(f"Client disconnected during stream for user {user_id}")
+        finally:
+            # Cancels the turn if the client went away mid-stream
+            events.close()
+
+    def _send_json(self, status: int, payload: Dict[str, Any], headers: Dict[str, str] = None) -> None:
+        data = json.dumps(payload, default=str).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_text(self, status: int, text: str, content_type: str) -> None:
+        data = text.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _stats(self) -> Dict[str, Any]:
+        from agents.fast_path import fast_path_router
+        from agents.memory import memory_search_cache, memory_write_queue
+        from agents.memory_profile import user_profiles
+        from llm_cache import get_llm_cache
+        from resilience import gemini_guard, weather_guard
+
+        llm_cache = get_llm_cache()
+        return {
+            "admission": self.server.admission.stats(),
+            "fast_path": fast_path_router.stats(),
+            "memory_search_cache": memory_search_cache.stats(),
+            "memory_write_queue": memory_write_queue.stats(),
+            "memory_profiles": user_profiles.stats(),
+            "llm_cache": llm_cache.stats() if llm_cache is not None else None,
+            "backends": {"gemini": gemini_guard.stats(), "openweathermap": weather_guard.stats()},
+            "stages": stage_summary(),
+        }
+
+    def log_message(self, format: str, *args) -> None:
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+
+def main():
+    """
+    Summary:
+        Builds the agents, serves HTTP until SIGINT/SIGTERM, then drains in-flight
+        requests and pending memory writes before exiting.
+    """
+    parser = argparse.ArgumentParser(description="Serve the Core and Weather agents over HTTP.")
+    parser.add_argument("--host", default=SERVER_HOST)
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    args = parser.parse_args()
+
+    log_startup_banner()
+    server = AgentServer((args.host, args.port))
+    server.warm_up()
+
+    drain_threads = []
+
+    def _stop(signum, frame):
+        if drain_threads:
+            return
+        logger.info(f"Received signal {signum}, shutting down")
+        # shutdown() must not run on the thread executing serve_forever
+        drain_thread = threading.Thread(target=server.shutdown_gracefully, name="drain")
+        drain_threads.append(drain_thread)
+        drain_thread.start()
+
+    signal.signal(signal.SIGINT, _stop)
+    signal.signal(signal.SIGTERM, _stop)
+
+    logger.info(f"Serving agents on http://{args.host}:{args.port}")
+    server.serve_forever()
+    for drain_thread in drain_threads:
+        drain_thread.join()
+    server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+# conftest.py
+# -----------
+# Shared pytest setup. Runtime state (log file, traces, memory stores) goes to a
+# temporary directory so the suite never writes into the working tree, and tracing
+# export is off; every test runs without network access or API keys.
+
+import os
+import tempfile
+
+_STATE_DIR = tempfile.mkdtemp(prefix="agent-tests-")
+
+# Must be set before the project modules are imported: they read these at import time
+os.environ.setdefault("LOG_FILE", os.path.join(_STATE_DIR, "agent_app.log"))
+os.environ.setdefault("LOG_CONSOLE_LEVEL", "WARNING")
+os.environ.setdefault("TRACE_JSONL_PATH", "")
+os.environ.setdefault("MEMORY_PROFILE_PATH", os.path.join(_STATE_DIR, "memory_profiles.sqlite3"))
+os.environ.setdefault("MEMORY_LOCAL_PATH", os.path.join(_STATE_DIR, "memory"))
+os.environ.setdefault("LLM_CACHE_PATH", os.path.join(_STATE_DIR, "llm_cache.sqlite3"))
+
+
+import pytest
+
+
+@pytest.fixture
+def offline_agents():
+    """
+    Both agents wired to the offline fakes from benchmarks/fakes.py (scripted model,
+    stub weather server, in-memory Mem0); agents are rebuilt around the fakes and
+    dropped again afterwards.
+    """
+    from agents.registry import agent_registry
+    from benchmarks.fakes import offline_backends
+
+    agent_registry.reset()
+    try:
+        with offline_backends() as backends:
+            yield backends
+    finally:
+        agent_registry.reset()
@@ -0,0 +1,73 @@
+# Tests for the memory-enabled agent entry points, run against the offline fakes.
+
+import asyncio
+import time
+
+import pytest
+from langchain_core.messages import HumanMessage
+
+from agents.core_agent import ainvoke_core_agent_with_memory, invoke_core_agent_with_memory
+from agents.memory import memory_write_queue
+from agents.weather_agent import ainvoke_weather_agent_with_memory
+
+
+def _ask(text):
+    return {"messages": [HumanMessage(content=text)]}
+
+
+def test_sync_turn_uses_tools_and_saves_memory(offline_agents):
+    response = invoke_core_agent_with_memory(_ask("Total for 3 items priced at 499 each: 3 * 499"), user_id="sync-user")
+    assert "1497" in response["messages"][-1].content
+
+    memory_write_queue.flush(timeout=5)
+    assert offline_agents["mem0"].calls["add"] == 1
+
+
+def test_async_turns_run_concurrently(offline_agents):
+    offline_agents["model"].latency = 0.2
+
+    async def main():
+        return await asyncio.gather(*(
+            ainvoke_core_agent_with_memory(_ask(f"Please work out {i} * 7 and then explain"), user_id=f"user-{i}")
+            for i in range(5)
+        ))
+
+    started = time.perf_counter()
+    responses = asyncio.run(main())
+    # Two model calls per turn: five turns in sequence would take at least 2s
+    assert time.perf_counter() - started < 1.5
+    assert [str(i * 7) in r["messages"][-1].content for i, r in enumerate(responses)] == [True] * 5
+
+
+def test_async_fast_path_skips_the_model(offline_agents):
+    offline_agents["model"].latency = 5
+    response = asyncio.run(ainvoke_core_agent_with_memory(_ask("What is 2 + 2?"), user_id="fast-user", timeout=1))
+    assert response["messages"][-1].response_metadata["fast_path"] is True
+
+
+def test_async_turn_times_out(offline_agents):
+    offline_agents["model"].latency = 1
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(ainvoke_core_agent_with_memory(_ask("Please work out 6 * 7 for me"), user_id="slow", timeout=0.05))
+
+
+def test_async_weather_turn_reports_each_city(offline_agents):
+    response = asyncio.run(ainvoke_weather_agent_with_memory(
+        _ask("What is the weather in Delhi and the weather in Atlantis?"), user_id="weather-user"
+    ))
+    answer = response["messages"][-1].content
+    assert "Delhi:" in answer and "Weather Error" in answer and "Atlantis" in answer
+
+
+def test_async_fast_path_does_not_search_memories(offline_agents, monkeypatch):
+    import agents.core_agent as core_module
+    import agents.memory as memory_module
+
+    searched = []
+    monkeypatch.setattr(memory_module, "MEMORY_SEARCH_MODE", "always")
+    monkeypatch.setattr(core_module, "aretrieve_memories", lambda query, user_id: searched.append(query))
+
+    response = asyncio.run(ainvoke_core_agent_with_memory(_ask("What is 2 + 2?"), user_id="fast-user"))
+    assert response["messages"][-1].response_metadata["fast_path"] is True
+    assert searched == []
+    assert offline_agents["mem0"].calls["search"] == 0
@@ -0,0 +1,68 @@
+# Tests for benchmarks/fakes.py: scripted tool planning, stub backends and their wiring.
+
+import json
+import urllib.error
+import urllib.request
+
+import pytest
+
+from langchain_core.messages import HumanMessage, ToolMessage
+
+import client
+import tools.weather_tool as weather_module
+from benchmarks.fakes import InMemoryMem0, ScriptedChatModel, StubWeatherServer, offline_backends, plan_tool_calls
+
+
+def test_plan_tool_calls():
+    assert plan_tool_calls("What is the weather in New York?") == [
+        {"name": "weather_tool", "args": {"city": "New York"}}
+    ]
+    assert plan_tool_calls("What is 2 + 3 and the date in 5 days?") == [
+        {"name": "date_utility", "args": {"days": 5}},
+        {"name": "math_calculator", "args": {"expression": "2 + 3"}},
+    ]
+    assert plan_tool_calls("Analyze this: I love it")[0]["name"] == "text_analyzer"
+    assert plan_tool_calls("hello there") == []
+
+
+def test_scripted_model_calls_tools_then_answers():
+    model = ScriptedChatModel()
+    first = model.invoke([HumanMessage(content="What is 2 + 3?")])
+    assert [call["name"] for call in first.tool_calls] == ["math_calculator"]
+    second = model.invoke([
+        HumanMessage(content="What is 2 + 3?"), first,
+        ToolMessage(content="5", tool_call_id=first.tool_calls[0]["id"]),
+    ])
+    assert not second.tool_calls
+    assert "5" in second.content
+    assert second.usage_metadata["total_tokens"] > 0
+
+
+def test_in_memory_mem0_ranks_by_overlap():
+    mem0 = InMemoryMem0()
+    mem0.add([{"role": "user", "content": "I live in Paris"}, {"role": "assistant", "content": "ok"}], user_id="u")
+    mem0.add([{"role": "user", "content": "I like tea"}], user_id="u")
+    results = mem0.search("where do I live", filters={"user_id": "u"})["results"]
+    assert results[0]["memory"] == "I live in Paris"
+    assert mem0.search("Paris", filters={"user_id": "other"}) == {"results": []}
+    assert mem0.calls == {"add": 2, "search": 2}
+
+
+def test_stub_weather_server_answers_and_404s():
+    server = StubWeatherServer().start()
+    try:
+        with urllib.request.urlopen(f"{server.url}?q=Paris&appid=x&units=metric") as response:
+            assert json.load(response)["name"] == "Paris"
+        with pytest.raises(urllib.error.HTTPError) as excinfo:
+            urllib.request.urlopen(f"{server.url}?q=Atlantis&appid=x&units=metric")
+        assert excinfo.value.code == 404
+    finally:
+        server.stop()
+
+
+def test_offline_backends_restores_clients():
+    saved_url = weather_module.WEATHER_API_URL
+    with offline_backends() as backends:
+        assert client.get_memory_store() is backends["mem0"]
+        assert weather_module.WEATHER_API_URL == backends["weather_server"].url
+    assert weather_module.WEATHER_API_URL == saved_url
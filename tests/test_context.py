@@ -0,0 +1,59 @@
+# Tests for agents/context.py: fitting memory and history into the token budget.
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+
+from agents.context import ContextBuilder, estimate_tokens
+
+
+def _builder(**kwargs):
+    return ContextBuilder(SystemMessage(content="You are helpful."), **kwargs)
+
+
+def _turn(i, size=400):
+    return [HumanMessage(content=f"question {i} " + "x" * size), AIMessage(content=f"answer {i} " + "y" * size)]
+
+
+def test_estimate_tokens_rounds_up():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("abcde") == 2
+
+
+def test_short_conversation_is_kept_whole():
+    history = _turn(1, 10) + [HumanMessage(content="And now?")]
+    built = _builder().build([SystemMessage(content="caller prompt")] + history, "- Name: Alice")
+
+    assert isinstance(built[0], SystemMessage)
+    assert "- Name: Alice" in built[0].content and "You are helpful." not in built[0].content
+    assert built[1:] == history
+
+
+def test_oldest_turns_are_dropped_and_summarized():
+    history = [m for i in range(10) for m in _turn(i)] + [HumanMessage(content="latest")]
+    builder = _builder(token_budget=800, summary_budget=200)
+    built = builder.build(history)
+
+    assert built[-1].content == "latest"
+    assert "EARLIER CONVERSATION" in built[0].content and "question" in built[0].content
+    kept_history = sum(builder.message_tokens(m) for m in built[1:])
+    assert kept_history <= 800 - builder.static_tokens
+    assert len(built) < len(history)
+
+
+def test_latest_turn_is_kept_even_over_budget():
+    built = _builder(token_budget=10).build([HumanMessage(content="z" * 2000)])
+    assert built[-1].content == "z" * 2000
+
+
+def test_tool_calls_stay_with_their_results():
+    call = AIMessage(content="", tool_calls=[{"id": "c1", "name": "weather_tool", "args": {"city": "Pune"}}])
+    old = [HumanMessage(content="a" * 2000), call, ToolMessage(content="Pune: 30°C", tool_call_id="c1")]
+    built = _builder(token_budget=300, summary_budget=0).build(old + [HumanMessage(content="latest")])
+
+    assert not any(isinstance(m, ToolMessage) for m in built)
+    assert built[1:] == [HumanMessage(content="latest")]
+
+
+def test_memory_keeps_the_most_relevant_lines_that_fit():
+    memory = "\n".join(f"- fact {i} " + "m" * 40 for i in range(20))
+    built = _builder(memory_budget=50).build([HumanMessage(content="hi")], memory)
+    assert "- fact 0" in built[0].content and "- fact 19" not in built[0].content
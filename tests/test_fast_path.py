@@ -0,0 +1,77 @@
+# Tests for agents/fast_path.py: queries answered without the LLM.
+
+from datetime import date, timedelta
+
+import pytest
+
+from agents.fast_path import FastPathRouter
+
+
+@pytest.fixture
+def router():
+    return FastPathRouter(enabled=True)
+
+
+@pytest.mark.parametrize("query, answer", [
+    ("What is (234 * 12) + 98?", "(234 * 12) + 98 = 2906"),
+    ("calculate 3*499", "3*499 = 1497"),
+    ("12.5 % 5", "12.5 % 5 = 2.5"),
+])
+def test_pure_arithmetic_is_answered_locally(router, query, answer):
+    assert router.route(query) == answer
+
+
+def test_date_offsets_are_answered_locally(router):
+    ahead = (date.today() + timedelta(days=45)).isoformat()
+    assert router.route("What will be the date 45 days from today?") == f"The date 45 days from today will be {ahead}."
+    before = (date.today() - timedelta(days=1)).isoformat()
+    assert router.route("1 day ago") == f"The date 1 day ago was {before}."
+
+
+@pytest.mark.parametrize("query", [
+    "What is 42?",                                      # no operator
+    "Calculate total cost for 3 items priced at 499",   # words around the numbers
+    "What is 1/0?",                                     # tool error: the agent explains it
+    "Weather in 7 days in Pune?",
+    "What will be the date 99999999 days from today?",
+    "What is 2024-01-15?",                              # ISO date, not 2024 - 1 - 15
+    "What is 2024-1-15?",
+    "555-123-4567",                                     # phone number
+    "12/25/2024",
+    "007 + 1",                                          # leading zero
+])
+def test_everything_else_falls_through(router, query):
+    assert router.route(query) is None
+
+
+def test_disabled_router_and_hit_rate():
+    router = FastPathRouter(enabled=False)
+    assert router.route("2 + 2") is None
+
+    router = FastPathRouter(enabled=True)
+    router.route("2 + 2")
+    router.route("hello")
+    assert router.stats() == {"queries": 2, "math": 1, "date": 0, "fallthrough": 1, "hit_rate": 0.5}
+
+
+def test_cli_main_uses_the_fast_path(monkeypatch, capsys):
+    import main
+    from langchain_core.messages import AIMessage
+
+    invoked = []
+
+    class _Agent:
+        def __init__(self, name):
+            self.name = name
+
+        def invoke(self, messages):
+            invoked.append((self.name, messages["messages"][-1].content))
+            return {"messages": [AIMessage(content="agent answer")]}
+
+    monkeypatch.setattr(main, "get_agent", _Agent)
+    monkeypatch.setattr(main, "log_startup_banner", lambda: None)
+    main.main()
+
+    assert "(234 * 12) + 98 = 2906" in capsys.readouterr().out
+    assert ("core", "What is (234 * 12) + 98?") not in invoked
+    assert ("core", main.CORE_QUERIES[1]) in invoked
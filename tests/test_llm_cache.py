@@ -0,0 +1,84 @@
+# Tests for llm_cache.py: cache keys, tool-dependent TTLs, eviction and round trips.
+
+import time
+
+from langchain_core.load import dumps
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration
+
+from llm_cache import SQLiteLLMCache, _parse_tool_ttls
+
+_LLM = "gemini-2.5-flash|temperature=0"
+
+
+def _prompt(*messages):
+    return dumps(list(messages))
+
+
+def _answer(text):
+    return [ChatGeneration(message=AIMessage(content=text))]
+
+
+def _tool_turn(tool):
+    return _prompt(
+        HumanMessage(content="What is the weather?"),
+        AIMessage(content="", tool_calls=[{"id": "call-1", "name": tool, "args": {}}]),
+        ToolMessage(content="Delhi: 30°C", tool_call_id="call-1"),
+    )
+
+
+def test_key_depends_on_prompt_and_model_configuration():
+    key = SQLiteLLMCache.make_key("prompt", _LLM)
+    assert key == SQLiteLLMCache.make_key("prompt", _LLM)
+    assert key != SQLiteLLMCache.make_key("prompt", _LLM + "|tools=[weather_tool]")
+    assert key != SQLiteLLMCache.make_key("prompt2", _LLM)
+
+
+def test_round_trip_returns_the_cached_message():
+    cache = SQLiteLLMCache(":memory:", ttl=60)
+    prompt = _prompt(HumanMessage(content="hi"))
+    assert cache.lookup(prompt, _LLM) is None
+    cache.update(prompt, _LLM, _answer("hello"))
+
+    cached = cache.lookup(prompt, _LLM)
+    assert cached[0].message.content == "hello"
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_tool_results_cap_or_disable_the_ttl():
+    cache = SQLiteLLMCache(":memory:", ttl=3600, tool_ttls={"date_utility": 0, "weather_tool": 600})
+    assert cache.tools_used(_tool_turn("weather_tool")) == {"weather_tool"}
+    assert cache.ttl_for(_tool_turn("weather_tool")) == 600
+    assert cache.ttl_for(_tool_turn("math_calculator")) == 3600
+
+    cache.update(_tool_turn("date_utility"), _LLM, _answer("2026-10-19"))
+    assert cache.lookup(_tool_turn("date_utility"), _LLM) is None
+    assert cache.stats()["skipped"] == 1
+
+
+def test_expired_entries_miss():
+    cache = SQLiteLLMCache(":memory:", ttl=0.01)
+    prompt = _prompt(HumanMessage(content="hi"))
+    cache.update(prompt, _LLM, _answer("hello"))
+    time.sleep(0.02)
+    assert cache.lookup(prompt, _LLM) is None
+
+
+def test_least_recently_used_rows_are_evicted():
+    cache = SQLiteLLMCache(":memory:", ttl=60, max_entries=2)
+    prompts = [_prompt(HumanMessage(content=str(i))) for i in range(3)]
+    cache.update(prompts[0], _LLM, _answer("0"))
+    time.sleep(0.01)
+    cache.update(prompts[1], _LLM, _answer("1"))
+    time.sleep(0.01)
+    cache.lookup(prompts[0], _LLM)  # 1 is now least recently used
+    time.sleep(0.01)
+    cache.update(prompts[2], _LLM, _answer("2"))
+
+    assert cache.lookup(prompts[1], _LLM) is None
+    assert cache.lookup(prompts[0], _LLM) is not None
+    assert cache.stats()["size"] == 2
+
+
+def test_tool_ttl_spec_parsing():
+    assert _parse_tool_ttls("date_utility=0, weather_tool=600,bad,x=y") == {"date_utility": 0.0, "weather_tool": 600.0}
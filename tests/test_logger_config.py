@@ -0,0 +1,39 @@
+# Tests for logger_config.py: level overrides and the shared queue handler.
+
+import logging
+
+import logger_config
+from logger_config import _parse_level_overrides, _resolve_level, setup_logger
+
+
+def test_level_overrides_are_parsed_and_malformed_items_ignored():
+    assert _parse_level_overrides("tools.math_tool=debug, agents=WARNING,broken,=INFO") == {
+        "tools.math_tool": "DEBUG",
+        "agents": "WARNING",
+    }
+
+
+def test_most_specific_override_wins(monkeypatch):
+    monkeypatch.setattr(logger_config, "LOG_LEVELS", {"agents": "WARNING", "agents.memory": "DEBUG"})
+    assert _resolve_level("agents.memory.cache") == "DEBUG"
+    assert _resolve_level("agents.core_agent") == "WARNING"
+    assert _resolve_level("tools.math_tool") == logger_config.LOG_LEVEL
+
+
+def test_loggers_share_one_queue_handler_per_file(tmp_path):
+    path = str(tmp_path / "app.log")
+    first = setup_logger("tests.logging.first", log_file=path, level=logging.INFO)
+    second = setup_logger("tests.logging.second", log_file=path, level=logging.INFO)
+    assert first.handlers == second.handlers and len(first.handlers) == 1
+
+    first.info("hello from first")
+    second.debug("filtered out")
+    second.warning("hello from second")
+    _, listener = logger_config._queue_handlers.pop(path)
+    listener.stop()  # drains the queue on the listener thread
+    for handler in listener.handlers:
+        handler.close()
+
+    written = (tmp_path / "app.log").read_text(encoding="utf-8")
+    assert "hello from first" in written and "hello from second" in written
+    assert "filtered out" not in written
@@ -0,0 +1,155 @@
+# Tests for tools.math_tool: compiled plans, cost limits and the calculator tools.
+
+from decimal import Decimal
+from itertools import count
+
+import pytest
+
+from tools import math_tool
+from tools.math_tool import compile_expression, evaluate_expression, format_result
+
+
+def _eval(expression, **kwargs):
+    return evaluate_expression(compile_expression(expression), **kwargs)
+
+
+def test_huge_power_is_approximated_without_big_int_work():
+    result = _eval("9**9**9")
+    assert isinstance(result, Decimal)
+    assert format_result(result).startswith("approximately")
+
+
+def test_huge_power_is_rejected_under_reject_policy(monkeypatch):
+    monkeypatch.setattr(math_tool, "MATH_OVERFLOW_POLICY", "reject")
+    with pytest.raises(OverflowError):
+        _eval("9**9**9")
+
+
+def test_huge_product_is_bounded(monkeypatch):
+    monkeypatch.setattr(math_tool, "MATH_OVERFLOW_POLICY", "reject")
+    with pytest.raises(OverflowError):
+        _eval("(10**4000) * (10**4000)")
+
+
+def test_float_overflow_follows_overflow_policy(monkeypatch):
+    result = _eval("1e308 * 10")
+    assert isinstance(result, Decimal) and result.adjusted() == 309
+
+    monkeypatch.setattr(math_tool, "MATH_OVERFLOW_POLICY", "reject")
+    with pytest.raises(OverflowError):
+        _eval("1e308 + 1e308")
+
+
+def test_time_budget_is_checked_before_every_operator(monkeypatch):
+    # Only constants and operators, no operator at a "lucky" plan index: each clock
+    # read advances one second, so a 2.5s budget must stop after a few operators
+    ticks = count()
+    monkeypatch.setattr(math_tool.time, "perf_counter", lambda: float(next(ticks)))
+    plan = compile_expression("+".join(["9**40"] * 100))
+
+    with pytest.raises(TimeoutError):
+        evaluate_expression(plan, time_budget=2.5)
+    assert next(ticks) < 10
+
+
+def test_overlong_expression_is_rejected(monkeypatch):
+    monkeypatch.setattr(math_tool, "MATH_MAX_EXPRESSION_LENGTH", 10)
+    with pytest.raises(ValueError):
+        math_tool.compile_expression.__wrapped__("1+" * 10 + "1")
+
+
+@pytest.mark.parametrize("expression", ["(234 * 12) + 98", "2 ** 10 - 7 // 2", "-(3 % 2) + 4 / 8", "1.5 * -2"])
+def test_plans_evaluate_like_python(expression):
+    assert _eval(expression) == eval(expression)
+
+
+def test_plans_are_cached_by_expression():
+    assert compile_expression("1 + 2") is compile_expression("1 + 2")
+
+
+def test_deep_nesting_does_not_hit_the_recursion_limit():
+    # A left-deep tree 2000 levels deep, twice the default recursion limit
+    assert _eval(" + ".join(["1"] * 2000)) == 2000
+
+
+@pytest.mark.parametrize("expression", ["__import__('os')", "abs(-1)", "(1).real", "[1, 2]", "True + 1", "'a' * 3"])
+def test_non_arithmetic_is_rejected(expression):
+    with pytest.raises(ValueError):
+        compile_expression(expression)
+
+
+def test_unbound_variable_is_an_error():
+    with pytest.raises(ValueError):
+        _eval("price * 2")
+    assert _eval("price * 2", variables={"price": 4}) == 8
+
+
+def test_batch_calculator_evaluates_rows_with_broadcast_scalars():
+    result = math_tool.math_batch_calculator.invoke({
+        "expression": "price * quantity * (1 - discount)",
+        "variables": {"price": [100, 250], "quantity": [3, 4], "discount": 0.1},
+    })
+    assert result == {"count": 2, "results": [270, 900], "total": 1170, "min": 270, "max": 900}
+
+
+def test_batch_calculator_marks_undefined_rows_as_null():
+    result = math_tool.math_batch_calculator.invoke({"expression": "1 / x", "variables": {"x": [2, 0, 4]}})
+    assert result["results"] == [0.5, None, 0.25]
+    assert result["total"] == 0.75
+
+
+@pytest.mark.parametrize("variables, message", [
+    ({"x": [1, 2]}, "Missing values"),
+    ({"x": [1, 2], "y": [1, 2, 3]}, "expected 2"),
+])
+def test_batch_calculator_reports_bad_variables(variables, message):
+    result = math_tool.math_batch_calculator.invoke({"expression": "x + y", "variables": variables})
+    assert message in result["error"]
+
+
+def test_batch_calculator_rejects_nested_lists():
+    # The tool schema already refuses these; the function checks again for direct callers
+    result = math_tool.math_batch_calculator.func("x + y", {"x": [[1], [2]], "y": 1})
+    assert "flat list" in result["error"]
+
+
+def test_batch_calculator_limits_rows(monkeypatch):
+    monkeypatch.setattr(math_tool, "MATH_BATCH_MAX_ROWS", 2)
+    result = math_tool.math_batch_calculator.invoke({"expression": "x", "variables": {"x": [1, 2, 3]}})
+    assert "Too many rows" in result["error"]
+
+
+def test_digit_limit_boundary():
+    limit = math_tool.MATH_MAX_INT_DIGITS
+    exact = _eval(f"10**{limit - 1}")
+    assert exact == 10 ** (limit - 1)
+    assert format_result(exact)  # exactly MATH_MAX_INT_DIGITS digits still formats
+    assert isinstance(_eval(f"10**{limit}"), Decimal)
+    assert isinstance(_eval(f"10**{limit - 1} * 10"), Decimal)
+    assert isinstance(_eval(" + ".join([f"10**{limit - 1}"] * 10)), Decimal)
+
+
+def test_digit_limit_is_capped_at_the_int_str_limit():
+    import sys
+    assert math_tool.MATH_MAX_INT_DIGITS <= (sys.get_int_max_str_digits() or math_tool.MATH_MAX_INT_DIGITS)
+
+
+@pytest.mark.parametrize("expression, exponent", [
+    ("10**400 * 1.5", 400),
+    ("1.5 * 10**400", 400),
+    ("10**400 / 3", 399),
+    ("10**400 + 0.5", 400),
+])
+def test_big_int_and_float_mix_follows_overflow_policy(monkeypatch, expression, exponent):
+    result = _eval(expression)
+    assert isinstance(result, Decimal) and result.adjusted() == exponent
+
+    monkeypatch.setattr(math_tool, "MATH_OVERFLOW_POLICY", "reject")
+    with pytest.raises(OverflowError):
+        _eval(expression)
+
+
+def test_remainder_of_approximated_value_is_a_clear_error():
+    result = math_tool.math_calculator.invoke({"expression": "10**5000 % 7"})
+    assert "too large to represent" in result
+    assert "decimal" not in result
@@ -0,0 +1,70 @@
+# Tests for agents/memory.py: the per-user memory search cache and retrieval helpers.
+
+import asyncio
+import time
+
+import pytest
+
+from agents import memory
+from agents.memory import MemorySearchCache
+
+
+class _FakeStore:
+    def __init__(self):
+        self.searches = 0
+
+    def search(self, query, filters, limit):
+        self.searches += 1
+        return {"results": [{"memory": f"Likes tea ({filters['user_id']})"}]}
+
+
+@pytest.fixture
+def store(monkeypatch):
+    fake = _FakeStore()
+    monkeypatch.setattr(memory, "get_memory_store", lambda: fake)
+    monkeypatch.setattr(memory, "memory_search_cache", MemorySearchCache(ttl=60, max_size=16))
+    return fake
+
+
+def test_cache_keys_on_normalized_query_per_user():
+    cache = MemorySearchCache(ttl=60, max_size=16)
+    cache.put("alice", "What do I like?", "- Likes tea")
+    assert cache.get("alice", "  what do i LIKE ") == "- Likes tea"
+    assert cache.get("bob", "What do I like?") is None
+
+
+def test_cache_entries_expire_and_evict():
+    cache = MemorySearchCache(ttl=0.01, max_size=2)
+    cache.put("alice", "a", "1")
+    time.sleep(0.02)
+    assert cache.get("alice", "a") is None
+
+    cache = MemorySearchCache(ttl=60, max_size=2)
+    for query in ("a", "b", "c"):
+        cache.put("alice", query, query)
+    assert cache.get("alice", "a") is None
+    assert cache.stats()["size"] == 2
+
+
+def test_invalidation_drops_user_entries_and_rejects_racing_results():
+    cache = MemorySearchCache(ttl=60, max_size=16)
+    cache.put("alice", "a", "1")
+    generation = cache.generation("alice")
+    cache.invalidate("alice")
+    assert cache.get("alice", "a") is None
+
+    cache.put("alice", "a", "stale", generation)
+    assert cache.get("alice", "a") is None
+
+
+def test_repeated_query_searches_backend_once(store):
+    first = memory.retrieve_memories("What do I like?", "cache-user")
+    second = memory.retrieve_memories("what do i like", "cache-user")
+    assert first == second == "- Likes tea (cache-user)"
+    assert store.searches == 1
+
+
+def test_async_retrieval_shares_the_cache(store):
+    memory.retrieve_memories("What do I like?", "async-user")
+    assert asyncio.run(memory.aretrieve_memories("What do I like?", "async-user")) == "- Likes tea (async-user)"
+    assert store.searches == 1
@@ -0,0 +1,101 @@
+# Tests for agents/memory_profile.py: fact extraction and the profile store.
+
+import pytest
+
+from agents.memory_profile import UserProfileStore, extract_facts
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("My name is Alice.", [("name", "Alice")]),
+    ("I live in New Delhi. Do I like pizza?", [("location", "New Delhi")]),
+    ("You can call me Sam.", [("name", "Sam")]),
+    ("I work as a data analyst.", [("occupation", "data analyst")]),
+    ("I really love hiking, and I hate crowds.", [("likes", "hiking"), ("dislikes", "crowds")]),
+])
+def test_extracts_user_facts(text, expected):
+    assert extract_facts(text) == expected
+
+
+@pytest.mark.parametrize("text", [
+    "My dog's name is Max.",
+    "Friend's name is Bob",
+    "I am Indian.",
+    "I'm Vegetarian.",
+])
+def test_other_names_and_adjectives_are_not_the_users_name(text):
+    assert [fact for fact in extract_facts(text) if fact[0] == "name"] == []
+    assert [fact for fact in extract_facts(text, extracted=True) if fact[0] == "name"] == []
+
+
+@pytest.mark.parametrize("text", [
+    "My sister likes horror movies",
+    "Who likes pizza?",
+    "My boss lives in Berlin and hates meetings.",
+    "Name is Alice.",
+])
+def test_third_person_cues_do_not_apply_to_user_input(text):
+    assert extract_facts(text) == []
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Name is Alice Smith. Lives in New Delhi.", [("name", "Alice Smith"), ("location", "New Delhi")]),
+    ("Likes pizza", [("likes", "pizza")]),
+    ("User works as a nurse", [("occupation", "nurse")]),
+    ("Dislikes horror movies", [("dislikes", "horror movies")]),
+    ("Sister likes horror movies", []),
+    ("I like tea", []),
+])
+def test_extracts_backend_memories(text, expected):
+    assert extract_facts(text, extracted=True) == expected
+
+
+def test_empty_values_are_skipped():
+    assert extract_facts("I like ''") == []
+    assert extract_facts("I like ''. My name is Alice.") == [("name", "Alice")]
+
+
+def test_phrases_stop_at_conjunctions():
+    assert extract_facts("I like pizza but I don't like pineapple on it") == [
+        ("likes", "pizza"),
+        ("dislikes", "pineapple on it"),
+    ]
+    assert extract_facts("User likes tea and coffee", extracted=True) == [("likes", "tea")]
+
+
+def test_vague_likes_are_ignored():
+    assert extract_facts("I like it when it rains") == []
+
+
+def test_store_merges_and_persists_facts(tmp_path):
+    path = str(tmp_path / "profiles.sqlite3")
+    store = UserProfileStore(path=path, max_items=2)
+    assert store.update("alice", ["My name is Alice", "I like tea", "I like chess", "I like jazz"])
+    assert not store.update("alice", ["I like jazz"])
+    assert store.update("alice", ["I don't like chess"])
+    store.close()
+
+    reopened = UserProfileStore(path=path)
+    assert reopened.get("alice") == {"name": "Alice", "likes": ["jazz"], "dislikes": ["chess"]}
+    assert reopened.render("alice") == "- Name: Alice\n- Likes: jazz\n- Dislikes: chess"
+    assert reopened.get("bob") == {}
+
+
+def test_store_reads_memories_with_the_summary_patterns(tmp_path):
+    store = UserProfileStore(path=str(tmp_path / "profiles.sqlite3"))
+    assert not store.update("alice", ["My sister likes horror movies"])
+    assert not store.update("alice", ["I like tea"], extracted=True)
+    assert store.update("alice", ["Likes tea"], extracted=True)
+    assert store.get("alice") == {"likes": ["tea"]}
+
+
+def test_loaded_profiles_are_bounded(tmp_path):
+    store = UserProfileStore(path=str(tmp_path / "profiles.sqlite3"), cache_size=2)
+    store.update("alice", ["My name is Alice"])
+    store.update("bob", ["My name is Bob"])
+    store.get("alice")
+    store.update("carol", ["My name is Carol"])
+    assert store.stats()["loaded"] == 2
+    # bob was least recently used; his profile comes back from SQLite
+    assert store.get("bob") == {"name": "Bob"}
+    assert store.get("alice") == {"name": "Alice"}
+    assert store.stats()["loaded"] == 2
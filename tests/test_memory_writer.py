@@ -0,0 +1,116 @@
+# Tests for agents/memory_writer.py: batching, retries and shutdown drain.
+
+import threading
+import time
+
+import pytest
+
+from agents.memory_writer import MemoryWriteBehindQueue
+
+
+class _RecordingWriter:
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def __call__(self, user_id, messages):
+        with self.lock:
+            if self.failures:
+                self.failures -= 1
+                raise ConnectionError("backend down")
+            self.calls.append((user_id, messages))
+
+
+def test_interactions_are_batched_per_user():
+    writer = _RecordingWriter()
+    queue = MemoryWriteBehindQueue(writer, batch_size=10, flush_interval=60)
+    queue.submit("alice", "hi", "hello")
+    queue.submit("bob", "weather?", "sunny")
+    queue.submit("alice", "bye", "goodbye")
+    assert queue.flush(timeout=5)
+
+    batches = dict(writer.calls)
+    assert [message["content"] for message in batches["alice"]] == ["hi", "hello", "bye", "goodbye"]
+    assert len(batches["bob"]) == 2
+    assert queue.stats()["written"] == 3
+    queue.shutdown()
+
+
+def test_full_batch_flushes_without_waiting_for_interval():
+    writer = _RecordingWriter()
+    queue = MemoryWriteBehindQueue(writer, batch_size=2, flush_interval=60)
+    queue.submit("alice", "a", "b")
+    queue.submit("alice", "c", "d")
+    # Not a flush(): the batch size alone must wake the worker
+    for _ in range(500):
+        if queue.stats()["written"] == 2:
+            break
+        time.sleep(0.01)
+    assert queue.stats()["written"] == 2
+    queue.shutdown()
+
+
+def test_failed_writes_are_retried_then_dropped():
+    writer = _RecordingWriter(failures=1)
+    queue = MemoryWriteBehindQueue(writer, flush_interval=60, max_retries=2, retry_backoff=0.001)
+    queue.submit("alice", "hi", "hello")
+    assert queue.flush(timeout=5)
+    assert queue.stats()["retries"] == 1 and queue.stats()["written"] == 1
+
+    writer.failures = 5
+    queue.submit("alice", "again", "hello")
+    assert queue.flush(timeout=5)
+    assert queue.stats()["failed"] == 1
+    queue.shutdown()
+
+
+def test_shutdown_drains_and_rejects_new_work():
+    writer = _RecordingWriter()
+    queue = MemoryWriteBehindQueue(writer, flush_interval=60)
+    queue.submit("alice", "hi", "hello")
+    assert queue.shutdown(timeout=5)
+    assert len(writer.calls) == 1
+    with pytest.raises(RuntimeError):
+        queue.submit("alice", "late", "reply")
+
+
+def test_non_positive_max_retries_still_writes_once():
+    writer = _RecordingWriter()
+    queue = MemoryWriteBehindQueue(writer, flush_interval=60, max_retries=0)
+    queue.submit("alice", "hi", "hello")
+    assert queue.flush(timeout=5)
+    assert queue.stats()["written"] == 1
+
+    writer.failures = 1
+    queue.submit("alice", "again", "hello")
+    assert queue.flush(timeout=5)
+    assert queue.stats()["failed"] == 1
+    queue.shutdown()
+
+
+# The worker thread is expected to die on the SystemExit
+@pytest.mark.filterwarnings("ignore::pytest.PytestUnhandledThreadExceptionWarning")
+def test_flush_survives_a_worker_killed_by_base_exception():
+    calls = []
+
+    def writer(user_id, messages):
+        calls.append(user_id)
+        if len(calls) == 1:
+            raise SystemExit("backend called sys.exit")
+
+    queue = MemoryWriteBehindQueue(writer, flush_interval=60)
+    queue.submit("alice", "hi", "hello")
+    queue.submit("bob", "hi", "hello")
+    done = threading.Event()
+    threading.Thread(target=lambda: queue.flush() and done.set(), daemon=True).start()
+    assert done.wait(5)
+    stats = queue.stats()
+    assert stats["pending"] == 0
+    assert stats["failed"] + stats["written"] == 2 and stats["failed"] >= 1
+
+    # Later work is picked up by a fresh worker
+    queue.submit("carol", "hi", "hello")
+    assert queue.flush(timeout=5)
+    assert queue.stats()["written"] == stats["written"] + 1
+    queue.shutdown()
@@ -0,0 +1,68 @@
+# Tests for agents/registry.py and client.py: agents and backend clients are built lazily, once.
+
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+import client
+from agents.registry import AgentRegistry
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_concurrent_first_requests_share_one_build():
+    registry = AgentRegistry()
+    builds = []
+
+    def build():
+        builds.append(1)
+        time.sleep(0.05)
+        return object()
+
+    registry.register("core", build)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(registry.get("core"))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(builds) == 1
+    assert len({id(agent) for agent in results}) == 1
+
+
+def test_string_factories_are_imported_on_first_use():
+    registry = AgentRegistry()
+    registry.register("counter", "collections:Counter")
+    assert not registry.is_built("counter")
+    assert type(registry.get("counter")).__name__ == "Counter"
+    assert registry.get("counter") is registry.get("counter")
+    registry.reset()
+    assert not registry.is_built("counter")
+
+
+def test_unknown_agent_raises_key_error():
+    with pytest.raises(KeyError):
+        AgentRegistry().get("missing")
+
+
+def test_unknown_memory_backend_is_rejected(monkeypatch):
+    monkeypatch.setattr(client, "MEMORY_BACKEND", "redis")
+    with pytest.raises(ValueError):
+        client.get_memory_store()
+
+
+def test_importing_the_agents_builds_nothing():
+    # Fresh interpreter without API keys: importing must not need credentials or build clients
+    env = {key: value for key, value in os.environ.items() if not key.endswith("_API_KEY")}
+    script = (
+        "import client, agents.core_agent, agents.weather_agent\n"
+        "from agents.registry import agent_registry\n"
+        "assert client._model is None and client._mem0 is None\n"
+        "assert not agent_registry.is_built('core') and not agent_registry.is_built('weather')\n"
+    )
+    subprocess.run([sys.executable, "-c", script], cwd=_ROOT, env=env, check=True, timeout=120)
@@ -0,0 +1,123 @@
+# Tests for resilience.py: priority lanes, circuit breaker and retrying guard,
+# plus the Gemini client wiring in client.py.
+
+import threading
+import time
+
+import pytest
+
+import client
+from resilience import (
+    BATCH,
+    INTERACTIVE,
+    BackendGuard,
+    CircuitBreaker,
+    CircuitOpenError,
+    RateLimiter,
+    RateLimitTimeout,
+    is_retryable,
+)
+
+
+class _HttpError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+def test_retryable_classification():
+    assert is_retryable(_HttpError(429))
+    assert is_retryable(_HttpError(503))
+    assert not is_retryable(_HttpError(400))
+    assert is_retryable(RuntimeError("RESOURCE_EXHAUSTED: quota"))
+    assert not is_retryable(CircuitOpenError("open"))
+
+
+def test_interactive_waiter_is_served_before_earlier_batch_waiter():
+    limiter = RateLimiter(rps=20, burst=1)
+    limiter.acquire()  # empty the bucket so both callers have to wait
+    order = []
+
+    def caller(lane, name):
+        limiter.acquire(lane=lane, timeout=5)
+        order.append(name)
+
+    batch = threading.Thread(target=caller, args=(BATCH, "batch"))
+    batch.start()
+    while limiter.stats()["waiting"]["batch"] < 1:
+        time.sleep(0.001)
+    interactive = threading.Thread(target=caller, args=(INTERACTIVE, "interactive"))
+    interactive.start()
+    batch.join(5)
+    interactive.join(5)
+
+    # Sorting by lane only works if the batch caller had not been granted yet
+    assert order == ["interactive", "batch"]
+    assert limiter.stats()["granted"] == {"interactive": 2, "batch": 1}
+
+
+def test_limiter_times_out_without_quota():
+    limiter = RateLimiter(rps=0.01, burst=1)
+    limiter.acquire()
+    with pytest.raises(RateLimitTimeout):
+        limiter.acquire(timeout=0.01)
+    assert limiter.stats()["timeouts"] == 1
+
+
+def test_breaker_half_open_admits_one_trial():
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=0.05)
+    breaker.record_failure()
+    breaker.record_failure()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    time.sleep(0.06)
+    breaker.before_call()  # the trial call
+    assert breaker.stats()["state"] == "half_open"
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()  # second caller while the trial is in flight
+
+    breaker.record_success()
+    assert breaker.stats()["state"] == "closed"
+    breaker.before_call()
+
+
+def test_failed_trial_reopens_the_circuit():
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.stats()["state"] == "open"
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+
+
+def test_guard_retries_retryable_errors_only():
+    guard = BackendGuard("test", RateLimiter(1000, 100), CircuitBreaker("test", failure_threshold=10),
+                         max_attempts=3, base_delay=0.001, max_delay=0.001)
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise _HttpError(503)
+        return "ok"
+
+    assert guard.call(flaky) == "ok"
+    assert guard.stats()["retries"] == 2
+
+    def bad_request():
+        attempts.append(1)
+        raise _HttpError(400)
+
+    attempts.clear()
+    with pytest.raises(_HttpError):
+        guard.call(bad_request)
+    assert len(attempts) == 1
+
+
+def test_gemini_sdk_retries_are_disabled(monkeypatch):
+    monkeypatch.setenv("GEMINI_API_KEY", "test-key")
+    monkeypatch.setattr(client, "_model", None)
+    assert client.get_model().max_retries == 0
@@ -0,0 +1,87 @@
+# Tests for server.py: admission control and request validation.
+
+import http.client
+import json
+import threading
+
+import pytest
+
+from server import AdmissionController, AgentServer, Overloaded, _to_messages
+
+
+@pytest.fixture(scope="module")
+def server():
+    # Validation runs before admission and before any agent is built, so no keys are needed
+    agent_server = AgentServer(("127.0.0.1", 0))
+    thread = threading.Thread(target=agent_server.serve_forever, daemon=True)
+    thread.start()
+    yield agent_server
+    agent_server.shutdown()
+    agent_server.loop.call_soon_threadsafe(agent_server.loop.stop)
+    agent_server.server_close()
+
+
+def _post(server, body):
+    connection = http.client.HTTPConnection(*server.server_address, timeout=5)
+    connection.request("POST", "/v1/agents/core/invoke", body=json.dumps(body))
+    response = connection.getresponse()
+    return response.status, json.loads(response.read())
+
+
+@pytest.mark.parametrize("extra", [
+    {"history": "x"},
+    {"history": [1]},
+    {"history": {"a": 1}},
+    {"history": [{"role": "system", "content": "hi"}]},
+    {"priority": []},
+    {"priority": "urgent"},
+])
+def test_malformed_fields_get_400(server, extra):
+    status, payload = _post(server, {"user_id": "alice", "message": "What is 3 * 499?", **extra})
+    assert status == 400
+    assert "error" in payload
+
+
+def test_missing_user_id_gets_400(server):
+    assert _post(server, {"message": "hi"})[0] == 400
+
+
+def test_history_becomes_messages():
+    messages = _to_messages([{"role": "user", "content": "hi"}, {"role": "assistant", "content": "hello"}], "bye")
+    assert [type(message).__name__ for message in messages] == ["HumanMessage", "AIMessage", "HumanMessage"]
+
+
+def test_admission_rejects_when_queue_is_full():
+    admission = AdmissionController(max_concurrency=1, max_queue=0)
+    admission.acquire()
+    with pytest.raises(Overloaded):
+        admission.acquire(timeout=0.01)
+    admission.release()
+    admission.acquire(timeout=0.01)
+    assert admission.stats()["rejected"] == 1
+
+
+def test_drain_rejects_new_requests():
+    admission = AdmissionController(max_concurrency=2, max_queue=2)
+    assert admission.drain(timeout=0.1)
+    with pytest.raises(Overloaded):
+        admission.acquire(timeout=0.01)
+
+
+@pytest.mark.parametrize("stream", ["false", 1, []])
+def test_non_boolean_stream_gets_400(server, stream):
+    assert _post(server, {"user_id": "alice", "message": "What is 3 * 499?", "stream": stream})[0] == 400
+
+
+def test_oversized_body_closes_the_connection(server, monkeypatch):
+    import server as server_module
+    monkeypatch.setattr(server_module, "SERVER_MAX_BODY_BYTES", 16)
+    connection = http.client.HTTPConnection(*server.server_address, timeout=5)
+    # The unread body would otherwise be parsed as a second request on this connection
+    smuggled = "GET /healthz HTTP/1.1\r\nHost: x\r\n\r\n"
+    connection.request("POST", "/v1/agents/core/invoke", body=json.dumps({"pad": "x" * 32}) + smuggled)
+    response = connection.getresponse()
+    assert response.status == 400
+    assert response.getheader("Connection") == "close"
+    response.read()
+    assert response.will_close
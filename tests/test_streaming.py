@@ -0,0 +1,44 @@
+# Tests for agents/streaming.py and the stream_* entry points, run against the offline fakes.
+
+import asyncio
+
+from langchain_core.messages import HumanMessage
+
+from agents.core_agent import astream_core_agent_with_memory, stream_core_agent_with_memory
+from agents.streaming import answer_events
+from agents.weather_agent import stream_weather_agent_with_memory
+
+
+def _ask(text):
+    return {"messages": [HumanMessage(content=text)]}
+
+
+def test_tool_events_come_before_the_final_answer(offline_agents):
+    events = list(stream_core_agent_with_memory(_ask("Please work out 12 * 3 for me"), user_id="stream-user"))
+    kinds = [event["type"] for event in events]
+
+    assert kinds.index("tool_call") < kinds.index("tool_result") < kinds.index("final")
+    assert kinds[-1] == "final" and kinds.count("final") == 1
+    call = next(event for event in events if event["type"] == "tool_call")
+    result = next(event for event in events if event["type"] == "tool_result")
+    assert call["name"] == "math_calculator" and result["id"] == call["id"]
+    assert "36" in events[-1]["content"]
+
+
+def test_weather_stream_reports_one_result_per_city(offline_agents):
+    events = list(stream_weather_agent_with_memory(
+        _ask("What is the weather in Delhi and the weather in Pune?"), user_id="stream-user"
+    ))
+    assert sorted(e["content"].split(":")[0] for e in events if e["type"] == "tool_result") == ["Delhi", "Pune"]
+
+
+def test_fast_path_streams_the_answer_directly(offline_agents):
+    assert list(stream_core_agent_with_memory(_ask("What is 2 + 2?"))) == answer_events("2 + 2 = 4")
+
+
+def test_async_stream_matches_sync_stream(offline_agents):
+    async def collect():
+        return [event async for event in astream_core_agent_with_memory(_ask("Please work out 12 * 3 for me"))]
+
+    sync_events = list(stream_core_agent_with_memory(_ask("Please work out 12 * 3 for me")))
+    assert asyncio.run(collect()) == sync_events
@@ -0,0 +1,58 @@
+# Tests for tools.text_analyzer: lexicon matching and streaming analysis.
+
+import pytest
+
+from tools.text_analyzer import SentimentLexicon, analyze_stream, compute_text_stats
+
+
+def test_counts_words_and_characters():
+    text = "I am very happy with the excellent service."
+    result = compute_text_stats(text)
+    assert result == {"word_count": 8, "character_count": len(text), "sentiment": "Positive"}
+
+
+@pytest.mark.parametrize("text, sentiment", [
+    ("The badge looks great", "Positive"),    # "bad" inside "badge" is not a match
+    ("A goodness of fit test", "Neutral"),
+    ("Sad, bad and poor.", "Negative"),
+])
+def test_keywords_match_whole_words_only(text, sentiment):
+    assert compute_text_stats(text)["sentiment"] == sentiment
+
+
+def test_phrases_take_precedence_over_their_words():
+    lexicon = SentimentLexicon({"good": 1, "not good": -2})
+    assert compute_text_stats("This is not good.", lexicon)["sentiment"] == "Negative"
+    assert compute_text_stats("Not. Good.", lexicon)["sentiment"] == "Positive"
+
+
+def test_lexicon_file_formats(tmp_path):
+    weighted = tmp_path / "afinn.txt"
+    weighted.write_text("# comment\nsuperb\t3\nnot bad 2\nbroken line\n", encoding="utf-8")
+    lexicon = SentimentLexicon.from_file(str(weighted))
+    assert lexicon.words == {"superb": 3.0}
+    assert len(lexicon) == 2
+
+    words = tmp_path / "negative.txt"
+    words.write_text("awful\nvery poor\n", encoding="utf-8")
+    SentimentLexicon.from_file(str(words), polarity=-1.0, lexicon=lexicon)
+    assert compute_text_stats("superb but awful and very poor", lexicon)["sentiment"] == "Positive"
+
+
+def test_streaming_matches_one_shot_analysis_across_chunk_boundaries():
+    text = "I am very happy with the excellent service. " * 50 + "This is not good at all, terrible!"
+    lexicon = SentimentLexicon({"happy": 1, "not good": -3, "terrible": -1})
+    chunks = [text[i:i + 7] for i in range(0, len(text), 7)]
+
+    assert analyze_stream(chunks, lexicon=lexicon) == compute_text_stats(text, lexicon)
+
+
+def test_streaming_decodes_bytes_split_inside_a_character(tmp_path):
+    text = "Café service was excellent — très good"
+    data = text.encode("utf-8")
+    chunks = [data[i:i + 3] for i in range(0, len(data), 3)]
+    assert analyze_stream(chunks) == compute_text_stats(text)
+
+    path = tmp_path / "review.txt"
+    path.write_bytes(data)
+    assert analyze_stream(str(path), chunk_size=5) == compute_text_stats(text)
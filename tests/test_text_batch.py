@@ -0,0 +1,27 @@
+# Tests for tools.text_analyzer.analyze_documents: process-pool batch analysis.
+
+from tools import text_analyzer
+from tools.text_analyzer import SentimentLexicon, analyze_documents, compute_text_stats
+
+_DOCUMENTS = ["I am very happy with the excellent service.", "This is terrible.", "It rained today."] * 4
+
+
+def test_pool_results_match_in_process_results(monkeypatch):
+    monkeypatch.setattr(text_analyzer, "TEXT_BATCH_MIN_PARALLEL_CHARS", 0)
+    parallel = analyze_documents(_DOCUMENTS, workers=2, chunk_size=3)
+
+    assert parallel["results"] == [compute_text_stats(document) for document in _DOCUMENTS]
+    assert parallel["totals"]["documents"] == len(_DOCUMENTS)
+    assert parallel["totals"]["sentiment_counts"] == {"Positive": 4, "Negative": 4, "Neutral": 4}
+
+
+def test_workers_do_not_use_fork():
+    assert text_analyzer._MP_CONTEXT.get_start_method() != "fork"
+
+
+def test_custom_lexicon_reaches_worker_processes(monkeypatch):
+    monkeypatch.setattr(text_analyzer, "TEXT_BATCH_MIN_PARALLEL_CHARS", 0)
+    lexicon = SentimentLexicon.from_keywords(positive=["rained"], negative=[])
+    results = analyze_documents(["It rained today."] * 4, workers=2, chunk_size=2, lexicon=lexicon)["results"]
+
+    assert [result["sentiment"] for result in results] == ["Positive"] * 4
@@ -0,0 +1,84 @@
+# Tests for agents/tool_executor.py: concurrent tool calls within one model turn.
+
+import asyncio
+import threading
+import time
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.tools import StructuredTool
+
+from agents.tool_executor import ConcurrentToolMiddleware, ToolExecutor
+
+
+def _slow(name, delay=0.2):
+    def run(value: str) -> str:
+        time.sleep(delay)
+        return f"{name}:{value}"
+
+    return StructuredTool.from_function(func=run, name=name, description=f"{name} tool")
+
+
+def _failing():
+    def run(value: str) -> str:
+        raise RuntimeError("tool broke")
+
+    return StructuredTool.from_function(func=run, name="broken", description="always fails")
+
+
+def _async_tool():
+    def run(value: str) -> str:
+        raise AssertionError("sync path used")
+
+    async def arun(value: str) -> str:
+        await asyncio.sleep(0.2)
+        return f"async:{value}"
+
+    return StructuredTool.from_function(func=run, coroutine=arun, name="async_tool", description="async tool")
+
+
+def _call(name, call_id, value="x"):
+    return {"name": name, "args": {"value": value}, "id": call_id, "type": "tool_call"}
+
+
+def test_calls_run_concurrently_and_keep_order():
+    executor = ToolExecutor([_slow("a"), _slow("b"), _slow("c")])
+    started = time.perf_counter()
+    results = executor.run([_call("a", "1"), _call("b", "2"), _call("c", "3")])
+
+    assert time.perf_counter() - started < 0.5
+    assert [m.content for m in results] == ["a:x", "b:x", "c:x"]
+    assert [m.tool_call_id for m in results] == ["1", "2", "3"]
+
+
+def test_single_call_runs_on_the_callers_thread():
+    seen = []
+    tool = StructuredTool.from_function(
+        func=lambda value: seen.append(threading.current_thread()) or value, name="where", description="thread"
+    )
+    ToolExecutor([tool]).run([_call("where", "1")])
+    assert seen == [threading.current_thread()]
+
+
+def test_failures_become_error_messages():
+    results = ToolExecutor([_slow("a", 0), _failing()]).run([_call("a", "1"), _call("broken", "2")])
+    assert results[0].content == "a:x"
+    assert results[1].status == "error" and "tool broke" in results[1].content
+
+
+def test_async_run_awaits_async_tools_alongside_blocking_ones():
+    executor = ToolExecutor([_slow("a"), _async_tool()])
+    started = time.perf_counter()
+    results = asyncio.run(executor.arun([_call("a", "1"), _call("async_tool", "2")]))
+
+    assert time.perf_counter() - started < 0.35
+    assert [m.content for m in results] == ["a:x", "async:x"]
+
+
+def test_middleware_leaves_unknown_tools_to_the_agent():
+    middleware = ConcurrentToolMiddleware([_slow("a", 0)])
+    unknown = AIMessage(content="", tool_calls=[_call("a", "1"), _call("other", "2")])
+    assert middleware.after_model({"messages": [HumanMessage(content="hi"), unknown]}, None) is None
+
+    known = AIMessage(content="", tool_calls=[_call("a", "1")])
+    update = middleware.after_model({"messages": [known]}, None)
+    assert update["jump_to"] == "model" and update["messages"][0].content == "a:x"
@@ -0,0 +1,116 @@
+# Tests for tracing.py: span nesting, traced generators and metrics.
+
+import asyncio
+
+import pytest
+
+import tracing
+from tracing import StageMetrics, Tracer, span, traced
+
+
+class _ListExporter:
+    def __init__(self):
+        self.spans = []
+
+    def export(self, spans):
+        self.spans.extend(spans)
+
+
+@pytest.fixture
+def exported(monkeypatch):
+    exporter = _ListExporter()
+    monkeypatch.setattr(tracing, "tracer", Tracer(enabled=True, sample_rate=1.0, exporter=exporter, metrics=StageMetrics()))
+    return exporter.spans
+
+
+def _by_name(spans):
+    return {record.name: record for record in spans}
+
+
+def test_nested_spans_share_a_trace_and_export_with_the_root(exported):
+    with span("root"):
+        with span("child", cache_hit=True):
+            pass
+        assert exported == []
+
+    spans = _by_name(exported)
+    assert spans["child"].parent_id == spans["root"].span_id
+    assert spans["child"].trace is spans["root"].trace
+    assert tracing.tracer.metrics.summary()["child"]["cache"] == {"hit": 1, "miss": 0}
+
+
+def test_error_status_is_recorded(exported):
+    with pytest.raises(ValueError):
+        with span("root"):
+            raise ValueError("bad")
+    assert exported[0].status == "error"
+    assert exported[0].attributes["error"] == "ValueError"
+
+
+def test_generator_span_is_not_current_between_items(exported):
+    @traced("stream")
+    def stream():
+        with span("inside"):
+            yield 1
+        yield 2
+
+    with span("consumer"):
+        for _ in stream():
+            with span("work"):
+                pass
+
+    spans = {}
+    for record in exported:
+        spans.setdefault(record.name, []).append(record)
+    consumer = spans["consumer"][0]
+    assert all(work.parent_id == consumer.span_id for work in spans["work"])
+    assert spans["inside"][0].parent_id == spans["stream"][0].span_id
+
+
+def test_async_generator_span_is_not_current_between_items(exported):
+    @traced("stream")
+    async def stream():
+        yield 1
+        yield 2
+
+    async def main():
+        with span("consumer"):
+            async for _ in stream():
+                with span("work"):
+                    await asyncio.sleep(0)
+
+    asyncio.run(main())
+    consumer = _by_name(exported)["consumer"]
+    assert [record.parent_id for record in exported if record.name == "work"] == [consumer.span_id] * 2
+
+
+def test_closing_async_wrapper_early_closes_inner_generator(exported):
+    cleaned_up = []
+
+    @traced("stream")
+    async def stream():
+        try:
+            for i in range(10):
+                yield i
+        finally:
+            cleaned_up.append(True)
+
+    async def main():
+        agen = stream()
+        assert await agen.__anext__() == 0
+        await agen.aclose()
+        assert cleaned_up == [True]
+
+    asyncio.run(main())
+    assert exported[0].name == "stream" and exported[0].status == "ok"
+
+
+def test_disabled_tracer_records_nothing(monkeypatch):
+    monkeypatch.setattr(tracing, "tracer", Tracer(enabled=False, metrics=StageMetrics()))
+
+    @traced("stream")
+    def stream():
+        yield 1
+
+    assert list(stream()) == [1]
+    assert tracing.tracer.metrics.summary() == {}
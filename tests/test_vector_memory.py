@@ -0,0 +1,123 @@
+# Tests for agents/vector_memory.py: local add/search, per-user isolation, dedupe and deletes.
+
+import numpy as np
+import pytest
+
+from agents.vector_memory import HashingEmbedder, LocalMemoryStore, load_embedder
+
+
+@pytest.fixture
+def store(tmp_path):
+    memory_store = LocalMemoryStore(path=str(tmp_path), embedder=HashingEmbedder(256), chunk_rows=2)
+    yield memory_store
+    memory_store.close()
+
+
+def test_hashing_embedder_is_normalized_and_deterministic():
+    embedder = HashingEmbedder(64)
+    vectors = embedder(["I live in Paris", "I live in Paris", ""])
+    assert vectors.shape == (3, 64)
+    assert np.allclose(np.linalg.norm(vectors[0]), 1.0)
+    assert np.array_equal(vectors[0], vectors[1])
+    assert not vectors[2].any()
+
+
+def test_load_embedder_specs():
+    assert isinstance(load_embedder("hashing", 32), HashingEmbedder)
+    with pytest.raises(ValueError):
+        load_embedder("not-a-spec")
+
+
+def test_search_ranks_closest_memory_first(store):
+    store.add_memories("alice", ["I live in Paris", "My favourite food is sushi", "I work as a nurse"])
+    results = store.search("where do I live", filters={"user_id": "alice"}, limit=2)["results"]
+    assert len(results) == 2
+    assert results[0]["memory"] == "I live in Paris"
+    assert results[0]["score"] >= results[1]["score"]
+
+
+def test_add_stores_user_messages_only(store):
+    result = store.add(
+        [{"role": "user", "content": "I have a cat"}, {"role": "assistant", "content": "Nice!"}],
+        user_id="alice",
+    )
+    assert [mem["memory"] for mem in result["results"]] == ["I have a cat"]
+    assert result["results"][0]["event"] == "ADD"
+
+
+def test_known_texts_are_not_stored_twice(store):
+    assert len(store.add_memories("alice", ["I have a cat", "I have a cat"])) == 1
+    assert store.add_memories("alice", ["I have a cat"]) == []
+    assert store.stats()["memories"] == 1
+
+
+def test_users_are_isolated(store):
+    store.add_memories("alice", ["I live in Paris"])
+    store.add_memories("bob", ["I live in Rome"])
+    results = store.search("where do I live", filters={"user_id": "bob"})["results"]
+    assert [mem["memory"] for mem in results] == ["I live in Rome"]
+    with pytest.raises(ValueError):
+        store.search("where do I live")
+
+
+def test_search_spans_chunks_after_appends(store):
+    for i in range(5):
+        store.add_memories("alice", [f"note number {i} about topic{i}"])
+    results = store.search("topic4", filters={"user_id": "alice"}, limit=1)["results"]
+    assert results[0]["memory"] == "note number 4 about topic4"
+
+
+def test_delete_all_removes_memories(store):
+    store.add_memories("alice", ["I live in Paris"])
+    store.delete_all("alice")
+    assert store.search("Paris", filters={"user_id": "alice"}) == {"results": []}
+    assert store.stats()["memories"] == 0
+
+
+def test_reopen_rejects_different_dimension(tmp_path):
+    LocalMemoryStore(path=str(tmp_path), embedder=HashingEmbedder(64)).close()
+    with pytest.raises(ValueError):
+        LocalMemoryStore(path=str(tmp_path), embedder=HashingEmbedder(32))
+
+
+def test_precomputed_vectors_must_match_dimension(store):
+    with pytest.raises(ValueError):
+        store.add_memories("alice", ["x"], vectors=np.ones((1, 8), dtype=np.float32))
+
+
+def test_mapped_vector_files_are_bounded(tmp_path):
+    store = LocalMemoryStore(path=str(tmp_path), embedder=HashingEmbedder(64), mapped_users=2)
+    for user in ("alice", "bob", "carol"):
+        store.add_memories(user, [f"{user} lives in Paris"])
+        store.search("Paris", filters={"user_id": user})
+    assert store.stats()["mapped"] == 2
+    # alice was unmapped first and is mapped again on her next search
+    assert store.search("Paris", filters={"user_id": "alice"})["results"][0]["memory"] == "alice lives in Paris"
+    assert store.stats()["mapped"] == 2
+    store.close()
+
+
+class _FailingCommit:
+    def __init__(self, conn):
+        self._conn = conn
+
+    def execute(self, sql, *args):
+        if sql == "COMMIT":
+            raise RuntimeError("disk full")
+        return self._conn.execute(sql, *args)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+def test_failed_append_leaves_no_stray_vectors(store):
+    store.add_memories("alice", ["I live in Paris"])
+    conn = store._conn
+    store._conn = _FailingCommit(conn)
+    with pytest.raises(RuntimeError):
+        store.add_memories("alice", ["I love Paris in spring", "Paris is my favourite city"])
+    store._conn = conn
+
+    results = store.search("Paris", filters={"user_id": "alice"}, limit=3)["results"]
+    assert [mem["memory"] for mem in results] == ["I live in Paris"]
+    assert len(store._matrix("alice")) == 1
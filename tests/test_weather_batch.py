@@ -0,0 +1,67 @@
+# Tests for tools.weather_tool.weather_batch_tool: dedupe, limits and per-city errors.
+
+import asyncio
+
+import pytest
+
+from tools import weather_tool
+from tools.weather_tool import WeatherApiError
+
+_PAYLOAD = {"cod": 200, "main": {"temp": 25.0}, "weather": [{"description": "clear sky"}]}
+
+
+def test_dedupe_keeps_first_spelling_and_order():
+    assert weather_tool._dedupe_cities(["Delhi", " delhi", "", "Pune", "DELHI"]) == ["Delhi", "Pune"]
+
+
+def test_rejects_empty_and_oversized_batches(monkeypatch):
+    monkeypatch.setattr(weather_tool, "WEATHER_BATCH_MAX_CITIES", 2)
+    assert weather_tool._weather_batch_tool(["  "]) == {"error": "No cities provided."}
+    assert "Too many cities" in weather_tool._weather_batch_tool(["a", "b", "c"])["error"]
+
+
+def test_sync_batch_reports_errors_per_city(monkeypatch):
+    def lookup(city):
+        if city == "Atlantis":
+            raise WeatherApiError("city not found")
+        return _PAYLOAD
+
+    monkeypatch.setattr(weather_tool, "_lookup", lookup)
+    results = weather_tool._weather_batch_tool(["Delhi", "Atlantis"])["results"]
+
+    assert results[0] == {"city": "Delhi", "temperature": 25.0, "description": "clear sky",
+                          "clothing": "Light clothing with a jacket."}
+    assert results[1] == {"city": "Atlantis", "error": "city not found"}
+
+
+def test_async_batch_turns_cancelled_lookup_into_error_entry(monkeypatch):
+    async def alookup(city):
+        if city == "Shimla":
+            raise asyncio.CancelledError()
+        if city == "Atlantis":
+            raise RuntimeError("boom")
+        return _PAYLOAD
+
+    monkeypatch.setattr(weather_tool, "_alookup", alookup)
+    results = asyncio.run(weather_tool._aweather_batch_tool(["Delhi", "Shimla", "Atlantis"]))["results"]
+
+    assert results[0]["temperature"] == 25.0
+    assert results[1] == {"city": "Shimla", "error": "Weather Error: lookup was cancelled"}
+    assert results[2] == {"city": "Atlantis", "error": "Weather Error: boom"}
+
+
+def test_cancelling_the_batch_propagates(monkeypatch):
+    async def alookup(city):
+        await asyncio.sleep(10)
+        return _PAYLOAD
+
+    monkeypatch.setattr(weather_tool, "_alookup", alookup)
+
+    async def main():
+        batch = asyncio.create_task(weather_tool._aweather_batch_tool(["Delhi", "Pune"]))
+        await asyncio.sleep(0.01)
+        batch.cancel()
+        await batch
+
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(main())
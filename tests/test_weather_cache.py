@@ -0,0 +1,188 @@
+# Tests for tools.weather_tool.WeatherCache: TTL, LRU eviction and request coalescing.
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from tools.weather_tool import WeatherCache, WeatherLookupCancelled
+
+
+def test_normalize_collapses_case_and_whitespace():
+    assert WeatherCache.normalize("  new   Delhi ") == WeatherCache.normalize("New Delhi")
+
+
+def test_hit_within_ttl_skips_fetch():
+    cache = WeatherCache(ttl=60, max_size=8)
+    calls = []
+    fetch = lambda city: calls.append(city) or {"city": city}
+
+    assert cache.get_or_fetch("Delhi", fetch) == {"city": "Delhi"}
+    assert cache.get_or_fetch("delhi ", fetch) == {"city": "Delhi"}
+    assert calls == ["Delhi"]
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_expired_entry_is_refetched():
+    cache = WeatherCache(ttl=0.01, max_size=8)
+    calls = []
+    fetch = lambda city: calls.append(city) or {"n": len(calls)}
+
+    cache.get_or_fetch("Delhi", fetch)
+    time.sleep(0.02)
+    assert cache.get_or_fetch("Delhi", fetch) == {"n": 2}
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = WeatherCache(ttl=60, max_size=2)
+    calls = []
+    fetch = lambda city: calls.append(city) or {"city": city}
+
+    cache.get_or_fetch("a", fetch)
+    cache.get_or_fetch("b", fetch)
+    cache.get_or_fetch("a", fetch)  # "b" is now least recently used
+    cache.get_or_fetch("c", fetch)
+    cache.get_or_fetch("a", fetch)
+    cache.get_or_fetch("b", fetch)
+
+    assert calls == ["a", "b", "c", "b"]
+    assert cache.stats()["evictions"] == 2
+
+
+def test_concurrent_misses_share_one_fetch():
+    cache = WeatherCache(ttl=60, max_size=8)
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def fetch(city):
+        calls.append(city)
+        started.set()
+        release.wait(5)
+        return {"city": city}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_fetch("Delhi", fetch))) for _ in range(5)]
+    threads[0].start()
+    started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    while cache.stats()["coalesced"] < 4:
+        time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert calls == ["Delhi"]
+    assert results == [{"city": "Delhi"}] * 5
+
+
+def test_failure_reaches_waiters_and_is_not_cached():
+    cache = WeatherCache(ttl=60, max_size=8)
+
+    def failing(city):
+        raise RuntimeError("upstream down")
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_fetch("Delhi", failing)
+    assert cache.get_or_fetch("Delhi", lambda city: {"ok": True}) == {"ok": True}
+    assert cache.stats()["size"] == 1
+
+
+def test_async_callers_coalesce_with_each_other():
+    cache = WeatherCache(ttl=60, max_size=8)
+    calls = []
+
+    async def fetch(city):
+        calls.append(city)
+        await asyncio.sleep(0.01)
+        return {"city": city}
+
+    async def main():
+        return await asyncio.gather(*(cache.aget_or_fetch("Delhi", fetch) for _ in range(4)))
+
+    assert asyncio.run(main()) == [{"city": "Delhi"}] * 4
+    assert calls == ["Delhi"]
+
+
+def test_cancelled_leader_does_not_cancel_followers():
+    cache = WeatherCache(ttl=60, max_size=8)
+    release = None
+
+    async def fetch(city):
+        await release.wait()
+        return {"city": city}
+
+    async def main():
+        nonlocal release
+        release = asyncio.Event()
+        leader = asyncio.create_task(cache.aget_or_fetch("Delhi", fetch))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(cache.aget_or_fetch("Delhi", fetch))
+        await asyncio.sleep(0)
+        leader.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        result = await follower
+        assert leader.cancelled()
+        assert not follower.cancelled()
+        return result
+
+    assert asyncio.run(main()) == {"city": "Delhi"}
+    assert cache.get_or_fetch("Delhi", lambda city: {"refetched": True}) == {"city": "Delhi"}
+
+
+def test_cancelled_follower_does_not_cancel_shared_lookup():
+    cache = WeatherCache(ttl=60, max_size=8)
+
+    async def fetch(city):
+        await asyncio.sleep(0.01)
+        return {"city": city}
+
+    async def main():
+        leader = asyncio.create_task(cache.aget_or_fetch("Delhi", fetch))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(cache.aget_or_fetch("Delhi", fetch))
+        await asyncio.sleep(0)
+        follower.cancel()
+        return await leader
+
+    assert asyncio.run(main()) == {"city": "Delhi"}
+
+
+def test_sync_waiter_gets_ordinary_error_when_lookup_is_interrupted():
+    cache = WeatherCache(ttl=60, max_size=8)
+    started = threading.Event()
+    release = threading.Event()
+    outcome = []
+
+    def interrupted(city):
+        started.set()
+        release.wait(5)
+        raise KeyboardInterrupt
+
+    def leader():
+        try:
+            cache.get_or_fetch("Delhi", interrupted)
+        except KeyboardInterrupt:
+            pass
+
+    def follower():
+        try:
+            cache.get_or_fetch("Delhi", lambda city: {"unused": True})
+        except Exception as e:
+            outcome.append(e)
+
+    threads = [threading.Thread(target=leader), threading.Thread(target=follower)]
+    threads[0].start()
+    started.wait(5)
+    threads[1].start()
+    while cache.stats()["coalesced"] < 1:
+        time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(outcome) == 1 and isinstance(outcome[0], WeatherLookupCancelled)
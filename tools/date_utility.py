@@ -3,13 +3,14 @@
 # Date utility tool for LangChain agents.
 #
 # This module defines:
+#   - add_days_to_today: Plain helper shared by the tool and the agents' fast path.
 #   - date_utility: Computes future (or past) dates by adding N days to today.
 #
 # Purpose:
 #   Provides safe computation of calendar dates, returns ISO-formatted strings,
 #   and handles errors gracefully.
 
-from langchain.tools import tool
+from langchain_core.tools import tool
 from datetime import datetime, timedelta
 from logger_config import setup_logger
 
@@ -18,6 +19,21 @@ from logger_config import setup_logger
 # -----------------------
 logger = setup_logger(__name__)
 
+# -----------------------
+# Date helper
+# -----------------------
+def add_days_to_today(days: int) -> str:
+    """
+    Returns today's date shifted by ``days`` in "YYYY-MM-DD" format.
+
+    Raises:
+        TypeError: If days is not an integer.
+        OverflowError: If the resulting date is out of range.
+    """
+    if not isinstance(days, int):
+        raise TypeError("Days must be an integer.")
+    return (datetime.today() + timedelta(days=days)).strftime("%Y-%m-%d")
+
 # -----------------------
 # Date utility tool
 # -----------------------
@@ -35,10 +51,7 @@ def date_utility(days: int) -> str:
     """
     logger.info(f"[TOOL CALL] date_utility invoked with days: {days}")
     try:
-        if not isinstance(days, int):
-            raise TypeError("Days must be an integer.")
-        future_date = datetime.today() + timedelta(days=days)
-        result = future_date.strftime("%Y-%m-%d")
+        result = add_days_to_today(days)
         logger.info(f"[TOOL SUCCESS] Calculated date: {result}")
         return result
     except Exception as e:
@@ -3,14 +3,29 @@
 # Safe arithmetic calculation tool for LangChain agents.
 #
 # This module defines:
-#   - math_calculator: Safely evaluates arithmetic expressions using AST parsing.
+#   - compile_expression: Validates an expression's AST once and compiles it into a
+#                         flat postfix evaluation plan (LRU-cached by expression string).
+#   - evaluate_expression: Runs a compiled plan iteratively on a value stack, under a
+#                          cost model and a wall-clock budget.
+#   - evaluate_vectorized: Runs a compiled plan over NumPy columns of variable values.
+#   - math_calculator: Safely evaluates arithmetic expressions using the compiled engine.
+#   - math_batch_calculator: Evaluates one formula with named variables over many rows
+#                            in a single vectorized pass.
 #
 # Purpose:
 #   Ensures that math expressions are evaluated securely, errors are handled gracefully,
 #   and results are returned in a human-friendly string format.
 
 import ast
+import decimal
+import math
 import operator as op
+import os
+import sys
+import time
+from decimal import Decimal
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Tuple, Union
 from langchain_core.tools import tool
 from logger_config import setup_logger
 
@@ -19,40 +34,363 @@ from logger_config import setup_logger
 # -----------------------
 logger = setup_logger(__name__)
 
+# -----------------------
+# Cost limits
+# -----------------------
+# Largest exact integer result, in decimal digits; capped at the interpreter's int->str
+# limit, since results past it could not be formatted
+MATH_MAX_INT_DIGITS = int(os.getenv("MATH_MAX_INT_DIGITS", "4300"))
+if sys.get_int_max_str_digits():
+    MATH_MAX_INT_DIGITS = min(MATH_MAX_INT_DIGITS, sys.get_int_max_str_digits())
+# "approximate": results past the limit fall back to Decimal; "reject": raise an error
+MATH_OVERFLOW_POLICY = os.getenv("MATH_OVERFLOW_POLICY", "approximate").lower()
+# Significant digits kept by the Decimal fallback
+MATH_DECIMAL_PRECISION = int(os.getenv("MATH_DECIMAL_PRECISION", "30"))
+# Wall-clock seconds allowed for a single evaluation
+MATH_EVAL_TIME_BUDGET = float(os.getenv("MATH_EVAL_TIME_BUDGET", "1.0"))
+# Longest expression accepted, in characters (bounds parse and compile cost)
+MATH_MAX_EXPRESSION_LENGTH = int(os.getenv("MATH_MAX_EXPRESSION_LENGTH", "10000"))
+# Most rows math_batch_calculator evaluates in one call
+MATH_BATCH_MAX_ROWS = int(os.getenv("MATH_BATCH_MAX_ROWS", "100000"))
+
+_DECIMAL_CONTEXT = decimal.Context(
+    prec=MATH_DECIMAL_PRECISION, Emax=decimal.MAX_EMAX, Emin=decimal.MIN_EMIN
+)
+_LOG10_2 = math.log10(2)
+
+
+def _int_digits(value: int) -> float:
+    """Estimated decimal digits of an integer, from its bit length (no conversion)."""
+    return value.bit_length() * _LOG10_2
+
+
+def _overflow(digits: float = None) -> None:
+    """Raises under the reject policy; otherwise lets the caller approximate."""
+    size = "is out of float range" if digits is None else f"would have about {digits:.0f} digits"
+    if MATH_OVERFLOW_POLICY == "reject":
+        raise OverflowError(f"Result {size} (limit {MATH_MAX_INT_DIGITS} digits)")
+    logger.warning(f"Result {size}; approximating with Decimal")
+
+
+def _to_decimal(value) -> Decimal:
+    return value if isinstance(value, Decimal) else Decimal(value)
+
+
+def _decimal_apply(func, *operands):
+    """Runs an operator in the high-exponent Decimal context; overflow becomes OverflowError."""
+    try:
+        with decimal.localcontext(_DECIMAL_CONTEXT):
+            values = [_to_decimal(value) for value in operands]
+            if func is _bounded_pow:
+                return _DECIMAL_CONTEXT.power(*values)
+            return func(*values)
+    except decimal.Overflow:
+        raise OverflowError("Result too large to represent")
+    except decimal.InvalidOperation as e:
+        # Raised as InvalidOperation([DivisionImpossible]): // and % need the exact
+        # integer part, which the approximation does not keep
+        if decimal.DivisionImpossible in (e.args[0] if e.args and isinstance(e.args[0], list) else ()):
+            raise OverflowError(
+                f"Result too large to represent (// and % need more than {MATH_DECIMAL_PRECISION} exact digits)"
+            )
+        raise
+
+
+def _bounded_pow(base, exponent):
+    """
+    Power with a cost check: the result size is estimated from the operands before
+    any big-integer work happens, so inputs like 9**9**9 cannot pin a core.
+    """
+    if type(base) is int and type(exponent) is int and exponent > 0 and base not in (0, 1, -1):
+        digits = exponent * math.log10(abs(base))
+        # A d-digit integer has log10 in [d - 1, d), so the estimate reaching the
+        # limit means the result has more than MATH_MAX_INT_DIGITS digits
+        if digits >= MATH_MAX_INT_DIGITS:
+            _overflow(digits)
+            return _decimal_apply(_bounded_pow, base, exponent)
+        return op.pow(base, exponent)
+    try:
+        return op.pow(base, exponent)
+    except OverflowError:
+        _overflow()
+        return _decimal_apply(_bounded_pow, base, exponent)
+
+
+def _bounded_mul(left, right):
+    """Multiplication with the same digit-count check as _bounded_pow."""
+    if type(left) is int and type(right) is int:
+        digits = _int_digits(abs(left)) + _int_digits(abs(right))
+        if digits >= MATH_MAX_INT_DIGITS:
+            _overflow(digits)
+            return _decimal_apply(op.mul, left, right)
+        return op.mul(left, right)
+    return _float_checked(op.mul, left, right)
+
+
+def _float_checked(func, left, right):
+    """
+    Applies an operator that may convert a big int to float (10**400 * 1.5); when
+    the int does not fit a float, the overflow policy applies as in _bounded_pow.
+    """
+    try:
+        return func(left, right)
+    except OverflowError:
+        _overflow()
+        return _decimal_apply(func, left, right)
+
+
+def _checked_add(left, right):
+    return _float_checked(op.add, left, right)
+
+
+def _checked_sub(left, right):
+    return _float_checked(op.sub, left, right)
+
+
+def _checked_truediv(left, right):
+    return _float_checked(op.truediv, left, right)
+
+
+def _checked_floordiv(left, right):
+    return _float_checked(op.floordiv, left, right)
+
+
+def _checked_mod(left, right):
+    return _float_checked(op.mod, left, right)
+
+
 # -----------------------
 # Supported operators
 # -----------------------
 OPERATORS = {
-    ast.Add: op.add,
-    ast.Sub: op.sub,
-    ast.Mult: op.mul,
-    ast.Div: op.truediv,
-    ast.Pow: op.pow,
+    ast.Add: _checked_add,
+    ast.Sub: _checked_sub,
+    ast.Mult: _bounded_mul,
+    ast.Div: _checked_truediv,
+    ast.FloorDiv: _checked_floordiv,
+    ast.Mod: _checked_mod,
+    ast.Pow: _bounded_pow,
 }
 
+UNARY_OPERATORS = {
+    ast.USub: op.neg,
+    ast.UAdd: op.pos,
+}
+
+# Number of compiled plans kept, keyed by the exact expression string
+MATH_PLAN_CACHE_SIZE = int(os.getenv("MATH_PLAN_CACHE_SIZE", "512"))
+
 # -----------------------
-# Internal AST evaluator
+# Expression compiler
 # -----------------------
-def _eval_expr(node):
+# A plan is a tuple of (opcode, payload) instructions in postfix order:
+#   (_PUSH, number)    push a constant
+#   (_LOAD, name)      push the value bound to a variable
+#   (_UNARY, func)     replace the top of the stack with func(top)
+#   (_BINARY, func)    pop right, replace the new top with func(left, right)
+_PUSH, _LOAD, _UNARY, _BINARY = 0, 1, 2, 3
+
+
+@lru_cache(maxsize=MATH_PLAN_CACHE_SIZE)
+def compile_expression(expression: str) -> Tuple[tuple, ...]:
     """
-    Recursively evaluates a restricted AST node representing an arithmetic expression.
+    Parses and validates an arithmetic expression, then flattens it into a plan.
+
+    The AST is walked with an explicit stack, so nesting depth is not bounded by
+    the Python recursion limit during compilation or evaluation.
 
     Args:
-        node: AST node (ast.Constant, ast.BinOp).
+        expression (str): Arithmetic expression (e.g., "(234 * 12) + 98").
 
     Returns:
-        Numeric result of the expression.
+        Tuple[tuple, ...]: Immutable postfix plan for evaluate_expression.
+
+    Raises:
+        SyntaxError: If the expression cannot be parsed.
+        ValueError: If it contains anything other than numbers, variable names and
+            supported operators, or is longer than MATH_MAX_EXPRESSION_LENGTH.
     """
-    logger.debug(f"Evaluating AST node: {type(node).__name__}")
-    if isinstance(node, ast.Constant):
-        return node.n
-    if isinstance(node, ast.BinOp):
-        return OPERATORS[type(node.op)](
-            _eval_expr(node.left),
-            _eval_expr(node.right)
-        )
-    logger.error(f"Invalid expression node type: {type(node).__name__}")
-    raise ValueError("Invalid expression node")
+    if len(expression) > MATH_MAX_EXPRESSION_LENGTH:
+        raise ValueError(f"Expression too long (limit {MATH_MAX_EXPRESSION_LENGTH} characters)")
+    root = ast.parse(expression, mode="eval").body
+    plan = []
+    pending = [(root, False)]
+    while pending:
+        node, operands_done = pending.pop()
+        if isinstance(node, ast.Constant):
+            value = node.value
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                raise ValueError(f"Unsupported constant: {value!r}")
+            plan.append((_PUSH, value))
+        elif isinstance(node, ast.Name):
+            plan.append((_LOAD, node.id))
+        elif isinstance(node, ast.BinOp):
+            func = OPERATORS.get(type(node.op))
+            if func is None:
+                raise ValueError(f"Unsupported operator: {type(node.op).__name__}")
+            if operands_done:
+                plan.append((_BINARY, func))
+            else:
+                # Pushed in reverse so the left operand is emitted first
+                pending.append((node, True))
+                pending.append((node.right, False))
+                pending.append((node.left, False))
+        elif isinstance(node, ast.UnaryOp):
+            func = UNARY_OPERATORS.get(type(node.op))
+            if func is None:
+                raise ValueError(f"Unsupported operator: {type(node.op).__name__}")
+            if operands_done:
+                plan.append((_UNARY, func))
+            else:
+                pending.append((node, True))
+                pending.append((node.operand, False))
+        else:
+            raise ValueError(f"Invalid expression node: {type(node).__name__}")
+    return tuple(plan)
+
+
+def plan_variables(plan: Tuple[tuple, ...]) -> FrozenSet[str]:
+    """Returns the variable names a compiled plan reads."""
+    return frozenset(payload for code, payload in plan if code == _LOAD)
+
+
+def evaluate_expression(plan: Tuple[tuple, ...], time_budget: float = None, variables: Dict[str, float] = None):
+    """
+    Executes a compiled plan on a value stack.
+
+    Operations whose estimated result exceeds MATH_MAX_INT_DIGITS, or whose float
+    result overflows to inf, are rejected or approximated with Decimal (see
+    MATH_OVERFLOW_POLICY); once a Decimal appears, the remaining operations on it
+    run in the high-exponent Decimal context. The time budget is checked before
+    every operator.
+
+    Args:
+        plan (Tuple[tuple, ...]): Output of compile_expression.
+        time_budget (float): Wall-clock seconds allowed; defaults to MATH_EVAL_TIME_BUDGET.
+        variables (Dict[str, float]): Values for names used in the expression.
+
+    Returns:
+        Numeric result of the expression (int, float, or Decimal when approximated).
+
+    Raises:
+        OverflowError: If the result is too large under the current policy.
+        TimeoutError: If evaluation exceeds the time budget.
+        ValueError: If the expression uses a variable that is not bound.
+    """
+    budget = MATH_EVAL_TIME_BUDGET if time_budget is None else time_budget
+    deadline = time.perf_counter() + budget
+    stack = []
+    push = stack.append
+    pop = stack.pop
+    for code, payload in plan:
+        if code == _PUSH:
+            push(payload)
+            continue
+        if code == _LOAD:
+            if not variables or payload not in variables:
+                raise ValueError(f"Unknown variable: {payload}")
+            push(variables[payload])
+            continue
+        if time.perf_counter() > deadline:
+            raise TimeoutError(f"Evaluation exceeded time budget of {budget}s")
+        if code == _BINARY:
+            right = pop()
+            left = stack[-1]
+            if type(left) is Decimal or type(right) is Decimal:
+                stack[-1] = _decimal_apply(payload, left, right)
+            else:
+                result = payload(left, right)
+                if type(result) is float and math.isinf(result) and math.isfinite(left) and math.isfinite(right):
+                    # Float +, -, *, / saturate to inf instead of raising OverflowError
+                    _overflow()
+                    result = _decimal_apply(payload, left, right)
+                stack[-1] = result
+        elif type(stack[-1]) is Decimal:
+            stack[-1] = _decimal_apply(payload, stack[-1])
+        else:
+            stack[-1] = payload(stack[-1])
+    if time.perf_counter() > deadline:
+        raise TimeoutError(f"Evaluation exceeded time budget of {budget}s")
+    result = stack[0]
+    # + and - are not estimated up front; a sum can carry one digit past the limit
+    if type(result) is int and _int_digits(abs(result)) >= MATH_MAX_INT_DIGITS - 1:
+        if abs(result) >= 10 ** MATH_MAX_INT_DIGITS:
+            _overflow(_int_digits(abs(result)))
+            return _DECIMAL_CONTEXT.create_decimal(result)
+    return result
+
+
+def evaluate_vectorized(plan: Tuple[tuple, ...], columns: Dict[str, "np.ndarray"], time_budget: float = None):
+    """
+    Executes a compiled plan once over whole columns of float64 values.
+
+    Each plan instruction becomes one NumPy ufunc call over all rows. Overflow,
+    division by zero and invalid operations produce inf/nan for the affected rows
+    instead of raising, so one bad row does not fail the batch.
+
+    Args:
+        plan (Tuple[tuple, ...]): Output of compile_expression.
+        columns (Dict[str, np.ndarray]): Variable name -> 1-D float64 array
+            (all of equal length, or 0-d for values broadcast to every row).
+        time_budget (float): Wall-clock seconds allowed; defaults to MATH_EVAL_TIME_BUDGET.
+
+    Returns:
+        np.ndarray: Result per row.
+
+    Raises:
+        TimeoutError: If evaluation exceeds the time budget.
+        ValueError: If the expression uses a variable that is not bound.
+    """
+    import numpy as np  # Imported on first batch call; plain math_calculator never needs it
+
+    ufuncs = {
+        _checked_add: np.add,
+        _checked_sub: np.subtract,
+        _bounded_mul: np.multiply,
+        _checked_truediv: np.true_divide,
+        _checked_floordiv: np.floor_divide,
+        _checked_mod: np.mod,
+        _bounded_pow: np.power,
+        op.neg: np.negative,
+        op.pos: np.positive,
+    }
+    budget = MATH_EVAL_TIME_BUDGET if time_budget is None else time_budget
+    deadline = time.perf_counter() + budget
+    stack = []
+    with np.errstate(all="ignore"):
+        for code, payload in plan:
+            if code == _PUSH:
+                stack.append(np.float64(payload))
+                continue
+            if code == _LOAD:
+                if payload not in columns:
+                    raise ValueError(f"Unknown variable: {payload}")
+                stack.append(columns[payload])
+                continue
+            if time.perf_counter() > deadline:
+                raise TimeoutError(f"Evaluation exceeded time budget of {budget}s")
+            if code == _BINARY:
+                right = stack.pop()
+                stack[-1] = ufuncs[payload](stack[-1], right)
+            else:
+                stack[-1] = ufuncs[payload](stack[-1])
+    return stack[0]
+
+
+def _compact_number(value: float) -> Union[int, float, None]:
+    """Integral floats become ints; inf/nan become None."""
+    if not math.isfinite(value):
+        return None
+    if value.is_integer() and abs(value) < 2 ** 53:
+        return int(value)
+    return round(value, 10)
+
+
+def format_result(result) -> str:
+    """Formats an evaluation result; Decimal fallbacks are marked as approximate."""
+    if isinstance(result, Decimal):
+        return f"approximately {result:.{MATH_DECIMAL_PRECISION}E}"
+    return str(result)
 
 # -----------------------
 # Math calculator tool
@@ -61,6 +399,7 @@ def _eval_expr(node):
 def math_calculator(expression: str) -> str:
     """
     Safely evaluates a basic arithmetic expression.
+    Supports +, -, *, /, // (floor division), % (modulo), ** (power) and unary minus.
 
     Args:
         expression (str): Arithmetic expression (e.g., "(234 * 12) + 98").
@@ -70,10 +409,72 @@ def math_calculator(expression: str) -> str:
     """
     logger.info(f"[TOOL CALL] math_calculator invoked with expression: {expression}")
     try:
-        tree = ast.parse(expression, mode="eval")
-        result = _eval_expr(tree.body)
+        result = evaluate_expression(compile_expression(expression.strip()))
         logger.info(f"[TOOL SUCCESS] Math calculation result: {result}")
-        return f"Result: {result}"
+        return f"Result: {format_result(result)}"
     except Exception as e:
         logger.error(f"[TOOL ERROR] Math calculation failed: {str(e)}", exc_info=True)
         return f"Error evaluating expression: {str(e)}"
+
+
+# -----------------------
+# Batch math calculator tool
+# -----------------------
+@tool
+def math_batch_calculator(expression: str, variables: Dict[str, Union[float, List[float]]]) -> dict:
+    """
+    Evaluates one arithmetic formula over many inputs in a single call.
+    Use this instead of repeated math_calculator calls when the same formula
+    applies to a list of values (e.g. total cost for each of 500 items).
+
+    Args:
+        expression (str): Formula using variable names, e.g. "price * quantity * (1 - discount)".
+        variables (dict): Variable name -> list of values (one per row), or a single
+            number applied to every row, e.g. {"price": [499, 250], "quantity": [3, 4], "discount": 0.1}.
+
+    Returns:
+        dict:
+            - count (int): Number of rows evaluated
+            - results (list): Result per row, in input order (null where undefined, e.g. x/0)
+            - total, min, max (number): Aggregates over the defined results
+        On error:
+            - {"error": "<description>"}
+    """
+    logger.info(f"[TOOL CALL] math_batch_calculator invoked with expression: {expression}, variables: {list(variables)}")
+    try:
+        import numpy as np
+
+        plan = compile_expression(expression.strip())
+        missing = plan_variables(plan) - set(variables)
+        if missing:
+            raise ValueError(f"Missing values for variables: {', '.join(sorted(missing))}")
+
+        columns = {}
+        rows = None
+        for name, values in variables.items():
+            column = np.asarray(values, dtype=np.float64)
+            if column.ndim > 1:
+                raise ValueError(f"Variable '{name}' must be a number or a flat list of numbers")
+            if column.ndim == 1:
+                if rows is not None and len(column) != rows:
+                    raise ValueError(f"Variable '{name}' has {len(column)} values, expected {rows}")
+                rows = len(column)
+            columns[name] = column
+        rows = 1 if rows is None else rows
+        if rows > MATH_BATCH_MAX_ROWS:
+            raise ValueError(f"Too many rows: {rows} (limit {MATH_BATCH_MAX_ROWS})")
+
+        values = np.broadcast_to(evaluate_vectorized(plan, columns), (rows,))
+        finite = values[np.isfinite(values)]
+        result = {
+            "count": rows,
+            "results": [_compact_number(value) for value in values.tolist()],
+            "total": _compact_number(float(finite.sum())) if finite.size else None,
+            "min": _compact_number(float(finite.min())) if finite.size else None,
+            "max": _compact_number(float(finite.max())) if finite.size else None,
+        }
+        logger.info(f"[TOOL SUCCESS] Batch math evaluated {rows} rows, total: {result['total']}")
+        return result
+    except Exception as e:
+        logger.error(f"[TOOL ERROR] Batch math calculation failed: {str(e)}", exc_info=True)
+        return {"error": str(e)}
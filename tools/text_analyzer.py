@@ -3,13 +3,33 @@
 # Text analysis tool for LangChain agents.
 #
 # This module defines:
+#   - SentimentLexicon: Hashed term -> weight lexicon with a token trie for
+#                       multi-word phrases; loadable from large external files.
+#   - TextScanner: Single-pass accumulator computing word count, character count
+#                  and sentiment score with word-boundary-correct matching.
+#   - compute_text_stats: Runs one scan over a string.
+#   - analyze_stream: Same result over a file or chunk iterator with bounded memory.
+#   - analyze_documents: Per-document results plus totals for many documents,
+#                        sharded across a process pool.
 #   - text_analyzer: Computes word count, character count, and basic sentiment.
+#   - text_file_analyzer: Streams a (large) text file from TEXT_ANALYZER_ROOT through
+#                         the same analysis.
+#   - batch_text_analyzer: Tool wrapper around analyze_documents.
 #
 # Purpose:
 #   Provides structured analysis of text input and returns human-friendly results,
 #   handling errors gracefully.
 
-from langchain.tools import tool
+import atexit
+import codecs
+import multiprocessing
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+from langchain_core.tools import tool
 from logger_config import setup_logger
 
 # -----------------------
@@ -17,6 +37,401 @@ from logger_config import setup_logger
 # -----------------------
 logger = setup_logger(__name__)
 
+# -----------------------
+# Tokenizer
+# -----------------------
+# Words (letters/digits, with inner apostrophes such as "don't"), whitespace runs,
+# and punctuation runs. Whitespace delimits word_count chunks exactly like str.split();
+# punctuation ends any phrase being matched.
+_TOKEN_RE = re.compile(r"(?P<word>\w+(?:['’]\w+)*)|(?P<space>\s+)|(?P<punct>[^\w\s]+)")
+_TERM_KEY = None  # trie key holding the weight of a phrase ending at that node
+
+# Characters read per chunk in streaming mode
+TEXT_STREAM_CHUNK_SIZE = int(os.getenv("TEXT_STREAM_CHUNK_SIZE", str(1 << 20)))
+# Directory text_file_analyzer may read from (paths outside it are rejected)
+TEXT_ANALYZER_ROOT = os.getenv("TEXT_ANALYZER_ROOT", "transcripts")
+# Worker processes for batch analysis (default: one per CPU)
+TEXT_BATCH_WORKERS = int(os.getenv("TEXT_BATCH_WORKERS", str(os.cpu_count() or 1)))
+# Documents sent to a worker per task; larger shards amortize inter-process overhead
+TEXT_BATCH_CHUNK_SIZE = int(os.getenv("TEXT_BATCH_CHUNK_SIZE", "64"))
+# Below this many characters in total, batches run in-process (pool startup would dominate)
+TEXT_BATCH_MIN_PARALLEL_CHARS = int(os.getenv("TEXT_BATCH_MIN_PARALLEL_CHARS", "262144"))
+
+POSITIVE_KEYWORDS = ["good", "great", "happy", "excellent"]
+NEGATIVE_KEYWORDS = ["bad", "sad", "poor", "terrible"]
+
+
+def _tokenize_term(term: str) -> Tuple[str, ...]:
+    return tuple(match.group().lower() for match in re.finditer(r"\w+(?:['’]\w+)*", term))
+
+
+# -----------------------
+# Sentiment lexicon
+# -----------------------
+class SentimentLexicon:
+    """
+    Summary:
+        Term -> weight lexicon. Single words are matched with one dict lookup;
+        multi-word phrases are matched on a token trie (leftmost-longest), so a
+        phrase such as "not good" takes precedence over the word "good".
+
+    Args:
+        terms (Dict[str, float]): Term or phrase -> sentiment weight
+            (positive for positive sentiment, negative for negative).
+    """
+
+    def __init__(self, terms: Dict[str, float] = None):
+        self.words: Dict[str, float] = {}
+        self.trie: dict = {}
+        self.max_phrase_length = 1
+        for term, weight in (terms or {}).items():
+            self.add(term, weight)
+
+    def add(self, term: str, weight: float) -> None:
+        """Adds or replaces one term; phrases are split with the analyzer's tokenizer."""
+        tokens = _tokenize_term(term)
+        if not tokens:
+            return
+        if len(tokens) == 1:
+            self.words[tokens[0]] = weight
+            return
+        node = self.trie
+        for token in tokens:
+            node = node.setdefault(token, {})
+        node[_TERM_KEY] = weight
+        self.max_phrase_length = max(self.max_phrase_length, len(tokens))
+
+    def __len__(self) -> int:
+        return len(self.words) + self._count_phrases(self.trie)
+
+    def _count_phrases(self, node: dict) -> int:
+        return sum(
+            1 if key is _TERM_KEY else self._count_phrases(child)
+            for key, child in node.items()
+        )
+
+    @classmethod
+    def from_keywords(cls, positive: Iterable[str], negative: Iterable[str]) -> "SentimentLexicon":
+        """Builds a lexicon weighting each positive term +1 and each negative term -1."""
+        lexicon = cls()
+        for term in positive:
+            lexicon.add(term, 1.0)
+        for term in negative:
+            lexicon.add(term, -1.0)
+        return lexicon
+
+    @classmethod
+    def from_file(cls, path: str, polarity: Optional[float] = None, lexicon: "SentimentLexicon" = None) -> "SentimentLexicon":
+        """
+        Summary:
+            Loads terms from a text file, one per line. Blank lines and lines
+            starting with '#' or ';' are skipped.
+
+        Args:
+            path (str): Lexicon file path.
+            polarity (float): If given, every line is a bare term with this weight
+                (word-list format). Otherwise each line is "<term><TAB or space><weight>"
+                (AFINN-style; terms may contain spaces).
+            lexicon (SentimentLexicon): Existing lexicon to extend instead of a new one.
+
+        Returns:
+            SentimentLexicon: The loaded lexicon.
+        """
+        lexicon = lexicon if lexicon is not None else cls()
+        with open(path, encoding="utf-8", errors="replace") as handle:
+            for line_number, line in enumerate(handle, 1):
+                line = line.strip()
+                if not line or line[0] in "#;":
+                    continue
+                if polarity is not None:
+                    lexicon.add(line, polarity)
+                    continue
+                term, _, weight = line.rpartition("\t") if "\t" in line else line.rpartition(" ")
+                try:
+                    lexicon.add(term, float(weight))
+                except ValueError:
+                    logger.warning(f"Skipping malformed lexicon line {line_number} in {path}: {line!r}")
+        logger.info(f"Loaded sentiment lexicon from {path}: {len(lexicon)} terms")
+        return lexicon
+
+
+def _load_default_lexicon() -> SentimentLexicon:
+    lexicon = SentimentLexicon.from_keywords(POSITIVE_KEYWORDS, NEGATIVE_KEYWORDS)
+    path = os.getenv("SENTIMENT_LEXICON_PATH")
+    if path:
+        try:
+            SentimentLexicon.from_file(path, lexicon=lexicon)
+        except OSError as e:
+            logger.error(f"Could not load SENTIMENT_LEXICON_PATH={path}: {str(e)}")
+    return lexicon
+
+
+default_lexicon = _load_default_lexicon()
+
+
+# -----------------------
+# Single-pass scanner
+# -----------------------
+class TextScanner:
+    """
+    Summary:
+        Accumulates word count, character count and sentiment score over one
+        traversal of the text. Phrase candidates are buffered for at most
+        max_phrase_length tokens.
+
+    Args:
+        lexicon (SentimentLexicon): Lexicon to score against; defaults to default_lexicon.
+    """
+
+    def __init__(self, lexicon: SentimentLexicon = None):
+        self.lexicon = lexicon if lexicon is not None else default_lexicon
+        self.word_count = 0
+        self.character_count = 0
+        self.score = 0.0
+        self.matches = 0
+        self._in_chunk = False
+        self._pending: List[str] = []
+        self._carry = ""
+
+    def scan(self, text: str) -> "TextScanner":
+        """Consumes text that does not end mid-word; use feed() for arbitrary chunks."""
+        self.character_count += len(text)
+        phrases = bool(self.lexicon.trie)
+        words = self.lexicon.words
+        for match in _TOKEN_RE.finditer(text):
+            kind = match.lastgroup
+            if kind == "space":
+                self._in_chunk = False
+                continue
+            if not self._in_chunk:
+                self.word_count += 1
+                self._in_chunk = True
+            if kind == "punct":
+                if self._pending:
+                    self._resolve(final=True)
+                continue
+            token = match.group().lower()
+            if phrases:
+                self._pending.append(token)
+                if len(self._pending) >= self.lexicon.max_phrase_length:
+                    self._resolve(final=False)
+            else:
+                weight = words.get(token)
+                if weight is not None:
+                    self.score += weight
+                    self.matches += 1
+        return self
+
+    def feed(self, chunk: str) -> "TextScanner":
+        """
+        Consumes an arbitrary slice of a larger text. Everything after the chunk's
+        last whitespace is carried into the next call, so words split across chunk
+        boundaries are counted and matched once. A whitespace-free run longer than
+        TEXT_STREAM_CHUNK_SIZE is scanned as-is to keep memory bounded.
+        """
+        text = self._carry + chunk if self._carry else chunk
+        cut = max(text.rfind(" "), text.rfind("\n"), text.rfind("\t"), text.rfind("\r"))
+        if cut < 0 and len(text) <= TEXT_STREAM_CHUNK_SIZE:
+            self._carry = text
+            return self
+        if cut < 0:
+            cut = len(text) - 1
+        self._carry = text[cut + 1:]
+        return self.scan(text[:cut + 1])
+
+    def finish(self) -> dict:
+        """Resolves buffered tokens and returns the analyzer result dict."""
+        if self._carry:
+            carry, self._carry = self._carry, ""
+            self.scan(carry)
+        if self._pending:
+            self._resolve(final=True)
+        sentiment = "Neutral"
+        if self.score > 0:
+            sentiment = "Positive"
+        elif self.score < 0:
+            sentiment = "Negative"
+        return {
+            "word_count": self.word_count,
+            "character_count": self.character_count,
+            "sentiment": sentiment,
+        }
+
+    def _resolve(self, final: bool) -> None:
+        """Scores leftmost-longest matches at the head of the buffer."""
+        pending = self._pending
+        trie = self.lexicon.trie
+        words = self.lexicon.words
+        start = 0
+        limit = self.lexicon.max_phrase_length
+        while len(pending) - start >= (1 if final else limit):
+            node = trie
+            length, weight = 0, None
+            for offset in range(start, min(len(pending), start + limit)):
+                node = node.get(pending[offset])
+                if node is None:
+                    break
+                if _TERM_KEY in node:
+                    length, weight = offset - start + 1, node[_TERM_KEY]
+            if weight is None:
+                length, weight = 1, words.get(pending[start])
+            if weight is not None:
+                self.score += weight
+                self.matches += 1
+            start += length
+        del pending[:start]
+
+
+def compute_text_stats(text: str, lexicon: SentimentLexicon = None) -> dict:
+    """
+    Computes word count, character count and sentiment in one pass over ``text``.
+
+    Args:
+        text (str): Input text.
+        lexicon (SentimentLexicon): Lexicon to use; defaults to default_lexicon.
+
+    Returns:
+        dict: word_count, character_count, sentiment.
+    """
+    return TextScanner(lexicon).scan(text).finish()
+
+
+def analyze_stream(
+    source: Union[str, os.PathLike, Iterable[Union[str, bytes]]],
+    lexicon: SentimentLexicon = None,
+    chunk_size: int = None,
+    encoding: str = "utf-8",
+) -> dict:
+    """
+    Computes the text_analyzer result over a file or an iterator of chunks without
+    holding the whole text in memory.
+
+    Args:
+        source: File path (read incrementally in ``chunk_size`` characters) or an
+            iterable of str/bytes chunks (bytes are decoded incrementally, so a
+            multi-byte character may straddle chunks).
+        lexicon (SentimentLexicon): Lexicon to use; defaults to default_lexicon.
+        chunk_size (int): Characters per read for file sources; defaults to
+            TEXT_STREAM_CHUNK_SIZE.
+        encoding (str): Encoding for file paths and bytes chunks.
+
+    Returns:
+        dict: word_count, character_count, sentiment, identical to compute_text_stats
+            on the concatenated text.
+    """
+    scanner = TextScanner(lexicon)
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, encoding=encoding, errors="replace", newline="") as handle:
+            for chunk in iter(partial(handle.read, chunk_size or TEXT_STREAM_CHUNK_SIZE), ""):
+                scanner.feed(chunk)
+        return scanner.finish()
+
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    for chunk in source:
+        scanner.feed(decoder.decode(chunk) if isinstance(chunk, bytes) else chunk)
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        scanner.feed(tail)
+    return scanner.finish()
+
+
+# -----------------------
+# Parallel batch analysis
+# -----------------------
+_worker_lexicon: Optional[SentimentLexicon] = None
+_shared_pools: Dict[int, ProcessPoolExecutor] = {}
+_pools_lock = threading.Lock()
+# Workers are never forked from the agent process: it already runs threads (log
+# listener, tool pool, memory writer, server loop) and fork only copies the caller's
+_MP_CONTEXT = multiprocessing.get_context(
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+
+
+def _init_worker(lexicon: Optional[SentimentLexicon]) -> None:
+    global _worker_lexicon
+    _worker_lexicon = lexicon
+
+
+def _analyze_shard(documents: List[str]) -> List[dict]:
+    """Worker entry point: analyzes one shard of documents."""
+    return [compute_text_stats(document, _worker_lexicon) for document in documents]
+
+
+def _get_shared_pool(workers: int) -> ProcessPoolExecutor:
+    """Returns a reusable pool (default lexicon) so repeated batches skip process startup."""
+    with _pools_lock:
+        pool = _shared_pools.get(workers)
+        if pool is None:
+            pool = ProcessPoolExecutor(
+                max_workers=workers, mp_context=_MP_CONTEXT, initializer=_init_worker, initargs=(None,)
+            )
+            _shared_pools[workers] = pool
+        return pool
+
+
+@atexit.register
+def shutdown_batch_pools() -> None:
+    """Stops the shared worker pools."""
+    with _pools_lock:
+        for pool in _shared_pools.values():
+            pool.shutdown(wait=True, cancel_futures=True)
+        _shared_pools.clear()
+
+
+def _summarize(results: List[dict]) -> dict:
+    sentiment_counts = {"Positive": 0, "Negative": 0, "Neutral": 0}
+    for result in results:
+        sentiment_counts[result["sentiment"]] += 1
+    return {
+        "documents": len(results),
+        "word_count": sum(result["word_count"] for result in results),
+        "character_count": sum(result["character_count"] for result in results),
+        "sentiment_counts": sentiment_counts,
+    }
+
+
+def analyze_documents(
+    documents: List[str],
+    workers: int = None,
+    chunk_size: int = None,
+    lexicon: SentimentLexicon = None,
+) -> dict:
+    """
+    Summary:
+        Analyzes many documents, sharding them across a process pool so the work
+        uses every core instead of the agent's thread.
+
+    Args:
+        documents (List[str]): Texts to analyze.
+        workers (int): Worker processes; defaults to TEXT_BATCH_WORKERS. 1 runs in-process.
+        chunk_size (int): Documents per task; defaults to TEXT_BATCH_CHUNK_SIZE.
+        lexicon (SentimentLexicon): Custom lexicon; runs on a dedicated pool
+            initialized with it. Defaults to the shared pool and default_lexicon.
+
+    Returns:
+        dict:
+            - results (list): Per-document word_count, character_count, sentiment (input order)
+            - totals (dict): documents, word_count, character_count, sentiment_counts
+    """
+    workers = max(1, workers or TEXT_BATCH_WORKERS)
+    chunk_size = max(1, chunk_size or TEXT_BATCH_CHUNK_SIZE)
+    shards = [documents[i:i + chunk_size] for i in range(0, len(documents), chunk_size)]
+
+    if workers == 1 or len(shards) < 2 or sum(map(len, documents)) < TEXT_BATCH_MIN_PARALLEL_CHARS:
+        results = [compute_text_stats(document, lexicon) for document in documents]
+    elif lexicon is None:
+        pool = _get_shared_pool(workers)
+        results = [result for shard in pool.map(_analyze_shard, shards) for result in shard]
+    else:
+        with ProcessPoolExecutor(
+            max_workers=workers, mp_context=_MP_CONTEXT, initializer=_init_worker, initargs=(lexicon,)
+        ) as pool:
+            results = [result for shard in pool.map(_analyze_shard, shards) for result in shard]
+
+    return {"results": results, "totals": _summarize(results)}
+
+
 # -----------------------
 # Text analyzer tool
 # -----------------------
@@ -38,31 +453,83 @@ def text_analyzer(text: str) -> dict:
     """
     logger.info(f"[TOOL CALL] text_analyzer invoked with text length: {len(text)}")
     try:
-        word_count = len(text.split())
-        char_count = len(text)
+        result = compute_text_stats(text)
+        logger.info(f"[TOOL SUCCESS] Text analysis complete: {result}")
+        return result
 
-        positive_keywords = ["good", "great", "happy", "excellent"]
-        negative_keywords = ["bad", "sad", "poor", "terrible"]
+    except Exception as e:
+        logger.error(f"[TOOL ERROR] Text analysis failed: {str(e)}", exc_info=True)
+        return {"error": str(e)}
 
-        text_lower = text.lower()
-        pos = sum(word in text_lower for word in positive_keywords)
-        neg = sum(word in text_lower for word in negative_keywords)
 
-        sentiment = "Neutral"
-        if pos > neg:
-            sentiment = "Positive"
-        elif neg > pos:
-            sentiment = "Negative"
+# -----------------------
+# Streaming file analyzer tool
+# -----------------------
+def _resolve_text_path(path: str) -> str:
+    """Resolves ``path`` under TEXT_ANALYZER_ROOT, rejecting anything that escapes it."""
+    root = os.path.realpath(TEXT_ANALYZER_ROOT)
+    resolved = os.path.realpath(os.path.join(root, path))
+    if os.path.commonpath([root, resolved]) != root:
+        raise PermissionError(f"Path is outside the allowed directory: {path}")
+    if not os.path.isfile(resolved):
+        raise FileNotFoundError(f"No such file: {path}")
+    return resolved
 
-        result = {
-            "word_count": word_count,
-            "character_count": char_count,
-            "sentiment": sentiment
-        }
 
-        logger.info(f"[TOOL SUCCESS] Text analysis complete: {result}")
+@tool
+def text_file_analyzer(path: str) -> dict:
+    """
+    Analyzes a large text file (e.g. a call transcript) for word count, character
+    count and sentiment, reading it incrementally. Use this when the text is a
+    file name rather than text included in the conversation.
+
+    Args:
+        path (str): File name relative to the transcripts directory.
+
+    Returns:
+        dict:
+            - word_count (int): Number of words in the file
+            - character_count (int): Number of characters in the file
+            - sentiment (str): "Positive", "Negative", or "Neutral"
+        On error:
+            - {"error": "<description>"}
+    """
+    logger.info(f"[TOOL CALL] text_file_analyzer invoked with path: {path}")
+    try:
+        result = analyze_stream(_resolve_text_path(path))
+        logger.info(f"[TOOL SUCCESS] File text analysis complete: {result}")
         return result
+    except Exception as e:
+        logger.error(f"[TOOL ERROR] File text analysis failed: {str(e)}", exc_info=True)
+        return {"error": str(e)}
 
+
+# -----------------------
+# Batch text analyzer tool
+# -----------------------
+@tool
+def batch_text_analyzer(texts: List[str]) -> dict:
+    """
+    Analyzes many texts (e.g. customer reviews) at once for word count,
+    character count and sentiment, with totals across all of them. Use this
+    instead of repeated text_analyzer calls when there is more than one text.
+
+    Args:
+        texts (List[str]): Texts to analyze.
+
+    Returns:
+        dict:
+            - results (list): Per-text word_count, character_count, sentiment, in input order
+            - totals (dict): documents, word_count, character_count,
+              sentiment_counts {Positive, Negative, Neutral}
+        On error:
+            - {"error": "<description>"}
+    """
+    logger.info(f"[TOOL CALL] batch_text_analyzer invoked with {len(texts)} texts")
+    try:
+        result = analyze_documents(texts)
+        logger.info(f"[TOOL SUCCESS] Batch text analysis complete: {result['totals']}")
+        return result
     except Exception as e:
-        logger.error(f"[TOOL ERROR] Text analysis failed: {str(e)}", exc_info=True)
+        logger.error(f"[TOOL ERROR] Batch text analysis failed: {str(e)}", exc_info=True)
         return {"error": str(e)}
@@ -5,26 +5,378 @@
 # This module defines:
 #   - weather_tool: Fetches live weather data and provides human-friendly summaries
 #                   including temperature, description, and clothing recommendations.
+#   - WeatherCache: Thread-safe TTL + LRU cache with request coalescing, used by
+#                   weather_tool so repeated lookups for the same city skip the API.
+#   - Pooled HTTP clients: a shared keep-alive requests.Session for sync calls and a
+#                   per-event-loop httpx.AsyncClient for the async tool variant.
+#   - weather_batch_tool: Fetches several cities concurrently and returns one structured
+#                   result, so multi-city queries need a single tool round.
+#   - Every upstream request goes through resilience.weather_guard (shared rate limit,
+#                   jittered retries on 429/5xx, circuit breaker).
+#   - Lookups and upstream requests are traced as weather.lookup / weather.http spans.
 #
 # Purpose:
 #   Enables a Weather Agent to provide actionable weather advice within a multi-agent LLM system.
 #   Handles API errors gracefully and returns structured, readable results.
 
+import asyncio
+import contextvars
 import os
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+import httpx
 import requests
-from langchain.tools import tool
+from requests.adapters import HTTPAdapter
+from langchain_core.tools import StructuredTool
 from logger_config import setup_logger
+from resilience import weather_guard
+from tracing import annotate, span
 
 # -----------------------
 # Logger setup
 # -----------------------
 logger = setup_logger(__name__)
 
+# -----------------------
+# Cache configuration
+# -----------------------
+WEATHER_CACHE_TTL = float(os.getenv("WEATHER_CACHE_TTL", "600"))
+WEATHER_CACHE_MAX_SIZE = int(os.getenv("WEATHER_CACHE_MAX_SIZE", "256"))
+
+# -----------------------
+# HTTP client configuration
+# -----------------------
+WEATHER_API_URL = "https://api.openweathermap.org/data/2.5/weather"
+WEATHER_HTTP_POOL_SIZE = int(os.getenv("WEATHER_HTTP_POOL_SIZE", "20"))
+WEATHER_HTTP_CONNECT_TIMEOUT = float(os.getenv("WEATHER_HTTP_CONNECT_TIMEOUT", "3.05"))
+WEATHER_HTTP_READ_TIMEOUT = float(os.getenv("WEATHER_HTTP_READ_TIMEOUT", "10"))
+
+# Upper bound on cities per batch call; keeps one tool call from exhausting the pool/quota.
+WEATHER_BATCH_MAX_CITIES = int(os.getenv("WEATHER_BATCH_MAX_CITIES", "20"))
+
+
+class WeatherApiError(Exception):
+    """Raised when OpenWeatherMap answers with a non-200 ``cod`` payload."""
+
+
+class WeatherLookupCancelled(Exception):
+    """Raised to callers coalesced onto a lookup that was cancelled or interrupted upstream."""
+
+
+# -----------------------
+# Weather cache
+# -----------------------
+class WeatherCache:
+    """
+    Summary:
+        TTL + LRU cache for weather payloads keyed by normalized city name.
+        Concurrent misses for the same city share a single upstream request.
+
+    Args:
+        ttl (float): Seconds an entry stays fresh.
+        max_size (int): Maximum number of cities kept before LRU eviction.
+    """
+
+    def __init__(self, ttl: float = WEATHER_CACHE_TTL, max_size: int = WEATHER_CACHE_MAX_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._coalesced = 0
+        self._evictions = 0
+        # Strong references to detached async fetches until they settle
+        self._tasks: set = set()
+
+    @staticmethod
+    def normalize(city: str) -> str:
+        """Collapses whitespace and case so "new  Delhi" and "New Delhi" share an entry."""
+        return " ".join(city.split()).casefold()
+
+    def get_or_fetch(self, city: str, fetch: Callable[[str], dict]) -> dict:
+        """
+        Summary:
+            Returns the cached payload for ``city`` or calls ``fetch(city)`` once,
+            sharing the result with any concurrent callers asking for the same city.
+
+        Args:
+            city (str): City name as given by the caller.
+            fetch (Callable[[str], dict]): Upstream loader; exceptions are propagated
+                to every waiting caller and nothing is cached.
+
+        Returns:
+            dict: Weather payload.
+        """
+        key, data, future, leader = self._claim(city)
+        if future is None:
+            return data
+        if not leader:
+            return future.result()
+        try:
+            data = fetch(city)
+        except BaseException as e:
+            self._fail(key, future, e)
+            raise
+        self._store(key, future, data)
+        return data
+
+    async def aget_or_fetch(self, city: str, fetch: Callable[[str], Awaitable[dict]]) -> dict:
+        """
+        Summary:
+            Async counterpart of get_or_fetch. Coalesces with sync and async callers
+            alike, including callers running on other threads or event loops.
+            The upstream fetch runs as its own task, so cancelling the caller that
+            started it (e.g. a turn timeout) does not cancel it for the others.
+
+        Args:
+            city (str): City name as given by the caller.
+            fetch (Callable[[str], Awaitable[dict]]): Async upstream loader.
+
+        Returns:
+            dict: Weather payload.
+        """
+        key, data, future, leader = self._claim(city)
+        if future is None:
+            return data
+        if not leader:
+            return await asyncio.wrap_future(future)
+        task = asyncio.ensure_future(fetch(city))
+        self._tasks.add(task)
+        task.add_done_callback(lambda done: self._settle(key, future, done))
+        return await asyncio.shield(task)
+
+    def _settle(self, key: str, future: Future, task: "asyncio.Future") -> None:
+        """Resolves the shared future from a finished async fetch task."""
+        self._tasks.discard(task)
+        if task.cancelled():
+            self._fail(key, future, asyncio.CancelledError())
+        elif task.exception() is not None:
+            self._fail(key, future, task.exception())
+        else:
+            self._store(key, future, task.result())
+
+    def _claim(self, city: str) -> Tuple[str, Optional[dict], Optional[Future], bool]:
+        """Returns (key, cached data, in-flight future, is_leader) for a lookup."""
+        key = self.normalize(city)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return key, entry[1], None, False
+            future = self._inflight.get(key)
+            if future is not None:
+                self._coalesced += 1
+                return key, None, future, False
+            self._misses += 1
+            future = Future()
+            # A running future cannot be cancelled, so a waiter being cancelled
+            # (wrap_future propagates cancellation) never reaches the other callers
+            future.set_running_or_notify_cancel()
+            self._inflight[key] = future
+            return key, None, future, True
+
+    def _store(self, key: str, future: Future, data: dict) -> None:
+        with self._lock:
+            self._inflight.pop(key, None)
+            self._entries[key] = (time.monotonic() + self.ttl, data)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+        future.set_result(data)
+
+    def _fail(self, key: str, future: Future, error: BaseException) -> None:
+        with self._lock:
+            self._inflight.pop(key, None)
+        if not isinstance(error, Exception):
+            # CancelledError / KeyboardInterrupt belong to the caller that hit them; waiters
+            # get an ordinary error their `except Exception` handlers understand
+            error = WeatherLookupCancelled(f"Weather lookup for {key!r} was cancelled")
+        future.set_exception(error)
+
+    def clear(self) -> None:
+        """Drops all cached entries; in-flight requests are left to complete."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Returns hit/miss/coalesced/eviction counters and the current size."""
+        with self._lock:
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "coalesced": self._coalesced,
+                "evictions": self._evictions,
+                "size": len(self._entries),
+            }
+
+
+weather_cache = WeatherCache()
+
+
+# -----------------------
+# Pooled HTTP clients
+# -----------------------
+def _build_session() -> requests.Session:
+    """Creates a keep-alive session whose connection pool is sized for concurrent tool calls."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=WEATHER_HTTP_POOL_SIZE)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+http_session = _build_session()
+
+# One AsyncClient per event loop: httpx connections cannot be shared across loops.
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _get_async_client() -> httpx.AsyncClient:
+    """Returns the pooled AsyncClient bound to the running event loop."""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = httpx.AsyncClient(
+            timeout=httpx.Timeout(WEATHER_HTTP_READ_TIMEOUT, connect=WEATHER_HTTP_CONNECT_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=WEATHER_HTTP_POOL_SIZE,
+                max_keepalive_connections=WEATHER_HTTP_POOL_SIZE,
+            ),
+        )
+        _async_clients[loop] = client
+    return client
+
+
+async def aclose_http_clients() -> None:
+    """Closes the sync session and the AsyncClient of the running loop (call on shutdown)."""
+    http_session.close()
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+# -----------------------
+# Upstream fetch
+# -----------------------
+def _request_params(city: str) -> dict:
+    """Builds OpenWeatherMap query params; raises ValueError if the API key is missing."""
+    api_key = os.getenv("WEATHER_API_KEY")
+    if not api_key:
+        raise ValueError("WEATHER_API_KEY environment variable not set.")
+    return {"q": city, "appid": api_key, "units": "metric"}
+
+
+def _check_payload(data: dict) -> dict:
+    if data.get("cod") != 200:
+        raise WeatherApiError(data.get("message", "Unknown error"))
+    return data
+
+
+def _fetch_weather(city: str) -> dict:
+    """
+    Fetches the raw OpenWeatherMap payload for a city over the pooled session.
+
+    Args:
+        city (str): City name.
+
+    Returns:
+        dict: Decoded JSON payload with ``cod == 200``.
+
+    Raises:
+        ValueError: If WEATHER_API_KEY is not set.
+        WeatherApiError: If the API reports an error in the payload.
+        requests.HTTPError: For HTTP errors left after weather_guard's retries.
+        resilience.CircuitOpenError / RateLimitTimeout: If the API is down or over quota.
+    """
+    params = _request_params(city)
+    logger.debug("Making API request to OpenWeatherMap for city: %s", city)
+    annotate(cache_hit=False)
+    with span("weather.http"):
+        response = weather_guard.call(_get, params)
+    return _check_payload(response.json())
+
+
+def _get(params: dict) -> requests.Response:
+    response = http_session.get(
+        WEATHER_API_URL,
+        params=params,
+        timeout=(WEATHER_HTTP_CONNECT_TIMEOUT, WEATHER_HTTP_READ_TIMEOUT),
+    )
+    response.raise_for_status()
+    return response
+
+
+async def _afetch_weather(city: str) -> dict:
+    """Async counterpart of _fetch_weather using the loop's pooled AsyncClient."""
+    params = _request_params(city)
+    logger.debug("Making async API request to OpenWeatherMap for city: %s", city)
+    annotate(cache_hit=False)
+    with span("weather.http"):
+        response = await weather_guard.acall(_aget, params)
+    return _check_payload(response.json())
+
+
+async def _aget(params: dict) -> httpx.Response:
+    response = await _get_async_client().get(WEATHER_API_URL, params=params)
+    response.raise_for_status()
+    return response
+
+
+def _lookup(city: str) -> dict:
+    # One weather.lookup span per city; the fetchers mark it as a miss, so a cache hit or
+    # a lookup coalesced onto another caller's request keeps cache_hit=True
+    with span("weather.lookup", cache_hit=True):
+        return weather_cache.get_or_fetch(city, _fetch_weather)
+
+
+async def _alookup(city: str) -> dict:
+    with span("weather.lookup", cache_hit=True):
+        return await weather_cache.aget_or_fetch(city, _afetch_weather)
+
+
+def _clothing_for(temp: float) -> str:
+    """Clothing recommendation based on temperature."""
+    if temp >= 30:
+        return "Wear light cotton clothes."
+    if temp >= 20:
+        return "Light clothing with a jacket."
+    if temp >= 10:
+        return "Wear warm clothes."
+    return "Wear heavy winter clothing."
+
+
+def _summarize_weather(city: str, data: dict) -> dict:
+    """Extracts the fields the agents use from a payload, plus the clothing recommendation."""
+    temp = data["main"]["temp"]
+    return {
+        "city": city,
+        "temperature": temp,
+        "description": data["weather"][0]["description"],
+        "clothing": _clothing_for(temp),
+    }
+
+
+def _format_weather(city: str, data: dict) -> str:
+    """Renders a payload as the one-line summary with a clothing recommendation."""
+    summary = _summarize_weather(city, data)
+    return f"{city}: {summary['temperature']}°C, {summary['description']}. {summary['clothing']}"
+
+
 # -----------------------
 # Weather tool
 # -----------------------
-@tool
-def weather_tool(city: str) -> str:
+def _weather_tool(city: str) -> str:
     """
     Fetches real-time weather data for a given city and provides clothing recommendations.
 
@@ -41,38 +393,140 @@ def weather_tool(city: str) -> str:
     """
     logger.info(f"[TOOL CALL] weather_tool invoked for city: {city}")
     try:
-        api_key = os.getenv("WEATHER_API_KEY")
-        if not api_key:
-            raise ValueError("WEATHER_API_KEY environment variable not set.")
-
-        url = f"https://api.openweathermap.org/data/2.5/weather?q={city}&appid={api_key}&units=metric"
-        logger.debug(f"Making API request to OpenWeatherMap for city: {city}")
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-
-        if data.get("cod") != 200:
-            message = data.get("message", "Unknown error")
-            logger.error(f"[TOOL ERROR] API returned error for city {city}: {message}")
-            return f"Error: {message}"
-
-        temp = data["main"]["temp"]
-        desc = data["weather"][0]["description"]
-
-        # Clothing recommendation based on temperature
-        if temp >= 30:
-            clothing = "Wear light cotton clothes."
-        elif temp >= 20:
-            clothing = "Light clothing with a jacket."
-        elif temp >= 10:
-            clothing = "Wear warm clothes."
-        else:
-            clothing = "Wear heavy winter clothing."
-
-        result = f"{city}: {temp}°C, {desc}. {clothing}"
+        data = _lookup(city)
+        result = _format_weather(city, data)
         logger.info(f"[TOOL SUCCESS] Weather data retrieved: {result}")
         return result
+    except WeatherApiError as e:
+        logger.error(f"[TOOL ERROR] API returned error for city {city}: {e}")
+        return f"Error: {e}"
+    except Exception as e:
+        logger.error(f"[TOOL ERROR] Weather tool failed: {str(e)}", exc_info=True)
+        return f"Weather Error: {e}"
+
 
+async def _aweather_tool(city: str) -> str:
+    """Async variant of weather_tool; awaited when the agent runs on an event loop."""
+    logger.info(f"[TOOL CALL] weather_tool (async) invoked for city: {city}")
+    try:
+        data = await _alookup(city)
+        result = _format_weather(city, data)
+        logger.info(f"[TOOL SUCCESS] Weather data retrieved: {result}")
+        return result
+    except WeatherApiError as e:
+        logger.error(f"[TOOL ERROR] API returned error for city {city}: {e}")
+        return f"Error: {e}"
     except Exception as e:
         logger.error(f"[TOOL ERROR] Weather tool failed: {str(e)}", exc_info=True)
         return f"Weather Error: {e}"
+
+
+# Single tool exposing both entry points: invoke() runs the pooled sync path,
+# ainvoke() awaits the async path instead of blocking a worker thread.
+weather_tool = StructuredTool.from_function(
+    func=_weather_tool,
+    coroutine=_aweather_tool,
+    name="weather_tool",
+    description=_weather_tool.__doc__,
+)
+
+
+# -----------------------
+# Multi-city batch tool
+# -----------------------
+def _dedupe_cities(cities: List[str]) -> List[str]:
+    """Drops blanks and repeats (by normalized name), keeping the caller's order and spelling."""
+    seen = set()
+    unique = []
+    for city in cities:
+        key = WeatherCache.normalize(city)
+        if key and key not in seen:
+            seen.add(key)
+            unique.append(city.strip())
+    return unique
+
+
+def _batch_entry(city: str, outcome) -> dict:
+    """Turns a fetched payload or the exception raised for it into one result entry."""
+    if isinstance(outcome, WeatherApiError):
+        logger.error(f"[TOOL ERROR] API returned error for city {city}: {outcome}")
+        return {"city": city, "error": str(outcome)}
+    if isinstance(outcome, asyncio.CancelledError):
+        logger.error(f"[TOOL ERROR] Weather lookup cancelled for city {city}")
+        return {"city": city, "error": "Weather Error: lookup was cancelled"}
+    if isinstance(outcome, BaseException):
+        logger.error(f"[TOOL ERROR] Weather lookup failed for city {city}: {outcome}")
+        return {"city": city, "error": f"Weather Error: {outcome}"}
+    return _summarize_weather(city, outcome)
+
+
+def _weather_batch_tool(cities: List[str]) -> dict:
+    """
+    Fetches real-time weather for several cities at once and provides clothing
+    recommendations for each. Use this instead of repeated single-city calls
+    when the user asks about or compares more than one location.
+
+    Args:
+        cities (List[str]): City names, e.g. ["Delhi", "Chandigarh", "Shimla"].
+
+    Returns:
+        dict:
+            - results (list): One entry per city, in request order, with
+              city, temperature (°C), description and clothing,
+              or city and error if that city could not be fetched
+        On error:
+            - {"error": "<description>"}
+    """
+    logger.info(f"[TOOL CALL] weather_batch_tool invoked for cities: {cities}")
+    unique = _dedupe_cities(cities)
+    if not unique:
+        return {"error": "No cities provided."}
+    if len(unique) > WEATHER_BATCH_MAX_CITIES:
+        return {"error": f"Too many cities; at most {WEATHER_BATCH_MAX_CITIES} per request."}
+
+    def lookup(city: str):
+        try:
+            return _lookup(city)
+        except Exception as e:
+            return e
+
+    with ThreadPoolExecutor(max_workers=min(len(unique), WEATHER_HTTP_POOL_SIZE)) as executor:
+        # Each lookup keeps the caller's context (priority lane, callbacks)
+        futures = [executor.submit(contextvars.copy_context().run, lookup, city) for city in unique]
+        outcomes = [future.result() for future in futures]
+
+    result = {"results": [_batch_entry(city, outcome) for city, outcome in zip(unique, outcomes)]}
+    logger.info(f"[TOOL SUCCESS] Batch weather data retrieved for {len(unique)} cities")
+    return result
+
+
+async def _aweather_batch_tool(cities: List[str]) -> dict:
+    """Async variant of weather_batch_tool; all lookups share the running event loop."""
+    logger.info(f"[TOOL CALL] weather_batch_tool (async) invoked for cities: {cities}")
+    unique = _dedupe_cities(cities)
+    if not unique:
+        return {"error": "No cities provided."}
+    if len(unique) > WEATHER_BATCH_MAX_CITIES:
+        return {"error": f"Too many cities; at most {WEATHER_BATCH_MAX_CITIES} per request."}
+
+    outcomes = await asyncio.gather(
+        *(_alookup(city) for city in unique),
+        return_exceptions=True,
+    )
+    # gather returns a child's CancelledError as an outcome; if it is this batch that
+    # is being cancelled, stop here instead of reporting per-city errors
+    task = asyncio.current_task()
+    if task is not None and task.cancelling():
+        raise asyncio.CancelledError()
+
+    result = {"results": [_batch_entry(city, outcome) for city, outcome in zip(unique, outcomes)]}
+    logger.info(f"[TOOL SUCCESS] Batch weather data retrieved for {len(unique)} cities")
+    return result
+
+
+weather_batch_tool = StructuredTool.from_function(
+    func=_weather_batch_tool,
+    coroutine=_aweather_batch_tool,
+    name="weather_batch_tool",
+    description=_weather_batch_tool.__doc__,
+)
@@ -0,0 +1,449 @@
+# tracing.py
+# ----------
+# Lightweight per-turn tracing: one span per stage of an agent turn.
+#
+# This module defines:
+#   - span / traced / annotate: Open a span around a block or function (sync, async,
+#                               generator or async generator) and add attributes to the
+#                               current one (token counts, cache hits, ...).
+#   - StageMetrics: Per-stage duration histograms, p50/p99 over a recent window, error,
+#                   token and cache-hit counters; rendered as Prometheus text.
+#   - JsonlSpanExporter: Appends finished traces to a JSONL file, one span per line.
+#   - tracer: Shared tracer (metrics for every span, JSONL for sampled traces).
+#
+# Stages recorded by the agents:
+#   turn.core / turn.weather    a whole memory-enabled turn (attribute fast_path when no LLM ran)
+#   memory.retrieve             profile + optional search (attributes searched, cache_hit)
+#   memory.search               the memory backend's similarity search
+#   memory.save / memory.write  queueing an interaction / the background backend write
+#   llm                         one Gemini call incl. retries (input/output tokens, cache_hit)
+#   tool.<name>                 one tool call
+#   weather.lookup / weather.http   cached city lookup (cache_hit) / OpenWeatherMap request
+#
+# Purpose:
+#   The logs only say that a turn was slow. Spans say where the time went: memory,
+#   the model, a specific tool or the save. Metrics cover every span (they are a few
+#   counter updates); full span records are written for TRACE_SAMPLE_RATE of the
+#   turns so the file export stays cheap under load.
+
+import asyncio
+import functools
+import inspect
+import json
+import os
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional
+
+from logger_config import setup_logger
+
+logger = setup_logger(__name__)
+
+# -----------------------
+# Tracing configuration
+# -----------------------
+TRACE_ENABLED = os.getenv("TRACE_ENABLED", "1").lower() not in ("0", "false", "no")
+# Fraction of traces written to TRACE_JSONL_PATH (metrics always cover every span)
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0.1"))
+TRACE_JSONL_PATH = os.getenv("TRACE_JSONL_PATH", "traces.jsonl")
+# Most recent durations kept per stage for p50/p99
+TRACE_WINDOW_SIZE = int(os.getenv("TRACE_WINDOW_SIZE", "2048"))
+
+# Histogram bucket upper bounds in seconds
+_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+_QUANTILES = (0.5, 0.9, 0.99)
+
+
+class Span:
+    """One timed stage. Attributes are free-form JSON-serializable values."""
+
+    __slots__ = ("name", "trace", "span_id", "parent_id", "start_time", "duration", "status", "attributes", "_t0")
+
+    def __init__(self, name: str, trace: "_Trace", parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.name = name
+        self.trace = trace
+        self.span_id = "%016x" % random.getrandbits(64)
+        self.parent_id = parent_id
+        self.start_time = time.time()
+        self.duration = 0.0
+        self.status = "ok"
+        self.attributes = attributes
+        self._t0 = time.perf_counter()
+
+    def set(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": self.start_time,
+            "duration_ms": round(self.duration * 1000, 3),
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+
+class _NoopSpan:
+    def set(self, **attributes: Any) -> None:
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class _Trace:
+    __slots__ = ("trace_id", "sampled", "spans", "exported")
+
+    def __init__(self, sampled: bool):
+        self.trace_id = "%032x" % random.getrandbits(128)
+        self.sampled = sampled
+        self.spans: List[Span] = []
+        self.exported = False
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+# -----------------------
+# Metrics
+# -----------------------
+class _StageStats:
+    __slots__ = ("count", "errors", "total", "buckets", "window", "tokens", "cache")
+
+    def __init__(self, window: int):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.buckets = [0] * len(_BUCKETS)
+        self.window: Deque[float] = deque(maxlen=window)
+        self.tokens = {"input": 0, "output": 0}
+        self.cache = {"hit": 0, "miss": 0}
+
+
+def _quantile(ordered: List[float], q: float) -> float:
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class StageMetrics:
+    """
+    Summary:
+        Aggregates finished spans by name (stage).
+
+    Args:
+        window (int): Most recent durations kept per stage for quantiles.
+    """
+
+    def __init__(self, window: int = TRACE_WINDOW_SIZE):
+        self.window = window
+        self._lock = threading.Lock()
+        self._stages: Dict[str, _StageStats] = {}
+
+    def record(self, span: Span) -> None:
+        with self._lock:
+            stats = self._stages.get(span.name)
+            if stats is None:
+                stats = self._stages[span.name] = _StageStats(self.window)
+            stats.count += 1
+            stats.total += span.duration
+            stats.window.append(span.duration)
+            for i, bound in enumerate(_BUCKETS):
+                if span.duration <= bound:
+                    stats.buckets[i] += 1
+                    break
+            if span.status != "ok":
+                stats.errors += 1
+            attributes = span.attributes
+            for kind in ("input", "output"):
+                tokens = attributes.get(f"{kind}_tokens")
+                if isinstance(tokens, int):
+                    stats.tokens[kind] += tokens
+            if "cache_hit" in attributes:
+                stats.cache["hit" if attributes["cache_hit"] else "miss"] += 1
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """Returns count, errors, mean/p50/p99 ms (recent window), tokens and cache counts per stage."""
+        with self._lock:
+            snapshot = {
+                name: (stats.count, stats.errors, stats.total, sorted(stats.window), dict(stats.tokens), dict(stats.cache))
+                for name, stats in self._stages.items()
+            }
+        result = {}
+        for name, (count, errors, total, window, tokens, cache) in sorted(snapshot.items()):
+            entry = {
+                "count": count,
+                "errors": errors,
+                "mean_ms": round(total / count * 1000, 3) if count else 0.0,
+                "p50_ms": round(_quantile(window, 0.5) * 1000, 3),
+                "p99_ms": round(_quantile(window, 0.99) * 1000, 3),
+            }
+            if any(tokens.values()):
+                entry["tokens"] = tokens
+            if any(cache.values()):
+                entry["cache"] = cache
+            result[name] = entry
+        return result
+
+    def render_prometheus(self) -> str:
+        """Returns the metrics in the Prometheus text exposition format (0.0.4)."""
+        with self._lock:
+            stages = {
+                name: (stats.count, stats.errors, stats.total, list(stats.buckets), sorted(stats.window),
+                       dict(stats.tokens), dict(stats.cache))
+                for name, stats in sorted(self._stages.items())
+            }
+        lines = [
+            "# HELP agent_stage_duration_seconds Duration of traced agent stages.",
+            "# TYPE agent_stage_duration_seconds histogram",
+        ]
+        for name, (count, _, total, buckets, _, _, _) in stages.items():
+            stage = _label(name)
+            cumulative = 0
+            for bound, bucket in zip(_BUCKETS, buckets):
+                cumulative += bucket
+                lines.append(f'agent_stage_duration_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+            lines.append(f'agent_stage_duration_seconds_bucket{{stage="{stage}",le="+Inf"}} {count}')
+            lines.append(f'agent_stage_duration_seconds_sum{{stage="{stage}"}} {total:.6f}')
+            lines.append(f'agent_stage_duration_seconds_count{{stage="{stage}"}} {count}')
+
+        lines += [
+            "# HELP agent_stage_window_seconds Stage duration quantiles over the most recent spans.",
+            "# TYPE agent_stage_window_seconds gauge",
+        ]
+        for name, (_, _, _, _, window, _, _) in stages.items():
+            for q in _QUANTILES:
+                lines.append(f'agent_stage_window_seconds{{stage="{_label(name)}",quantile="{q}"}} {_quantile(window, q):.6f}')
+
+        lines += ["# HELP agent_stage_errors_total Spans that ended with an exception.",
+                  "# TYPE agent_stage_errors_total counter"]
+        lines += [f'agent_stage_errors_total{{stage="{_label(name)}"}} {values[1]}' for name, values in stages.items()]
+
+        lines += ["# HELP agent_stage_tokens_total LLM tokens by stage and kind.",
+                  "# TYPE agent_stage_tokens_total counter"]
+        for name, values in stages.items():
+            for kind, tokens in values[5].items():
+                if tokens:
+                    lines.append(f'agent_stage_tokens_total{{stage="{_label(name)}",kind="{kind}"}} {tokens}')
+
+        lines += ["# HELP agent_stage_cache_total Cache lookups by stage and result.",
+                  "# TYPE agent_stage_cache_total counter"]
+        for name, values in stages.items():
+            if any(values[6].values()):
+                for result, hits in values[6].items():
+                    lines.append(f'agent_stage_cache_total{{stage="{_label(name)}",result="{result}"}} {hits}')
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stages.clear()
+
+
+# -----------------------
+# Export
+# -----------------------
+class JsonlSpanExporter:
+    """
+    Summary:
+        Appends spans to a JSONL file; a trace's spans are written together.
+
+    Args:
+        path (str): Output file, opened in append mode on first export.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = None
+
+    def export(self, spans: List[Span]) -> None:
+        data = "".join(json.dumps(span.to_dict(), default=str) + "\n" for span in spans)
+        with self._lock:
+            if self._file is None:
+                self._file = open(self.path, "a", encoding="utf-8")
+            self._file.write(data)
+            self._file.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class Tracer:
+    """
+    Summary:
+        Creates spans, feeds every finished span to the metrics and sends sampled
+        traces to the exporter once their root span ends.
+
+    Args:
+        enabled (bool): When False, span() is a no-op.
+        sample_rate (float): Fraction of traces exported.
+        exporter (JsonlSpanExporter): Destination of sampled traces; None disables export.
+        metrics (StageMetrics): Aggregated per-stage metrics.
+    """
+
+    def __init__(self, enabled: bool = TRACE_ENABLED, sample_rate: float = TRACE_SAMPLE_RATE,
+                 exporter: Optional[JsonlSpanExporter] = None, metrics: Optional[StageMetrics] = None):
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.exporter = exporter
+        self.metrics = metrics or StageMetrics()
+
+    def start(self, name: str, attributes: Dict[str, Any]) -> Span:
+        parent = _current_span.get()
+        if parent is None:
+            trace = _Trace(sampled=self.exporter is not None and random.random() < self.sample_rate)
+        else:
+            trace = parent.trace
+        return Span(name, trace, parent.span_id if parent else None, attributes)
+
+    def finish(self, span: Span) -> None:
+        span.duration = time.perf_counter() - span._t0
+        self.metrics.record(span)
+        trace = span.trace
+        if not trace.sampled:
+            return
+        if trace.exported:
+            # Finished after its root (e.g. a cancelled background task): export alone
+            spans = [span]
+        elif span.parent_id is None:
+            trace.spans.append(span)
+            spans, trace.spans = trace.spans, []
+            trace.exported = True
+        else:
+            trace.spans.append(span)
+            return
+        try:
+            self.exporter.export(spans)
+        except Exception as e:
+            logger.warning(f"Span export failed: {str(e)}")
+
+
+tracer = Tracer(exporter=JsonlSpanExporter(TRACE_JSONL_PATH) if TRACE_JSONL_PATH else None)
+
+
+# -----------------------
+# Instrumentation API
+# -----------------------
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Any]:
+    """
+    Summary:
+        Times the enclosed block as one stage. Spans opened inside it (also in tasks
+        and in threads started with a copied context) become its children.
+
+    Yields:
+        Span: Call .set(key=value) to attach attributes.
+    """
+    if not tracer.enabled:
+        yield _NOOP_SPAN
+        return
+    current = tracer.start(name, attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except GeneratorExit:
+        # A stream whose consumer stopped early: not a failure of the stage
+        raise
+    except asyncio.CancelledError:
+        current.status = "cancelled"
+        raise
+    except BaseException as e:
+        current.status = "error"
+        current.attributes.setdefault("error", type(e).__name__)
+        raise
+    finally:
+        try:
+            _current_span.reset(token)
+        except ValueError:
+            # Generator finalized from another context (e.g. garbage collected)
+            pass
+        tracer.finish(current)
+
+
+def annotate(**attributes: Any) -> None:
+    """Adds attributes to the current span, if any."""
+    current = _current_span.get()
+    if current is not None:
+        current.set(**attributes)
+
+
+def _switch(current: Any, target: Optional[Span]) -> None:
+    """Makes ``target`` the current span, unless ``current`` is a no-op (tracing disabled)."""
+    if current is not _NOOP_SPAN:
+        _current_span.set(target)
+
+
+def traced(name: str, **attributes: Any) -> Callable[[Callable], Callable]:
+    """
+    Summary:
+        Decorator running each call of a function inside span(name). Generators and
+        async generators are timed until they are exhausted or closed.
+    """
+    def decorate(fn: Callable) -> Callable:
+        # Generators run in their consumer's context: between items the span is swapped
+        # back to the consumer's own, so spans the consumer opens are not parented to it
+        if inspect.isasyncgenfunction(fn):
+            async def wrapper(*args, **kwargs):
+                parent = _current_span.get()
+                with span(name, **attributes) as current:
+                    agen = fn(*args, **kwargs)
+                    try:
+                        while True:
+                            try:
+                                item = await agen.__anext__()
+                            except StopAsyncIteration:
+                                break
+                            _switch(current, parent)
+                            try:
+                                yield item
+                            finally:
+                                _switch(current, current)
+                    finally:
+                        # Runs the inner generator's cleanup now when the consumer stops early
+                        await agen.aclose()
+        elif inspect.isgeneratorfunction(fn):
+            def wrapper(*args, **kwargs):
+                parent = _current_span.get()
+                with span(name, **attributes) as current:
+                    gen = fn(*args, **kwargs)
+                    try:
+                        for item in gen:
+                            _switch(current, parent)
+                            try:
+                                yield item
+                            finally:
+                                _switch(current, current)
+                    finally:
+                        gen.close()
+        elif inspect.iscoroutinefunction(fn):
+            async def wrapper(*args, **kwargs):
+                with span(name, **attributes):
+                    return await fn(*args, **kwargs)
+        else:
+            def wrapper(*args, **kwargs):
+                with span(name, **attributes):
+                    return fn(*args, **kwargs)
+        return functools.wraps(fn)(wrapper)
+
+    return decorate
+
+
+def stage_summary() -> Dict[str, Dict[str, Any]]:
+    """Per-stage count, errors, mean/p50/p99 latency, tokens and cache counts."""
+    return tracer.metrics.summary()
+
+
+def render_prometheus() -> str:
+    return tracer.metrics.render_prometheus()